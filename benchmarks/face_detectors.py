@@ -0,0 +1,174 @@
+"""
+Face detector benchmark: compares the src/detection backends on recorded clips.
+
+A clip is a video file or a directory of frames. Recall is measured two ways:
+  * frame recall: share of frames with at least one detection (clips are expected to
+    show a face in every frame)
+  * box recall: share of annotated faces matched with IoU >= --iou, when an
+    annotation file `<clip>.faces.json` exists: {"<frame_index>": [[x, y, w, h], ...]}
+Latency is the per-frame detect() time (p50/p95) on full-resolution frames, including
+the grayscale/downscale step. --downscales sweeps the detection downscale factor.
+
+Usage:
+    python benchmarks/face_detectors.py --clips clips/kiosk1.mp4 clips/kiosk2/ \\
+        --backends haar yunet mediapipe --output detectors.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+
+from src.config import model as cfg  # noqa: E402
+from src.detection import FACE_DETECTOR_BACKENDS, create_face_detector  # noqa: E402
+from src.handler.latency import LatencyHistogram  # noqa: E402
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def read_clip(path, max_frames=None):
+    """Yields BGR frames of a video file or an (alphabetically sorted) frame directory."""
+    count = 0
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if max_frames is not None and count >= max_frames:
+                return
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                frame = cv2.imread(os.path.join(path, name))
+                if frame is not None:
+                    count += 1
+                    yield frame
+        return
+    cap = cv2.VideoCapture(path)
+    try:
+        while max_frames is None or count < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                return
+            count += 1
+            yield frame
+    finally:
+        cap.release()
+
+
+def load_annotations(clip_path):
+    path = f"{clip_path.rstrip(os.sep)}.faces.json"
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return {int(idx): boxes for idx, boxes in json.load(f).items()}
+
+
+def iou(a, b):
+    ax1, ay1, bx1, by1 = a[0] + a[2], a[1] + a[3], b[0] + b[2], b[1] + b[3]
+    inter_w = max(0, min(ax1, bx1) - max(a[0], b[0]))
+    inter_h = max(0, min(ay1, by1) - max(a[1], b[1]))
+    inter = inter_w * inter_h
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def count_matches(detections, ground_truth, threshold):
+    """Greedy one-to-one matching of ground-truth boxes to detections."""
+    unused = list(detections)
+    matched = 0
+    for gt in ground_truth:
+        best = max(unused, key=lambda d: iou(d, gt), default=None)
+        if best is not None and iou(best, gt) >= threshold:
+            unused.remove(best)
+            matched += 1
+    return matched
+
+
+def benchmark_backend(backend, clips, max_frames, iou_threshold, downscale=None):
+    options = dict(cfg.FACE_DETECTOR_OPTIONS.get(backend, {}))
+    if downscale is not None:
+        options["downscale"] = downscale
+    detector = create_face_detector(backend, **options)
+    histogram = LatencyHistogram(max_samples=100000)
+    frames = frames_with_face = 0
+    gt_total = gt_matched = 0
+    try:
+        for clip in clips:
+            annotations = load_annotations(clip)
+            for index, frame in enumerate(read_clip(clip, max_frames)):
+                start = time.perf_counter()
+                boxes = detector.detect(frame)
+                histogram.record(time.perf_counter() - start)
+                frames += 1
+                frames_with_face += bool(boxes)
+                if annotations is not None and index in annotations:
+                    gt_total += len(annotations[index])
+                    gt_matched += count_matches(boxes, annotations[index], iou_threshold)
+    finally:
+        detector.close()
+    latency = histogram.summary()
+    return {
+        "backend": backend,
+        "downscale": detector.downscale,
+        "frames": frames,
+        "frame_recall": frames_with_face / frames if frames else None,
+        "box_recall": gt_matched / gt_total if gt_total else None,
+        "annotated_faces": gt_total,
+        "mean_ms": latency.get("mean_ms"),
+        "p50_ms": latency.get("p50_ms"),
+        "p95_ms": latency.get("p95_ms"),
+    }
+
+
+def format_row(result):
+    def pct(value):
+        return f"{value * 100:.1f}" if value is not None else "n/a"
+
+    def ms(value):
+        return f"{value:.2f}" if value is not None else "n/a"
+
+    return (
+        f"| {result['backend']:<10} | {result['downscale']:>9.2f} | {result['frames']:>7} "
+        f"| {pct(result['frame_recall']):>12} | {pct(result['box_recall']):>10} | {ms(result['p50_ms']):>8} | {ms(result['p95_ms']):>8} |"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare face detector backends on recorded clips.")
+    parser.add_argument("--clips", nargs="+", required=True, help="Video files or frame directories.")
+    parser.add_argument("--backends", nargs="+", choices=FACE_DETECTOR_BACKENDS.keys(),
+                        default=list(FACE_DETECTOR_BACKENDS.keys()))
+    parser.add_argument("--max_frames", type=int, default=None, help="Frames read per clip.")
+    parser.add_argument("--downscales", nargs="+", type=float, default=None,
+                        help="Detection downscale factors to compare (default: value from config).")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU threshold for box recall.")
+    parser.add_argument("--output", type=str, default=None, help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = []
+    for backend in args.backends:
+        for downscale in args.downscales or [None]:
+            try:
+                results.append(benchmark_backend(backend, args.clips, args.max_frames, args.iou, downscale))
+            except Exception as e:
+                print(f"Skipping '{backend}': {e}")
+                break
+
+    print(
+        f"| {'backend':<10} | {'downscale':>9} | {'frames':>7} | {'frame recall':>12} "
+        f"| {'box recall':>10} | {'p50 ms':>8} | {'p95 ms':>8} |"
+    )
+    print(f"|{'-' * 12}|{'-' * 11}|{'-' * 9}|{'-' * 14}|{'-' * 12}|{'-' * 10}|{'-' * 10}|")
+    for result in results:
+        print(format_row(result))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": time.time(), "clips": args.clips, "results": results}, f, indent=4)
+        print(f"Results written to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Startup benchmark for the survey app (main.py).
+
+Measures two things so startup cost can be tracked as a metric:
+  * import cost of `main` with `python -X importtime`, summarised per top-level package
+  * time-to-first-question: wall-clock time from process launch until the first
+    question is shown (main.py reports it when STARTUP_BENCHMARK_T0 is set)
+
+Usage:
+    python benchmarks/startup.py --runs 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+METRIC_LINE = re.compile(r"STARTUP_METRIC time_to_first_question=([\d.]+)")
+
+
+def measure_import_time(module: str, top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    packages = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative_us, indent, name = match.groups()
+        # Only top-level imports (one space of indentation) add up to the total
+        if len(indent) == 1:
+            total_us += int(cumulative_us)
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + int(cumulative_us)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "ok": result.returncode == 0,
+        "total_ms": total_us / 1000,
+        "top_packages_ms": {name: us / 1000 for name, us in ranked},
+    }
+
+
+def measure_time_to_first_question(runs: int, timeout: float, offscreen: bool):
+    env = dict(os.environ)
+    if offscreen:
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    samples = []
+    for _ in range(runs):
+        env["STARTUP_BENCHMARK_T0"] = repr(time.time())
+        try:
+            result = subprocess.run(
+                [sys.executable, "main.py"],
+                cwd=REPO_ROOT,
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            print(f"Run timed out after {timeout}s")
+            continue
+        match = METRIC_LINE.search(result.stdout)
+        if match:
+            samples.append(float(match.group(1)))
+        else:
+            print(f"No startup metric found (exit code {result.returncode}):")
+            print(result.stderr[-2000:])
+    if not samples:
+        return {"runs": 0}
+    return {
+        "runs": len(samples),
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "samples_s": samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup benchmark for main.py.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--top", type=int, default=10, help="Packages shown in the import summary.")
+    parser.add_argument("--no-offscreen", action="store_true",
+                        help="Use the real display instead of QT_QPA_PLATFORM=offscreen.")
+    parser.add_argument("--output", type=str, default=None, help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    imports = measure_import_time("main", args.top)
+    print(f"Import time of 'main': {imports['total_ms']:.1f} ms")
+    for name, ms in imports["top_packages_ms"].items():
+        print(f"  {name:<20} {ms:8.1f} ms")
+
+    first_question = measure_time_to_first_question(args.runs, args.timeout, not args.no_offscreen)
+    if first_question["runs"]:
+        print(
+            f"Time to first question: median {first_question['median_s'] * 1000:.0f} ms "
+            f"(min {first_question['min_s'] * 1000:.0f}, max {first_question['max_s'] * 1000:.0f}, "
+            f"{first_question['runs']} runs)"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {"timestamp": time.time(), "imports": imports, "time_to_first_question": first_question},
+                f,
+                indent=4,
+            )
+        print(f"Results written to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
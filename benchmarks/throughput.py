@@ -0,0 +1,302 @@
+"""
+Headless end-to-end throughput benchmark for the emotion pipelines.
+
+Each pipeline is rebuilt from the same functions the apps use, without creating any
+Qt window, and fed from a frame source (src/frame_source.py):
+  * webcam_handler:    ModelHandler full-frame preprocess + ONNX (survey app)
+  * camera_concurrent: face detector + FaceMesh alignment + timm transform/ONNX
+  * deltacam:          face detector + CLAHE/FaceMesh geometric features + delta MLP
+Every frame goes through the full pipeline (the apps throttle detection/classification
+to an interval; this measures the per-frame cost behind that budget).
+
+Results contain frames per second plus per-stage latency (p50/p95/mean) and are written
+as JSON, so runs on different commits can be compared with --compare.
+
+Usage:
+    python benchmarks/throughput.py --source "video:clips/kiosk1.mp4?realtime=0" --output before.json
+    python benchmarks/throughput.py --source "synthetic?num_frames=300&realtime=0" \\
+        --compare before.json --max_regression 10
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DELTACAM_DIR = os.path.join(REPO_ROOT, "deltacam")
+sys.path.append(REPO_ROOT)
+
+from src.frame_source import open_frame_source  # noqa: E402
+from src.handler.latency import LatencyHistogram  # noqa: E402
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Registers a setup function returning (process(frame, timer), cleanup or None)."""
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+class StageTimer:
+    def __init__(self):
+        self.histograms = defaultdict(lambda: LatencyHistogram(max_samples=100000))
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histograms[name].record(time.perf_counter() - start)
+
+    def summary(self):
+        return {
+            name: {key: histogram.summary().get(key) for key in ("count", "mean_ms", "p50_ms", "p95_ms")}
+            for name, histogram in self.histograms.items()
+        }
+
+
+@benchmark("webcam_handler")
+def setup_webcam_handler(args):
+    from src.handler.model import ModelHandler
+
+    handler = ModelHandler(warmup_runs=args.warmup)
+    if handler.ort_session is None:
+        raise RuntimeError(f"model '{handler.onnx_model_path}' could not be loaded")
+
+    def process(frame, timer):
+        with timer.stage("preprocess"):
+            preprocessed = handler.preprocess_image(frame)
+        with timer.stage("inference"):
+            handler.predict(preprocessed)
+
+    return process, None
+
+
+@benchmark("camera_concurrent")
+def setup_camera_concurrent(args):
+    import mediapipe as mp
+    import onnxruntime
+
+    import camera_concurrent as app
+    from src.config import model as cfg
+    from src.detection import create_face_detector, crop_face
+    from src.handler.model import model_variant_path
+
+    detector = create_face_detector(
+        cfg.FACE_DETECTOR_BACKEND, **cfg.FACE_DETECTOR_OPTIONS.get(cfg.FACE_DETECTOR_BACKEND, {})
+    )
+    face_mesh = mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=False, max_num_faces=1, min_detection_confidence=0.5, min_tracking_confidence=0.5
+    )
+    transform, _ = app.create_timm_transform(cfg.MODEL_NAME)
+    session = onnxruntime.InferenceSession(model_variant_path(cfg.MODEL_PATH, cfg.MODEL_VARIANT))
+    input_name = session.get_inputs()[0].name
+
+    def process(frame, timer):
+        with timer.stage("detect"):
+            faces = detector.detect(frame)
+        for box in faces:
+            face_roi = crop_face(frame, box)
+            with timer.stage("align"):
+                aligned_face = app.align_face_roi(face_roi, face_mesh)
+            if aligned_face is None:
+                continue
+            with timer.stage("classify"):
+                app.classify_face(aligned_face, transform, session, input_name)
+
+    def cleanup():
+        face_mesh.close()
+        detector.close()
+
+    return process, cleanup
+
+
+@benchmark("deltacam")
+def setup_deltacam(args):
+    import mediapipe as mp
+    import onnxruntime
+
+    sys.path.insert(0, DELTACAM_DIR)
+    import camera as app
+    from src.detection import create_face_detector
+
+    fused_path = os.path.join(DELTACAM_DIR, app.FUSED_MODEL_PATH)
+    if os.path.exists(fused_path):
+        session = onnxruntime.InferenceSession(fused_path)
+        scaler = None
+    else:
+        import joblib
+
+        session = onnxruntime.InferenceSession(os.path.join(DELTACAM_DIR, app.MODEL_PATH))
+        scaler = joblib.load(os.path.join(DELTACAM_DIR, app.SCALER_PATH))
+    input_name = session.get_inputs()[0].name
+    global_baseline = np.load(os.path.join(DELTACAM_DIR, app.GLOBAL_BASELINE_PATH))
+    options = dict(app.FACE_DETECTOR_OPTIONS.get(app.FACE_DETECTOR_BACKEND, {}))
+    if "cascade_path" in options and not os.path.exists(options["cascade_path"]):
+        options["cascade_path"] = os.path.join(DELTACAM_DIR, options["cascade_path"])
+    detector = create_face_detector(app.FACE_DETECTOR_BACKEND, **options)
+    face_mesh = mp.solutions.face_mesh.FaceMesh(max_num_faces=1, min_detection_confidence=0.5)
+    # The first frames with a face act as the neutral calibration, like the app does
+    state = {"calibration": [], "baseline": None, "scaling_factors": None}
+
+    def process(frame, timer):
+        with timer.stage("detect"):
+            faces = detector.detect(frame)
+        if not faces:
+            return
+        x, y, w, h = faces[0]
+        with timer.stage("features"):
+            features, _ = app.calculate_geometric_features(frame[y:y + h, x:x + w], face_mesh)
+        if features is None:
+            return
+        if state["baseline"] is None:
+            state["calibration"].append(features)
+            if len(state["calibration"]) >= args.calibration_frames:
+                state["baseline"] = np.mean(state["calibration"], axis=0)
+                state["scaling_factors"] = global_baseline / (state["baseline"] + 1e-6)
+            return
+        with timer.stage("mlp"):
+            model_input = app.build_model_input(
+                input_name, features - state["baseline"], state["scaling_factors"], scaler
+            )
+            app.softmax(session.run(None, model_input)[0][0])
+
+    def cleanup():
+        face_mesh.close()
+        detector.close()
+
+    return process, cleanup
+
+
+def run_benchmark(name, args):
+    process, cleanup = BENCHMARKS[name](args)
+    timer = StageTimer()
+    source = open_frame_source(args.source)
+    if not source.isOpened():
+        raise RuntimeError(f"could not open frame source '{args.source}'")
+    frames = 0
+    frame = None
+    start = time.perf_counter()
+    try:
+        while args.max_frames is None or frames < args.max_frames:
+            with timer.stage("capture"):
+                ret, frame = source.read(frame)
+            if not ret:
+                break
+            with timer.stage("total"):
+                process(frame, timer)
+            frames += 1
+    finally:
+        source.release()
+        if cleanup:
+            cleanup()
+    wall_s = time.perf_counter() - start
+    return {
+        "frames": frames,
+        "wall_s": wall_s,
+        "fps": frames / wall_s if wall_s > 0 else 0.0,
+        "stages": timer.summary(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path, max_regression):
+    """Prints FPS and stage p50 changes against an earlier run; returns False on a regression."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nComparison with '{baseline_path}' (commit {baseline.get('commit')}):")
+    ok = True
+    for name, result in results.items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before or not before.get("fps"):
+            continue
+        change = (result["fps"] - before["fps"]) / before["fps"] * 100.0
+        regressed = max_regression is not None and change < -max_regression
+        ok = ok and not regressed
+        print(
+            f"  {name}: {before['fps']:.1f} -> {result['fps']:.1f} fps ({change:+.1f}%)"
+            f"{' REGRESSION' if regressed else ''}"
+        )
+        for stage, stats in result["stages"].items():
+            old = before.get("stages", {}).get(stage, {}).get("p50_ms")
+            if old and stats.get("p50_ms") is not None:
+                print(f"    {stage:<10} p50 {old:8.2f} -> {stats['p50_ms']:8.2f} ms")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless throughput benchmark for the emotion pipelines.")
+    parser.add_argument("--source", type=str, default="synthetic?num_frames=300&realtime=0",
+                        help="Frame source spec (see src/frame_source.py); use ?realtime=0 for max speed.")
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS.keys(), default=list(BENCHMARKS.keys()))
+    parser.add_argument("--max_frames", type=int, default=None)
+    parser.add_argument("--warmup", type=int, default=3, help="ModelHandler warm-up runs.")
+    parser.add_argument("--calibration_frames", type=int, default=30, help="deltacam neutral calibration frames.")
+    parser.add_argument("--output", type=str, default=None, help="Write results as JSON to this path.")
+    parser.add_argument("--compare", type=str, default=None, help="Earlier results JSON to compare against.")
+    parser.add_argument("--max_regression", type=float, default=None,
+                        help="Exit with status 1 if FPS drops more than this many percent vs --compare.")
+    args = parser.parse_args()
+    args.output = os.path.abspath(args.output) if args.output else None
+    args.compare = os.path.abspath(args.compare) if args.compare else None
+    # Model and cascade paths in the configs are relative to the repository root
+    os.chdir(REPO_ROOT)
+
+    results = {}
+    for name in args.benchmarks:
+        print(f"Running '{name}'...")
+        try:
+            results[name] = run_benchmark(name, args)
+        except Exception as e:
+            print(f"Skipping '{name}': {e}")
+            continue
+        result = results[name]
+        print(f"  {result['frames']} frames, {result['fps']:.1f} fps")
+        for stage, stats in result["stages"].items():
+            if stats["p50_ms"] is not None:
+                print(f"    {stage:<10} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  (n={stats['count']})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "timestamp": time.time(),
+                    "commit": git_commit(),
+                    "source": args.source,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "benchmarks": results,
+                },
+                f,
+                indent=4,
+            )
+        print(f"Results written to '{args.output}'")
+
+    if args.compare and not compare(results, args.compare, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import asyncio
+import functools
 import sys
 import cv2
 import numpy as np
@@ -8,10 +10,18 @@ import mediapipe as mp
 from torchvision import transforms
 from PIL import Image
 
-from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QLabel, QVBoxLayout
-from PyQt6.QtCore import QTimer, Qt
-from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QGridLayout
+from PyQt6.QtCore import QTimer
 import src.config.model as cfg  # Asumsikan file config.py Anda ada
+from src.handler.model import model_variant_path
+from src.detection import create_face_detector, crop_face
+from src.frame_view import FrameView
+from src.frame_source import frame_source_specs, open_frame_source
+from src.handler.rate_control import RateController
+from src.handler.scheduler import FairScheduler
+from src.runtime import AsyncRuntime, run_qt_app
+from src.analysis_pool import AnalysisPool
+from src.metrics import METRICS, start_metrics
 
 
 def softmax(x):
@@ -36,181 +46,341 @@ def create_timm_transform(model_name: str):
     return transform, (input_size[1], input_size[2])
 
 
+def align_face_roi(face_roi, face_mesh):
+    """Meluruskan wajah berdasarkan garis mata dari landmark FaceMesh."""
+    try:
+        roi_h, roi_w, _ = face_roi.shape
+        with METRICS.span("mesh"):
+            results = face_mesh.process(cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB))
+
+        if not results.multi_face_landmarks:
+            return None
+        landmarks_unnormalized = np.array(
+            [
+                (lm.x * roi_w, lm.y * roi_h)
+                for lm in results.multi_face_landmarks[0].landmark
+            ]
+        )
+        left_eye = landmarks_unnormalized[133]
+        right_eye = landmarks_unnormalized[362]
+        dY = right_eye[1] - left_eye[1]
+        dX = right_eye[0] - left_eye[0]
+        angle = np.degrees(np.arctan2(dY, dX))
+
+        eyes_center = (
+            (left_eye[0] + right_eye[0]) // 2,
+            (left_eye[1] + right_eye[1]) // 2,
+        )
+        M = cv2.getRotationMatrix2D(eyes_center, angle, scale=1.0)
+        aligned_face = cv2.warpAffine(
+            face_roi, M, (roi_w, roi_h), flags=cv2.INTER_CUBIC
+        )
+        return aligned_face
+    except Exception:
+        return None
+
+
+def classify_face(aligned_face, transform, ort_session, input_name):
+    """Transformasi timm + inferensi ONNX; mengembalikan probabilitas softmax."""
+    with METRICS.span("transform"):
+        pil_image = Image.fromarray(cv2.cvtColor(aligned_face, cv2.COLOR_BGR2RGB))
+        input_tensor = transform(pil_image).unsqueeze(0).numpy()
+    with METRICS.span("onnx"):
+        outputs = ort_session.run(None, {input_name: input_tensor})
+    return softmax(outputs[0][0])
+
+
+class EmotionAnalyzer:
+    """
+    Detektor wajah, FaceMesh, transformasi timm dan model ONNX dalam satu objek.
+    Dipakai langsung di proses GUI atau dibuat di setiap worker AnalysisPool.
+    """
+
+    def __init__(self, static_image_mode: bool = False, onnx_threads: int = 0):
+        self.class_names = cfg.CLASS_NAMES
+        self.transform, self.input_size = create_timm_transform(cfg.MODEL_NAME)
+        self.model_path = model_variant_path(cfg.MODEL_PATH, cfg.MODEL_VARIANT)
+        session_options = onnxruntime.SessionOptions()
+        if onnx_threads:
+            # Di worker: satu thread per proses agar core tidak diperebutkan
+            session_options.intra_op_num_threads = onnx_threads
+        self.ort_session = onnxruntime.InferenceSession(self.model_path, sess_options=session_options)
+        self.input_name = self.ort_session.get_inputs()[0].name
+        output_shape = self.ort_session.get_outputs()[0].shape
+        jumlah_kelas = output_shape[1]  # Asumsi bentuk output adalah [batch_size, num_classes]
+        print(f"✅ Model ini memiliki {jumlah_kelas} kelas output.")
+        print(f"✅ Model Emosi ONNX '{self.model_path}' berhasil dimuat.")
+
+        self.face_detector = create_face_detector(
+            cfg.FACE_DETECTOR_BACKEND,
+            **cfg.FACE_DETECTOR_OPTIONS.get(cfg.FACE_DETECTOR_BACKEND, {}),
+        )
+        print(f"✅ Detektor wajah '{cfg.FACE_DETECTOR_BACKEND}' berhasil dimuat.")
+        self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+            # False lebih baik untuk video real-time; worker menerima wajah dari frame
+            # dan orang yang berbeda-beda, sehingga memakai mode gambar statis
+            static_image_mode=static_image_mode,
+            max_num_faces=1,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5,
+        )
+        print("✅ MediaPipe Face Mesh model berhasil dimuat.")
+
+    def detect(self, frame):
+        return self.face_detector.detect(frame)
+
+    def classify(self, frame, box):
+        """Mengembalikan (box, indeks label, probabilitas) atau None jika wajah tidak bisa diluruskan."""
+        face_roi = crop_face(frame, box)
+        if face_roi.size == 0:
+            return None
+        aligned_face = align_face_roi(face_roi, self.face_mesh)
+        if aligned_face is None:
+            return None
+        # Transformasi timm + inferensi ONNX pada wajah yang sudah lurus
+        probabilities = classify_face(aligned_face, self.transform, self.ort_session, self.input_name)
+        return tuple(box), int(np.argmax(probabilities)), probabilities
+
+    def close(self):
+        self.face_mesh.close()  # Penting: Tutup model MediaPipe
+        self.face_detector.close()
+
+
+class CameraState:
+    """State per kamera: sumber frame, buffer, hasil deteksi terakhir dan tampilan."""
+
+    def __init__(self, camera_id, frame_source, frame_view):
+        self.camera_id = camera_id
+        self.cap = open_frame_source(frame_source)
+        self.frame_view = frame_view
+        # Dua buffer capture bergantian: pembacaan di executor tidak menimpa frame
+        # yang sedang ditampilkan oleh FrameView
+        self.frame_buffers = [None, None]
+        self.buffer_index = 0
+        self.last_detection_time = 0
+        self.last_known_faces = []
+        self.last_known_predictions = {}
+
+    @property
+    def name(self):
+        return "kamera" if self.camera_id is None else f"kamera {self.camera_id}"
+
+
 class CameraWindow(QMainWindow):
-    def __init__(self):
+    """
+    Jendela kamera di atas AsyncRuntime: satu task capture+tampilan per kamera dan satu
+    task analisis yang mengambil frame dari FairScheduler. Pembacaan kamera dan analisis
+    di proses GUI dijalankan di executor, sehingga UI tidak tersendat.
+    """
+
+    def __init__(self, runtime):
         super().__init__()
+        self.runtime = runtime
         self.setWindowTitle(cfg.WINDOW_TITLE)
         self.setGeometry(100, 100, cfg.WINDOW_WIDTH, cfg.WINDOW_HEIGHT)
         self.class_names = cfg.CLASS_NAMES
-        self.last_detection_time = 0
-        self.last_known_faces = []
-        self.last_known_predictions = {}
-        try:
-            self.transform, self.input_size = create_timm_transform(cfg.MODEL_NAME)
-            self.ort_session = onnxruntime.InferenceSession(cfg.MODEL_PATH)
-            self.input_name = self.ort_session.get_inputs()[0].name
-            output_shape = self.ort_session.get_outputs()[0].shape
-            jumlah_kelas = output_shape[
-                1
-            ]  # Asumsi bentuk output adalah [batch_size, num_classes]
-            print(f"✅ Model ini memiliki {jumlah_kelas} kelas output.")
-            # -----------------------------
-
-            print(f"✅ Model Emosi ONNX '{cfg.MODEL_PATH}' berhasil dimuat.")
-            print(f"✅ Model Emosi ONNX '{cfg.MODEL_PATH}' berhasil dimuat.")
-
-        except Exception as e:
-            print(f"❌ Gagal memuat model atau transformasi: {e}")
-            return
-        try:
-            self.face_cascade = cv2.CascadeClassifier(cfg.HAAR_CASCADE_PATH)
-            print(
-                f"✅ Classifier Wajah (Haar) '{cfg.HAAR_CASCADE_PATH}' berhasil dimuat."
-            )
-            self.mp_face_mesh = mp.solutions.face_mesh
-            self.face_mesh = self.mp_face_mesh.FaceMesh(
-                static_image_mode=False,  # False lebih baik untuk video real-time
-                max_num_faces=1,
-                min_detection_confidence=0.5,
-                min_tracking_confidence=0.5,
+        self.cameras = []
+        sources = frame_source_specs(cfg.FRAME_SOURCES)
+        if len(sources) == 1:
+            sources = [cfg.FRAME_SOURCE if sources[0] is None else sources[0]]
+        camera_ids = cfg.CAMERA_IDS
+        if camera_ids is None:
+            camera_ids = [None] if len(sources) == 1 else [f"cam{i}" for i in range(len(sources))]
+        self.analyzer = None
+        self.analysis_pools = {}  # Satu pool per ukuran frame (slot shared memory berukuran tetap)
+        self.analysis_workers = cfg.ANALYSIS_WORKERS
+        self.multi_camera = len(sources) > 1
+        if self.analysis_workers <= 0:
+            # Tanpa worker: semua model dimuat dan dijalankan di proses GUI
+            try:
+                self.analyzer = EmotionAnalyzer(static_image_mode=self.multi_camera)
+            except Exception as e:
+                print(f"❌ Gagal memuat model atau detektor wajah: {e}")
+                return
+        # Anggaran analisis dibagi adil ke semua kamera (yang paling lama tidak dilayani duluan)
+        self.scheduler = FairScheduler(cfg.INFERENCE_BUDGET_PER_SECOND)
+        self.frame_offered = None
+        # Interval deteksi menyesuaikan beban CPU, latensi analisis dan baterai
+        self.detection_rate = (
+            RateController(
+                "detection",
+                cfg.DETECTION_INTERVAL_SECONDS,
+                *cfg.DETECTION_INTERVAL_BOUNDS,
+                **cfg.RATE_CONTROL_OPTIONS,
             )
-            print("✅ MediaPipe Face Mesh model berhasil dimuat.")
+            if cfg.ADAPTIVE_RATES
+            else None
+        )
 
-        except Exception as e:
-            print(f"❌ Gagal memuat detektor wajah: {e}")
-            return
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
-            print("❌ Error: Tidak bisa membuka kamera.")
-            return
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
-        self.layout = QVBoxLayout(self.central_widget)
-        self.image_label = QLabel(self)
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.layout.addWidget(self.image_label)
+        self.layout = QGridLayout(self.central_widget)
+        columns = int(np.ceil(np.sqrt(len(sources))))
+        for index, (camera_id, source) in enumerate(zip(camera_ids, sources)):
+            # Frame ditampilkan langsung sebagai BGR888; skala dikerjakan oleh widget
+            frame_view = FrameView(self)
+            self.layout.addWidget(frame_view, index // columns, index % columns)
+            camera = CameraState(camera_id, source, frame_view)
+            if not camera.cap.isOpened():
+                print(f"❌ Error: Tidak bisa membuka sumber frame {camera.name}.")
+                continue
+            self.cameras.append(camera)
+            self.scheduler.add_camera(camera.camera_id)
+        if not self.cameras:
+            return
+        self.cap = self.cameras[0].cap
 
-        self.timer = QTimer()
-        self.timer.setInterval(1000 // cfg.VIDEO_FPS)
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start()
+    def start(self):
+        """Menjalankan task capture dan analisis; dipanggil setelah event loop berjalan."""
+        self.frame_offered = asyncio.Event()
+        for camera in self.cameras:
+            self.runtime.spawn(self._capture_loop(camera), name=f"capture-{camera.camera_id}")
+        self.runtime.spawn(self._analysis_loop(), name="analysis")
 
-    def align_face_roi(self, face_roi):
+    async def _capture_loop(self, camera):
+        METRICS.set_camera(camera.camera_id)
+        frame_interval = 1.0 / cfg.VIDEO_FPS
         try:
-            roi_h, roi_w, _ = face_roi.shape
-            results = self.face_mesh.process(cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB))
-
-            if not results.multi_face_landmarks:
-                return None
-            landmarks_unnormalized = np.array(
-                [
-                    (lm.x * roi_w, lm.y * roi_h)
-                    for lm in results.multi_face_landmarks[0].landmark
-                ]
-            )
-            left_eye = landmarks_unnormalized[133]
-            right_eye = landmarks_unnormalized[362]
-            dY = right_eye[1] - left_eye[1]
-            dX = right_eye[0] - left_eye[0]
-            angle = np.degrees(np.arctan2(dY, dX))
-
-            eyes_center = (
-                (left_eye[0] + right_eye[0]) // 2,
-                (left_eye[1] + right_eye[1]) // 2,
-            )
-            M = cv2.getRotationMatrix2D(eyes_center, angle, scale=1.0)
-            aligned_face = cv2.warpAffine(
-                face_roi, M, (roi_w, roi_h), flags=cv2.INTER_CUBIC
-            )
-            return aligned_face
-        except Exception:
-            return None
+            while True:
+                started = time.perf_counter()
+                with METRICS.span("frame"):
+                    await self._update_frame(camera)
+                await asyncio.sleep(max(0.0, frame_interval - (time.perf_counter() - started)))
+        finally:
+            camera.cap.release()
 
-    def update_frame(self):
-        ret, frame = self.cap.read()
+    async def _update_frame(self, camera):
+        with METRICS.span("capture"):
+            buffer = camera.frame_buffers[camera.buffer_index]
+            ret, frame = await self.runtime.run_blocking(camera.cap.read, buffer)
         if not ret:
             return
-        display_frame = frame.copy()
+        camera.frame_buffers[camera.buffer_index] = frame
+        camera.buffer_index ^= 1
         current_time = time.time()
-        if (current_time - self.last_detection_time) > cfg.DETECTION_INTERVAL_SECONDS:
-            self.last_detection_time = current_time
-            self.last_known_predictions = {}
-            # Tahap 1: Deteksi cepat dengan Haar Cascade
-            # gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            self.last_known_faces = self.face_cascade.detectMultiScale(
-                # gray_frame,
-                frame,
-                scaleFactor=cfg.HAAR_SCALE_FACTOR,
-                minNeighbors=cfg.HAAR_MIN_NEIGHBORS,
-                minSize=cfg.HAAR_MIN_SIZE,
-            )
-            for x, y, w, h in self.last_known_faces:
-                face_roi = frame[y : y + h, x : x + w]
-                if face_roi.size != 0:
-                    aligned_face = self.align_face_roi(face_roi)
-                    if aligned_face is not None:
-                        # Konversi wajah yang sudah lurus & grayscale (via transform) untuk model
-                        pil_image = Image.fromarray(
-                            cv2.cvtColor(aligned_face, cv2.COLOR_BGR2RGB)
-                        )
-                        input_tensor = self.transform(pil_image).unsqueeze(0).numpy()
-                        # Jalankan inferensi ONNX
-                        outputs = self.ort_session.run(
-                            None, {self.input_name: input_tensor}
-                        )
-                        scores = outputs[0][0]
-                        probabilities = softmax(scores)
-                        predicted_index = np.argmax(probabilities)
-                        confidence = probabilities[predicted_index]
-                        label_text = self.class_names[predicted_index]
-
-                        display_text = f"{label_text}: {confidence:.2%}"
-
-                        self.last_known_predictions[(x, y, w, h)] = display_text
-
-        # Gambar kotak dan teks di frame display
-        for x, y, w, h in self.last_known_faces:
-            cv2.rectangle(
-                display_frame, (x, y), (x + w, y + h), cfg.BOX_COLOR, cfg.FONT_THICKNESS
-            )
-            if (x, y, w, h) in self.last_known_predictions:
-                display_text = self.last_known_predictions[(x, y, w, h)]
-                cv2.putText(
-                    display_frame,
-                    display_text,
-                    (x, y - 10),
-                    cfg.FONT,
-                    cfg.FONT_SCALE,
-                    cfg.TEXT_COLOR,
-                    cfg.FONT_THICKNESS,
+        if (current_time - camera.last_detection_time) > self._detection_interval():
+            if not self.scheduler.pending(camera.camera_id):
+                # Salinan: buffer capture dipakai ulang dan digambari kotak
+                self.scheduler.offer(camera.camera_id, (camera, frame.copy()))
+                self.frame_offered.set()
+        self._draw(camera, frame)
+
+    def _detection_interval(self):
+        if self.detection_rate is None:
+            return cfg.DETECTION_INTERVAL_SECONDS
+        return self.detection_rate.update()
+
+    async def _analysis_loop(self):
+        try:
+            while True:
+                self.frame_offered.clear()
+                job = self.scheduler.take()
+                if job is None:
+                    try:
+                        # None: belum ada kamera yang jatuh tempo, tunggu sampai ada frame
+                        await asyncio.wait_for(self.frame_offered.wait(), timeout=self.scheduler.wait_time())
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                camera, frame = job[1]
+                with METRICS.camera(camera.camera_id):
+                    await self._analyze(camera, frame, time.time())
+        finally:
+            for pool in self.analysis_pools.values():
+                pool.close()
+            if self.analyzer is not None:
+                self.analyzer.close()
+
+    async def _analyze(self, camera, frame, current_time):
+        if self.analysis_workers > 0:
+            self._submit_analysis(camera, frame, current_time)
+        else:
+            camera.last_detection_time = current_time
+            started = time.perf_counter()
+            boxes, analyses = await self.runtime.run_blocking(self._analyze_inline, frame)
+            self._on_analysis(camera, started, 0, boxes, analyses)
+
+    def _analyze_inline(self, frame):
+        # Tahap 1: Deteksi cepat dengan detektor wajah dari config
+        boxes = self.analyzer.detect(frame)
+        analyses = [self.analyzer.classify(frame, box) for box in boxes]
+        return boxes, [a for a in analyses if a is not None]
+
+    def _draw(self, camera, frame):
+        # Gambar kotak dan teks langsung di buffer frame (deteksi & crop sudah selesai)
+        with METRICS.span("draw"):
+            predictions = camera.last_known_predictions
+            for x, y, w, h in camera.last_known_faces:
+                cv2.rectangle(
+                    frame, (x, y), (x + w, y + h), cfg.BOX_COLOR, cfg.FONT_THICKNESS
                 )
+                if (x, y, w, h) in predictions:
+                    display_text = predictions[(x, y, w, h)]
+                    cv2.putText(
+                        frame,
+                        display_text,
+                        (x, y - 10),
+                        cfg.FONT,
+                        cfg.FONT_SCALE,
+                        cfg.TEXT_COLOR,
+                        cfg.FONT_THICKNESS,
+                    )
 
-        qt_image = self.convert_cv_to_qt(display_frame)
-        self.image_label.setPixmap(QPixmap.fromImage(qt_image))
+            camera.frame_view.set_frame(frame)
 
-    def convert_cv_to_qt(self, cv_img):
-        rgb_image = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_image.shape
-        bytes_per_line = ch * w
-        qt_format = QImage(
-            rgb_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888
-        )
-        return qt_format.scaled(
-            self.image_label.width(),
-            self.image_label.height(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-        )
+    def _submit_analysis(self, camera, frame, current_time):
+        pool = self.analysis_pools.get(frame.shape)
+        if pool is None:
+            # Pool dibuat saat frame pertama, karena ukuran slot shared memory = ukuran frame
+            pool = self.analysis_pools[frame.shape] = AnalysisPool(
+                EmotionAnalyzer,
+                frame.shape,
+                workers=self.analysis_workers,
+                factory_kwargs={"static_image_mode": True, "onnx_threads": 1},
+            )
+            print(f"✅ {self.analysis_workers} worker analisis dijalankan.")
+        elif pool.broken:
+            # Worker gagal (mis. model tidak bisa dimuat): lanjut di proses GUI
+            print("❌ Worker analisis berhenti, analisis dijalankan di proses GUI.")
+            for p in self.analysis_pools.values():
+                p.close()
+            self.analysis_pools = {}
+            self.analysis_workers = 0
+            try:
+                self.analyzer = EmotionAnalyzer(static_image_mode=self.multi_camera)
+            except Exception as e:
+                print(f"❌ Gagal memuat model atau detektor wajah: {e}")
+                self.runtime.cancel()
+            return
+        if pool.submit(frame, functools.partial(self._on_analysis, camera, time.perf_counter())):
+            camera.last_detection_time = current_time
+
+    def _on_analysis(self, camera, started, sequence, boxes, analyses):
+        """Menyimpan hasil analisis; dipanggil dari thread pool ketika memakai worker."""
+        if self.detection_rate is not None:
+            # Waktu analisis per interval: semua kamera, dibagi ke worker yang berjalan paralel
+            latency = time.perf_counter() - started
+            self.detection_rate.observe(latency * len(self.cameras) / max(1, self.analysis_workers))
+        predictions = {}
+        for box, label_index, probabilities in analyses:
+            label_text = self.class_names[label_index]
+            predictions[box] = f"{label_text}: {probabilities[label_index]:.2%}"
+        # Satu assignment per atribut, dibaca oleh _draw di thread GUI
+        camera.last_known_predictions = predictions
+        camera.last_known_faces = [tuple(box) for box in boxes]
 
     def closeEvent(self, event):
-        self.timer.stop()
-        self.cap.release()
-        self.face_mesh.close()  # Penting: Tutup model MediaPipe
+        # Task dibatalkan secara kooperatif; kamera, pool dan model ditutup di blok finally-nya
+        self.runtime.cancel()
         event.accept()
 
 
 if __name__ == "__main__":
+    start_metrics()  # METRICS_ENABLED=1 mengaktifkan endpoint Prometheus & log ringkasan
     app = QApplication(sys.argv)
-    window = CameraWindow()
+    runtime = AsyncRuntime(name="camera")
+    window = CameraWindow(runtime)
     if hasattr(window, "cap") and window.cap.isOpened():
         window.show()
-    sys.exit(app.exec())
+        QTimer.singleShot(0, window.start)
+    sys.exit(run_qt_app(app, runtime))
@@ -1,28 +1,58 @@
 
 from datetime import datetime
+import asyncio
 import json
 import sys
 import cv2
 import numpy as np
 import onnxruntime
 import mediapipe as mp
-import joblib
 import time
 import os
 import hashlib
+import threading
 from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QLabel, QVBoxLayout, QMessageBox  # <-- MODIFIKASI
 from PyQt6.QtCore import QTimer, Qt
-from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtGui import QPixmap
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QLabel,
                              QVBoxLayout, QMessageBox, QDialog, QPushButton, QHBoxLayout)
 from runs.map_label import CLASS_NAMES
+from smoothing import TemporalSmoother
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from src.detection import create_face_detector  # noqa: E402
+from src.frame_view import FrameView  # noqa: E402
+from src.frame_source import open_frame_source  # noqa: E402
+from src.handler.rate_control import RateController  # noqa: E402
+from src.metrics import METRICS, start_metrics  # noqa: E402
+from src.runtime import AsyncRuntime, run_qt_app  # noqa: E402
 MODEL_PATH = "./runs/emotion_model.onnx"
+FUSED_MODEL_PATH = "./runs/emotion_model_fused.onnx"
 SCALER_PATH = "./runs/delta_scaler.pkl"
 HAAR_CASCADE_PATH = "haarcascade_frontalface_default.xml"
 GLOBAL_BASELINE_PATH = "./runs/global_neutral_baseline.npy"
 SAVED_FACES_DIR = "./saved_faces"
 SIMILARITY_THRESHOLD = 0.3
 CLASSIFICATION_INTERVAL_SECONDS = 0.5
+# Interval klasifikasi mengikuti beban CPU, latensi dan baterai dalam batas (min, maks) detik
+# (lihat src/handler/rate_control.py); False: interval tetap di atas
+ADAPTIVE_CLASSIFICATION_RATE = True
+CLASSIFICATION_INTERVAL_BOUNDS = (0.25, 2.0)
+# Indeks webcam, file video, folder gambar, atau "synthetic" (lihat src/frame_source.py);
+# None: pakai environment variable FRAME_SOURCE, lalu webcam 0
+FRAME_SOURCE = None
+# --- Temporal smoothing: "none", "ema", "mean", "vote", atau "hmm" ---
+SMOOTHING_METHOD = "ema"
+SMOOTHING_WINDOW = 8
+SMOOTHING_ALPHA = 0.4
+SMOOTHING_STAY_PROB = 0.9
+# --- Detektor wajah: "haar", "yunet", "dnn", atau "mediapipe" (lihat src/detection) ---
+FACE_DETECTOR_BACKEND = "haar"
+FACE_DETECTOR_OPTIONS = {
+    "haar": {"cascade_path": HAAR_CASCADE_PATH, "scale_factor": 1.3, "min_neighbors": 5, "downscale": 2.0},
+    "yunet": {"model_path": "face_detection_yunet_2023mar.onnx", "score_threshold": 0.7},
+    "dnn": {"model_path": "res10_300x300_ssd_iter_140000.caffemodel", "config_path": "deploy.prototxt"},
+    "mediapipe": {"model_selection": 0, "min_detection_confidence": 0.5},
+}
 
 
 def softmax(x):
@@ -70,7 +100,8 @@ def calculate_geometric_features(face_roi, face_mesh):
     try:
         face_roi = preprocess_face_roi(face_roi)
         roi_h, roi_w, _ = face_roi.shape
-        results = face_mesh.process(cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB))
+        with METRICS.span("mesh"):
+            results = face_mesh.process(cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB))
         if not results.multi_face_landmarks:
             return None, None
 
@@ -154,9 +185,22 @@ def draw_probability_bars(frame, probabilities, class_names):
                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1, cv2.LINE_AA)
 
 
+def build_model_input(input_name, personal_delta, scaling_factors, scaler=None):
+    """
+    Menyusun input ONNX dari delta personal. Model gabungan (scaler=None) menerima
+    scaling_factors sebagai input kedua; model lama memakai StandardScaler sklearn.
+    """
+    if scaler is None:
+        return {input_name: personal_delta.astype(np.float32),
+                "scaling_factors": np.asarray(scaling_factors, dtype=np.float32).reshape(1, -1)}
+    features_scaled = scaler.transform(personal_delta * scaling_factors)
+    return {input_name: features_scaled.astype(np.float32)}
+
+
 class CameraWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, runtime):
         super().__init__()
+        self.runtime = runtime
         self.setWindowTitle("Deteksi Emosi Personal")
         self.setGeometry(100, 100, 800, 600)
         self.fps = 30
@@ -168,20 +212,39 @@ class CameraWindow(QMainWindow):
         self.calibration_face_images = []  # Untuk menyimpan snapshot wajah
         self.personal_offset_error = None
         self.last_classification_time = 0.0
+        self.classification_rate = (
+            RateController("classification", CLASSIFICATION_INTERVAL_SECONDS, *CLASSIFICATION_INTERVAL_BOUNDS)
+            if ADAPTIVE_CLASSIFICATION_RATE
+            else None
+        )
         self.last_probabilities = np.zeros(len(CLASS_NAMES))
+        self.smoother = TemporalSmoother(len(CLASS_NAMES), method=SMOOTHING_METHOD, window=SMOOTHING_WINDOW,
+                                         alpha=SMOOTHING_ALPHA, stay_prob=SMOOTHING_STAY_PROB)
         self.current_user_hash = None
         self.log_session_start_time = None
         self.log_filepath = None
         self.log_data_per_second = []
+        # Penulisan log (task executor & flush terakhir di closeEvent) tidak boleh tumpang tindih
+        self.log_lock = threading.Lock()
+        self.log_write = None  # Future penulisan log per menit yang terakhir dikirim ke executor
+        self.log_flush_task = None  # Task flush log terakhir saat jendela ditutup
+        self.log_flushed = False
         self.last_log_time = 0.0
         self.total_usage_seconds_offset = 0
 
         try:
             self.global_baseline = np.load(GLOBAL_BASELINE_PATH)
-            self.session = onnxruntime.InferenceSession(MODEL_PATH)
+            if os.path.exists(FUSED_MODEL_PATH):
+                # Model gabungan sudah berisi standardisasi, tidak perlu sklearn/joblib
+                self.session = onnxruntime.InferenceSession(FUSED_MODEL_PATH)
+                self.scaler = None
+            else:
+                import joblib
+                self.session = onnxruntime.InferenceSession(MODEL_PATH)
+                self.scaler = joblib.load(SCALER_PATH)
             self.input_name = self.session.get_inputs()[0].name
-            self.scaler = joblib.load(SCALER_PATH)
-            self.face_cascade = cv2.CascadeClassifier(HAAR_CASCADE_PATH)
+            self.face_detector = create_face_detector(FACE_DETECTOR_BACKEND,
+                                                      **FACE_DETECTOR_OPTIONS.get(FACE_DETECTOR_BACKEND, {}))
             self.face_mesh = mp.solutions.face_mesh.FaceMesh(max_num_faces=1, min_detection_confidence=0.5)
             os.makedirs(SAVED_FACES_DIR, exist_ok=True)  # Pastikan folder ada
             print("✅ Semua model dan file berhasil dimuat.")
@@ -259,19 +322,22 @@ class CameraWindow(QMainWindow):
 
         print(f"📝 Sesi logging dimulai untuk user {self.current_user_hash[:10]}. File log: {self.log_filepath}")
 
-    def _process_and_save_log(self):
-        if not self.log_data_per_second or not self.log_filepath:
+    @METRICS.timed("log")
+    def _process_and_save_log(self, entries=None):
+        if entries is None:
+            entries, self.log_data_per_second = self.log_data_per_second, []
+        if not entries or not self.log_filepath:
             return
         emotion_counts = {}
-        for entry in self.log_data_per_second:
+        for entry in entries:
             emo = entry['emosi']
             emotion_counts[emo] = emotion_counts.get(emo, 0) + 1
 
-        total_entries = len(self.log_data_per_second)
+        total_entries = len(entries)
         summary = {emo: count / total_entries for emo, count in emotion_counts.items()}
 
         # Tentukan menit ke berapa ini
-        first_second = self.log_data_per_second[0]['detik_penggunaan']
+        first_second = entries[0]['detik_penggunaan']
         minute_index = (first_second - 1) // 60
 
         minute_summary_entry = {
@@ -279,25 +345,26 @@ class CameraWindow(QMainWindow):
             "summary": summary
         }
         try:
-            with open(self.log_filepath, 'r+') as f:
+            with self.log_lock, open(self.log_filepath, 'r+') as f:
                 log_content = json.load(f)
-                log_content["per_second_log"].extend(self.log_data_per_second)
+                log_content["per_second_log"].extend(entries)
                 log_content["per_minute_summary"].append(minute_summary_entry)
 
                 f.seek(0)
                 json.dump(log_content, f, indent=4)
                 f.truncate()
 
-            # 3. Kosongkan buffer untuk menit selanjutnya
-            self.log_data_per_second.clear()
             print(f"💾 Log untuk menit ke-{minute_index + 1} berhasil disimpan.")
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"❌ Gagal menyimpan log: {e}")
+            # Kembalikan entri ke depan buffer agar dicoba lagi pada penyimpanan berikutnya
+            self.log_data_per_second[:0] = entries
 
     def load_profile(self, baseline_features, user_hash):
         self.personal_baseline = baseline_features
         epsilon = 1e-6
         self.scaling_factors = self.global_baseline / (self.personal_baseline + epsilon)
+        self.scaling_factors_input = np.asarray(self.scaling_factors, dtype=np.float32).reshape(1, -1)
         offset_vector = self.personal_baseline - self.global_baseline
         self.personal_offset_error = np.linalg.norm(offset_vector)
         print("✅ Profil personal berhasil dimuat.")
@@ -311,57 +378,103 @@ class CameraWindow(QMainWindow):
         print("ℹ️ Tidak ada profil cocok / pengguna menolak. Memulai kalibrasi baru...")
 
     def setup_ui_and_camera(self):
-        self.cap = cv2.VideoCapture(0)
+        self.cap = open_frame_source(FRAME_SOURCE)
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
         self.layout = QVBoxLayout(self.central_widget)
-        self.image_label = QLabel(self)
-        self.layout.addWidget(self.image_label)
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(1000 // self.fps)
-
-    def update_frame(self):
-        ret, frame = self.cap.read()
+        self.frame_view = FrameView(self)  # BGR888 tanpa konversi, skala oleh widget
+        self.layout.addWidget(self.frame_view)
+        # Dua buffer capture bergantian: pembacaan di executor tidak menimpa frame
+        # yang sedang ditampilkan oleh FrameView
+        self.frame_buffers = [None, None]
+        self.buffer_index = 0
+
+    def start(self):
+        """Menjalankan task frame; dipanggil setelah event loop (qasync) berjalan."""
+        if hasattr(self, "cap"):
+            self.runtime.spawn(self._frame_loop(), name="deltacam-frame")
+
+    async def _frame_loop(self):
+        frame_interval = 1.0 / self.fps
+        try:
+            while True:
+                started = time.perf_counter()
+                with METRICS.span("frame"):
+                    await self._update_frame()
+                await asyncio.sleep(max(0.0, frame_interval - (time.perf_counter() - started)))
+        finally:
+            self.cap.release()
+            self.face_mesh.close()
+            self.face_detector.close()
+
+    async def _update_frame(self):
+        with METRICS.span("capture"):
+            buffer = self.frame_buffers[self.buffer_index]
+            ret, frame = await self.runtime.run_blocking(self.cap.read, buffer)
         if not ret:
             return
+        self.frame_buffers[self.buffer_index] = frame
+        self.buffer_index ^= 1
         if self.app_state == "CHECKING":
-            self.perform_initial_check(frame)
+            await self.perform_initial_check(frame)
         elif self.app_state == "AWAITING_INPUT":
             self.display_image(self.last_frame_before_prompt)
             return
         elif self.app_state == "CALIBRATING":
-            self.perform_offset_calibration(frame)
+            await self.perform_offset_calibration(frame)
         elif self.app_state == "RUNNING":
-            self.perform_prediction(frame)
+            await self.perform_prediction(frame)
         elif self.app_state == "ERROR":
             cv2.putText(frame, "Error: Gagal memuat file penting!", (50, 50),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
 
         self.display_image(frame)
 
-    def perform_initial_check(self, frame):
+    def _analyze_frame(self, frame, single_face=False, personal_baseline=None):
+        """
+        Bagian berat per frame, dijalankan di executor: deteksi wajah, CLAHE + FaceMesh
+        dan, bila `personal_baseline` diberikan, klasifikasi ONNX. Frame hanya dibaca;
+        menggambar dan perubahan state tetap di event loop.
+        Mengembalikan (faces, features, landmarks, probabilities).
+        """
+        faces = self.face_detector.detect(frame)
+        if len(faces) == 0 or (single_face and len(faces) != 1):
+            return faces, None, None, None
+        x, y, w, h = faces[0]
+        face_roi = frame[y:y+h, x:x+w]
+        with METRICS.span("features"):  # CLAHE + FaceMesh ("mesh") + fitur geometris
+            features, landmarks = calculate_geometric_features(face_roi, self.face_mesh)
+        probabilities = None
+        if features is not None and personal_baseline is not None:
+            personal_delta = features - personal_baseline
+            with METRICS.span("scaler"):
+                model_input = build_model_input(self.input_name, personal_delta,
+                                                self.scaling_factors_input, self.scaler)
+            with METRICS.span("onnx"):
+                outputs = self.session.run(None, model_input)[0]
+            probabilities = softmax(outputs[0])
+        return faces, features, landmarks, probabilities
+
+    async def perform_initial_check(self, frame):
+        faces, features, _, _ = await self.runtime.run_blocking(self._analyze_frame, frame, True)
         cv2.putText(frame, "Mencari profil wajah...",
                     (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
         if len(faces) == 1:
             x, y, w, h = faces[0]
             cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 255), 2)
-            face_roi = frame[y:y+h, x:x+w]
-            features, _ = calculate_geometric_features(face_roi, self.face_mesh)
             if features is not None:
-                saved_image_path, saved_baseline, face_hash = self.find_similar_face(features)
+                # Membaca semua profil tersimpan dari disk, jadi ikut di executor
+                saved_image_path, saved_baseline, face_hash = await self.runtime.run_blocking(
+                    self.find_similar_face, features)
                 if saved_image_path:
                     self.app_state = "AWAITING_INPUT"
                     self.last_frame_before_prompt = frame.copy()
+                    # Dialog non-modal: exec() akan menjalankan event loop bersarang di dalam task
                     dialog = ConfirmationDialog(saved_image_path, self)
-                    if dialog.exec() == QDialog.DialogCode.Accepted:
-                        print("✅ Profil dikonfirmasi. Memuat profil...")
-                        self.load_profile(saved_baseline, face_hash)
-                    else:
-                        print("ℹ️ Pengguna menolak profil. Memulai kalibrasi baru.")
-                        self.start_calibration()
+                    dialog.finished.connect(
+                        lambda result: self._on_profile_answer(result, saved_baseline, face_hash)
+                    )
+                    dialog.open()
                     return
         self.check_frames.append(1)  # Cukup gunakan sebagai counter frame
         if len(self.check_frames) >= self.check_frame_count:
@@ -369,17 +482,22 @@ class CameraWindow(QMainWindow):
             self.start_calibration()
             return
 
-    def perform_offset_calibration(self, frame):
+    def _on_profile_answer(self, result, saved_baseline, face_hash):
+        if result == QDialog.DialogCode.Accepted:
+            print("✅ Profil dikonfirmasi. Memuat profil...")
+            self.load_profile(saved_baseline, face_hash)
+        else:
+            print("ℹ️ Pengguna menolak profil. Memulai kalibrasi baru.")
+            self.start_calibration()
+
+    async def perform_offset_calibration(self, frame):
+        faces, features, landmarks, _ = await self.runtime.run_blocking(self._analyze_frame, frame, True)
         remaining_time = max(0, (self.check_frame_count - len(self.calibration_frames)) / self.fps)
         cv2.putText(frame, f"Kalibrasi Wajah Netral: {remaining_time:.1f}s",
                     (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
         if len(faces) == 1:
             x, y, w, h = faces[0]
             cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
-            face_roi = frame[y:y+h, x:x+w]
-            features, landmarks = calculate_geometric_features(face_roi, self.face_mesh)
             if landmarks is not None:
                 for (lx, ly) in landmarks.astype(np.int32):
                     cv2.circle(frame, (x+lx, y+ly), 1, (0, 255, 0), -1)
@@ -395,17 +513,22 @@ class CameraWindow(QMainWindow):
             personal_baseline = np.mean(self.calibration_frames, axis=0)
             face_snapshot = self.calibration_face_images[len(self.calibration_face_images)//2]  # Ambil foto dari tengah
 
-            user_hash = self.save_personal_profile(face_snapshot, personal_baseline)
+            user_hash = await self.runtime.run_blocking(self.save_personal_profile, face_snapshot, personal_baseline)
             self.load_profile(personal_baseline, user_hash)
 
-    def perform_prediction(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+    async def perform_prediction(self, frame):
+        started = time.perf_counter()
         current_time = time.time()
+        classification_interval = (
+            self.classification_rate.update() if self.classification_rate else CLASSIFICATION_INTERVAL_SECONDS
+        )
+        classification_due = (current_time - self.last_classification_time) >= classification_interval
+        # Klasifikasi ONNX hanya ikut dijalankan di executor bila intervalnya sudah lewat
+        baseline = getattr(self, 'personal_baseline', None) if classification_due else None
+        faces, _, landmarks, probabilities = await self.runtime.run_blocking(
+            self._analyze_frame, frame, False, baseline)
         if len(faces) > 0:
             x, y, w, h = faces[0]
-            face_roi = frame[y:y+h, x:x+w]
-            current_features, landmarks = calculate_geometric_features(face_roi, self.face_mesh)
             cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 0, 0), 2)
             if landmarks is not None:
                 for (lx, ly) in landmarks.astype(np.int32):
@@ -422,49 +545,67 @@ class CameraWindow(QMainWindow):
                 }
                 self.log_data_per_second.append(log_entry)
                 if len(self.log_data_per_second) >= 60:
-                    self._process_and_save_log()
-            if (current_time - self.last_classification_time) >= CLASSIFICATION_INTERVAL_SECONDS:
+                    # Tulis file log di executor; buffer diganti agar frame berikutnya tidak ikut.
+                    # Langsung di-submit (bukan task) agar tidak ikut dibatalkan saat aplikasi ditutup
+                    entries, self.log_data_per_second = self.log_data_per_second, []
+                    self.log_write = self.runtime.executor.submit(self._process_and_save_log, entries)
+            if classification_due:
                 self.last_classification_time = current_time
-                if current_features is not None and hasattr(self, 'personal_baseline'):
-                    personal_delta = current_features - self.personal_baseline
-                    scaled_delta = personal_delta * self.scaling_factors
-                    features_scaled = self.scaler.transform(scaled_delta)
-                    model_input = {self.input_name: features_scaled.astype(np.float32)}
-                    outputs = self.session.run(None, model_input)[0]
-                    self.last_probabilities = softmax(outputs[0])
+                if probabilities is not None:
+                    self.last_probabilities[:] = self.smoother.update(probabilities)
+                    if self.classification_rate:
+                        # Latensi frame yang diklasifikasi: deteksi + FaceMesh + ONNX
+                        self.classification_rate.observe(time.perf_counter() - started)
                 else:
+                    self.smoother.reset()
                     self.last_probabilities.fill(0)
         else:
-            if (current_time - self.last_classification_time) >= CLASSIFICATION_INTERVAL_SECONDS:
+            if classification_due:
+                self.smoother.reset()
                 self.last_probabilities.fill(0)
-        pred_idx = np.argmax(self.last_probabilities)
-        if len(faces) > 0 and self.last_probabilities[pred_idx] > 0.1:
-            label = CLASS_NAMES[pred_idx]
-            display_text = f"{label} ({self.last_probabilities[pred_idx]:.1%})"
-            x, y, _, _ = faces[0]
-            cv2.putText(frame, display_text, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-        draw_probability_bars(frame, self.last_probabilities, CLASS_NAMES)
+        with METRICS.span("draw"):
+            pred_idx = np.argmax(self.last_probabilities)
+            if len(faces) > 0 and self.last_probabilities[pred_idx] > 0.1:
+                label = CLASS_NAMES[pred_idx]
+                display_text = f"{label} ({self.last_probabilities[pred_idx]:.1%})"
+                x, y, _, _ = faces[0]
+                cv2.putText(frame, display_text, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+            draw_probability_bars(frame, self.last_probabilities, CLASS_NAMES)
 
     def display_image(self, img):
-        qformat = QImage.Format.Format_BGR888
-        outImage = QImage(img.data, img.shape[1], img.shape[0], img.strides[0], qformat)
-        self.image_label.setPixmap(QPixmap.fromImage(outImage))
-        self.image_label.setScaledContents(True)
+        self.frame_view.set_frame(img)
 
     def closeEvent(self, event):
-        if self.app_state == "RUNNING":
-            print("ℹ️ Aplikasi ditutup, menyimpan sisa data log...")
-            self._process_and_save_log()
-
-        self.timer.stop()
-        self.cap.release()
-        if hasattr(self, 'face_mesh'):
-            self.face_mesh.close()
+        # Task frame dibatalkan secara kooperatif; kamera dan model ditutup di blok finally-nya
+        self.runtime.cancel()
+        if self.app_state == "RUNNING" and not self.log_flushed:
+            # Thread GUI tidak menunggu file ditulis: tutup ditunda sampai flush log terakhir selesai
+            event.ignore()
+            if self.log_flush_task is None:
+                print("ℹ️ Aplikasi ditutup, menyimpan sisa data log...")
+                self.log_flush_task = self.runtime.spawn(self._flush_log_and_close(), name="deltacam-log-flush")
+            return
         event.accept()
 
+    async def _flush_log_and_close(self):
+        try:
+            # Tunggu penulisan menit sebelumnya dulu agar urutan entri di file tetap benar
+            if self.log_write is not None:
+                await asyncio.wrap_future(self.log_write)
+            await self.runtime.run_blocking(self._process_and_save_log)
+        except Exception as e:
+            print(f"❌ Gagal menyimpan sisa log: {e}")
+        finally:
+            self.log_flushed = True
+            # Lewat event loop Qt, agar closeEvent kedua tidak membatalkan task ini sendiri
+            QTimer.singleShot(0, self.close)
+
 
 if __name__ == "__main__":
+    start_metrics()  # METRICS_ENABLED=1 mengaktifkan endpoint Prometheus & log ringkasan
     app = QApplication(sys.argv)
-    window = CameraWindow()
+    runtime = AsyncRuntime(name="deltacam")
+    window = CameraWindow(runtime)
     window.show()
-    sys.exit(app.exec())
+    QTimer.singleShot(0, window.start)
+    sys.exit(run_qt_app(app, runtime))
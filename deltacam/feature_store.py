@@ -0,0 +1,107 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_HEADER_SIZE = 128  # Header .npy dibuat berukuran tetap agar bisa ditulis ulang saat file ditutup
+
+
+def _npy_header(dtype, shape):
+    header = f"{{'descr': '{np.dtype(dtype).str}', 'fortran_order': False, 'shape': {tuple(shape)}, }}"
+    header = header.ljust(NPY_HEADER_SIZE - len(NPY_MAGIC) - 2 - 1) + "\n"
+    if len(header) + len(NPY_MAGIC) + 2 != NPY_HEADER_SIZE:
+        raise ValueError(f"Header .npy terlalu panjang untuk shape {shape}")
+    return NPY_MAGIC + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class NpyAppender:
+    """Menulis file .npy baris demi baris; shape pada header diperbarui saat `close()`."""
+
+    def __init__(self, path, dtype, row_shape=()):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.count = 0
+        self.file = open(path, "wb")
+        self.file.write(_npy_header(self.dtype, (0,) + self.row_shape))
+
+    def append(self, row):
+        row = np.asarray(row, dtype=self.dtype)
+        if row.shape != self.row_shape:
+            raise ValueError(f"Shape baris {row.shape} tidak sesuai, seharusnya {self.row_shape}")
+        self.file.write(row.tobytes())
+        self.count += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(0)
+        self.file.write(_npy_header(self.dtype, (self.count,) + self.row_shape))
+        self.file.close()
+
+
+class FeatureStoreWriter:
+    """
+    Feature store biner untuk delta fitur: `<prefix>_features.npy` (float32, N x D),
+    `<prefix>_labels.npy` (int64, N) dan sidecar `<prefix>.json` berisi nama kolom,
+    jumlah sampel, dan mapping kelas. Sampel ditulis langsung ke disk saat ditambahkan.
+    """
+
+    def __init__(self, output_dir, class_names, prefix="delta_emotion"):
+        self.output_dir = output_dir
+        self.class_names = list(class_names)
+        self.prefix = prefix
+        self.features = None
+        self.labels = None
+
+    @property
+    def metadata_path(self):
+        return os.path.join(self.output_dir, f"{self.prefix}.json")
+
+    @property
+    def count(self):
+        return self.features.count if self.features else 0
+
+    def append(self, features, label):
+        if self.features is None:
+            self.features = NpyAppender(os.path.join(self.output_dir, f"{self.prefix}_features.npy"),
+                                        np.float32, (len(features),))
+            self.labels = NpyAppender(os.path.join(self.output_dir, f"{self.prefix}_labels.npy"), np.int64)
+        self.features.append(features)
+        self.labels.append(label)
+
+    def close(self):
+        if self.features is None:
+            return
+        self.features.close()
+        self.labels.close()
+        num_features = self.features.row_shape[0]
+        metadata = {
+            "features_file": os.path.basename(self.features.path),
+            "labels_file": os.path.basename(self.labels.path),
+            "num_samples": self.features.count,
+            "columns": [f"delta_feature_{i}" for i in range(num_features)],
+            "label_column": "label",
+            "class_names": self.class_names,
+            "class_to_idx": {name: i for i, name in enumerate(self.class_names)},
+        }
+        with open(self.metadata_path, "w") as f:
+            json.dump(metadata, f, indent=4)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_feature_store(metadata_path):
+    """Memuat feature store secara memory-mapped (tanpa parsing teks). Mengembalikan (X, y, metadata)."""
+    with open(metadata_path, "r") as f:
+        metadata = json.load(f)
+    base_dir = os.path.dirname(metadata_path)
+    X = np.load(os.path.join(base_dir, metadata["features_file"]), mmap_mode="r")
+    y = np.load(os.path.join(base_dir, metadata["labels_file"]), mmap_mode="r")
+    return X, y, metadata
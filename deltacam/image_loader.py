@@ -0,0 +1,104 @@
+import os
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+JPEG_EXTENSIONS = ('.jpg', '.jpeg')
+REDUCED_DECODE_FLAGS = [(8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                        (2, cv2.IMREAD_REDUCED_COLOR_2)]
+
+
+def jpeg_size(data):
+    """Membaca (lebar, tinggi) dari marker SOF JPEG tanpa mendekode gambar. None jika bukan JPEG valid."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            pos += 1
+            continue
+        marker = data[pos + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+            pos += 1 if marker == 0xFF else 2
+            continue
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        # SOF0..SOF15 kecuali DHT (C4), JPG (C8), DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if pos + 9 > len(data):
+                return None
+            height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+            return width, height
+        pos += 2 + length
+    return None
+
+
+def decode_image(path, max_side=None, to_rgb=False):
+    """
+    Membaca dan mendekode satu gambar. Untuk JPEG yang jauh lebih besar dari `max_side`,
+    dipakai decode resolusi rendah (IMREAD_REDUCED_COLOR_*) yang jauh lebih murah.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    flag = cv2.IMREAD_COLOR
+    if max_side and path.lower().endswith(JPEG_EXTENSIONS):
+        size = jpeg_size(data)
+        if size is not None:
+            longest = max(size)
+            for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+                if longest // factor >= max_side:
+                    flag = reduced_flag
+                    break
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+    if image is not None and to_rgb:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return image
+
+
+class ImagePrefetcher:
+    """
+    Memuat gambar dengan thread pool (baca disk + decode + konversi warna melepaskan GIL) sehingga
+    I/O berjalan bersamaan dengan FaceMesh. Maksimal `queue_size` gambar yang sudah didekode
+    menunggu di antrean, dan urutan hasil sama dengan urutan path masukan.
+    """
+
+    def __init__(self, num_workers=4, queue_size=16, max_side=None, to_rgb=False):
+        self.num_workers = max(1, num_workers)
+        self.queue_size = max(1, queue_size)
+        self.max_side = max_side
+        self.to_rgb = to_rgb
+        self.executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="image-loader")
+
+    def imap(self, paths):
+        """Menghasilkan (path, image) berurutan; image bernilai None jika gagal dibaca."""
+        paths = iter(paths)
+        pending = deque()
+        for path in paths:
+            pending.append((path, self.executor.submit(decode_image, path, self.max_side, self.to_rgb)))
+            if len(pending) >= self.queue_size:
+                break
+        while pending:
+            path, future = pending.popleft()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append((next_path, self.executor.submit(decode_image, next_path, self.max_side, self.to_rgb)))
+            yield path, future.result()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def list_images(directory):
+    return [os.path.join(directory, f) for f in os.listdir(directory)
+            if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
@@ -0,0 +1,95 @@
+import numpy as np
+
+NUM_FACEMESH_LANDMARKS = 468
+
+# Landmark garis tengah wajah; dipetakan ke dirinya sendiri saat dicerminkan.
+FACEMESH_MIDLINE = [
+    0, 1, 2, 4, 5, 6, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19,
+    94, 151, 152, 164, 168, 175, 195, 197, 199, 200,
+]
+
+# Permutasi kiri/kanan kanonik untuk seluruh 468 titik FaceMesh, diturunkan dari canonical face model
+# MediaPipe (modelnya simetris sempurna terhadap x = 0). Setiap titik selain garis tengah punya tepat satu
+# pasangan, sehingga 28 titik tengah + 220 pasangan = 468 titik.
+FACEMESH_MIRROR_PAIRS = [
+    (3, 248), (7, 249), (20, 250), (21, 251), (22, 252), (23, 253), (24, 254), (25, 255),
+    (26, 256), (27, 257), (28, 258), (29, 259), (30, 260), (31, 261), (32, 262), (33, 263),
+    (34, 264), (35, 265), (36, 266), (37, 267), (38, 268), (39, 269), (40, 270), (41, 271),
+    (42, 272), (43, 273), (44, 274), (45, 275), (46, 276), (47, 277), (48, 278), (49, 279),
+    (50, 280), (51, 281), (52, 282), (53, 283), (54, 284), (55, 285), (56, 286), (57, 287),
+    (58, 288), (59, 289), (60, 290), (61, 291), (62, 292), (63, 293), (64, 294), (65, 295),
+    (66, 296), (67, 297), (68, 298), (69, 299), (70, 300), (71, 301), (72, 302), (73, 303),
+    (74, 304), (75, 305), (76, 306), (77, 307), (78, 308), (79, 309), (80, 310), (81, 311),
+    (82, 312), (83, 313), (84, 314), (85, 315), (86, 316), (87, 317), (88, 318), (89, 319),
+    (90, 320), (91, 321), (92, 322), (93, 323), (95, 324), (96, 325), (97, 326), (98, 327),
+    (99, 328), (100, 329), (101, 330), (102, 331), (103, 332), (104, 333), (105, 334), (106, 335),
+    (107, 336), (108, 337), (109, 338), (110, 339), (111, 340), (112, 341), (113, 342), (114, 343),
+    (115, 344), (116, 345), (117, 346), (118, 347), (119, 348), (120, 349), (121, 350), (122, 351),
+    (123, 352), (124, 353), (125, 354), (126, 355), (127, 356), (128, 357), (129, 358), (130, 359),
+    (131, 360), (132, 361), (133, 362), (134, 363), (135, 364), (136, 365), (137, 366), (138, 367),
+    (139, 368), (140, 369), (141, 370), (142, 371), (143, 372), (144, 373), (145, 374), (146, 375),
+    (147, 376), (148, 377), (149, 378), (150, 379), (153, 380), (154, 381), (155, 382), (156, 383),
+    (157, 384), (158, 385), (159, 386), (160, 387), (161, 388), (162, 389), (163, 390), (165, 391),
+    (166, 392), (167, 393), (169, 394), (170, 395), (171, 396), (172, 397), (173, 398), (174, 399),
+    (176, 400), (177, 401), (178, 402), (179, 403), (180, 404), (181, 405), (182, 406), (183, 407),
+    (184, 408), (185, 409), (186, 410), (187, 411), (188, 412), (189, 413), (190, 414), (191, 415),
+    (192, 416), (193, 417), (194, 418), (196, 419), (198, 420), (201, 421), (202, 422), (203, 423),
+    (204, 424), (205, 425), (206, 426), (207, 427), (208, 428), (209, 429), (210, 430), (211, 431),
+    (212, 432), (213, 433), (214, 434), (215, 435), (216, 436), (217, 437), (218, 438), (219, 439),
+    (220, 440), (221, 441), (222, 442), (223, 443), (224, 444), (225, 445), (226, 446), (227, 447),
+    (228, 448), (229, 449), (230, 450), (231, 451), (232, 452), (233, 453), (234, 454), (235, 455),
+    (236, 456), (237, 457), (238, 458), (239, 459), (240, 460), (241, 461), (242, 462), (243, 463),
+    (244, 464), (245, 465), (246, 466), (247, 467),
+]
+
+
+def build_mirror_permutation():
+    """
+    Membuat permutasi indeks kiri/kanan untuk seluruh mesh FaceMesh dari FACEMESH_MIRROR_PAIRS.
+    Permutasi dijamin bijektif dan merupakan inversnya sendiri (mencerminkan dua kali = mesh asli).
+    """
+    permutation = np.full(NUM_FACEMESH_LANDMARKS, -1)
+    permutation[FACEMESH_MIDLINE] = FACEMESH_MIDLINE
+    for left, right in FACEMESH_MIRROR_PAIRS:
+        if permutation[left] != -1 or permutation[right] != -1:
+            raise ValueError(f"Landmark {left} atau {right} muncul lebih dari sekali di tabel cermin")
+        permutation[left] = right
+        permutation[right] = left
+    if (permutation == -1).any():
+        raise ValueError("Tabel cermin FaceMesh tidak mencakup semua landmark")
+    return permutation
+
+
+DEFAULT_MIRROR_PERMUTATION = build_mirror_permutation()
+
+
+def mirror_landmarks(coords, img_w, permutation=DEFAULT_MIRROR_PERMUTATION):
+    """Setara dengan menjalankan FaceMesh pada gambar hasil cv2.flip(frame, 1), tanpa inferensi ulang."""
+    mirrored = coords[permutation].copy()
+    mirrored[:, 0] = img_w - mirrored[:, 0]
+    return mirrored
+
+
+def rotate_landmarks(coords, angle_deg, center=None):
+    """Rotasi in-plane (head roll) terhadap `center`, default pusat kedua mata dalam (133, 362)."""
+    if center is None:
+        center = (coords[133] + coords[362]) / 2.0
+    theta = np.radians(angle_deg)
+    rotation = np.array([[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]])
+    return (coords - center) @ rotation.T + center
+
+
+def jitter_landmarks(coords, sigma, rng):
+    """Menambahkan noise Gaussian relatif terhadap jarak antar mata dalam."""
+    ref_dist = np.linalg.norm(coords[133] - coords[362])
+    return coords + rng.normal(0.0, sigma * ref_dist, size=coords.shape)
+
+
+def augment_landmarks(coords, img_w, num_variants, rng, max_rotation_deg=8.0, jitter_sigma=0.01):
+    """Menghasilkan versi cermin ditambah `num_variants` variasi rotasi+jitter acak dari satu mesh."""
+    variants = [mirror_landmarks(coords, img_w)]
+    for _ in range(num_variants):
+        base = variants[0] if rng.random() < 0.5 else coords
+        rotated = rotate_landmarks(base, rng.uniform(-max_rotation_deg, max_rotation_deg))
+        variants.append(jitter_landmarks(rotated, jitter_sigma, rng))
+    return variants
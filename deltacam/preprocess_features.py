@@ -1,11 +1,14 @@
 import os
-import cv2
+import json
 import numpy as np
 import mediapipe as mp
 import pandas as pd
 from tqdm import tqdm
 import argparse
 from collections import defaultdict
+from feature_store import FeatureStoreWriter
+from landmark_augment import mirror_landmarks, augment_landmarks
+from image_loader import ImagePrefetcher, list_images
 
 
 def calculate_geometric_features(landmarks, img_w, img_h):
@@ -63,19 +66,28 @@ def calculate_geometric_features(landmarks, img_w, img_h):
     return np.array(features)
 
 
-def _process_image(frame, face_mesh):
+def _process_image_landmarks(frame, face_mesh):
+    """
+    Menjalankan FaceMesh pada frame RGB (sudah dikonversi oleh ImagePrefetcher) dan mengembalikan
+    koordinat landmark dalam piksel (468 x 2), atau None.
+    """
     if frame is None:
         return None
-    results = face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    results = face_mesh.process(frame)
     if results.multi_face_landmarks:
-        features = calculate_geometric_features(
-            results.multi_face_landmarks[0].landmark, frame.shape[1], frame.shape[0]
-        )
-        return features
+        img_h, img_w = frame.shape[:2]
+        return np.array([(lm.x * img_w, lm.y * img_h) for lm in results.multi_face_landmarks[0].landmark])
     return None
 
 
-def run_global_baseline_creation(source_dir, output_dir):
+def _process_image(frame, face_mesh):
+    coords = _process_image_landmarks(frame, face_mesh)
+    if coords is None:
+        return None
+    return calculate_geometric_features(coords, frame.shape[1], frame.shape[0])
+
+
+def run_global_baseline_creation(source_dir, output_dir, loader):
     print("🚀 Memulai proses pembuatan baseline netral global...")
     neutral_dir = os.path.join(source_dir, 'neutral')
     if not os.path.isdir(neutral_dir):
@@ -84,16 +96,18 @@ def run_global_baseline_creation(source_dir, output_dir):
     mp_face_mesh = mp.solutions.face_mesh.FaceMesh(
         static_image_mode=True, max_num_faces=1, min_detection_confidence=0.5)
     all_neutral_features = []
-    image_files = [f for f in os.listdir(neutral_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+    image_files = list_images(neutral_dir)
     print(f"📊 Ditemukan {len(image_files)} gambar di folder 'neutral'. Memproses...")
-    for img_name in tqdm(image_files, desc="Processing Neutral Images"):
-        img_path = os.path.join(neutral_dir, img_name)
-        frame = cv2.imread(img_path)
-        original_features = _process_image(frame, mp_face_mesh)
+    for _, frame in tqdm(loader.imap(image_files), total=len(image_files), desc="Processing Neutral Images"):
+        coords = _process_image_landmarks(frame, mp_face_mesh)
+        if coords is None:
+            continue
+        original_features = calculate_geometric_features(coords, frame.shape[1], frame.shape[0])
         if original_features is not None:
             all_neutral_features.append(original_features)
-        flipped_frame = cv2.flip(frame, 1)
-        flipped_features = _process_image(flipped_frame, mp_face_mesh)
+        # Augmentasi flip dilakukan di ruang landmark, tanpa menjalankan FaceMesh lagi
+        flipped_features = calculate_geometric_features(mirror_landmarks(coords, frame.shape[1]),
+                                                        frame.shape[1], frame.shape[0])
         if flipped_features is not None:
             all_neutral_features.append(flipped_features)
     mp_face_mesh.close()
@@ -125,42 +139,78 @@ def _get_subject_file_map(source_dir):
     return subjects
 
 
-def _calculate_subject_baselines(subjects, face_mesh):
-    neutral_baselines = {}
+def _calculate_subject_baselines(subjects, face_mesh, loader):
     print("📊 Menghitung baseline netral untuk setiap subjek...")
-    for subject_id, emotions in tqdm(subjects.items(), desc="Calculating Subject Baselines"):
-        neutral_features = []
-        if 'neutral' in emotions:
-            for img_path in emotions['neutral']:
-                features = _process_image(cv2.imread(img_path), face_mesh)
-                if features is not None:
-                    neutral_features.append(features)
-        if neutral_features:
-            neutral_baselines[subject_id] = np.mean(neutral_features, axis=0)
-    return neutral_baselines
-
-
-def run_delta_feature_extraction(source_dir, output_dir):
+    jobs = [(subject_id, img_path) for subject_id, emotions in subjects.items()
+            for img_path in emotions.get('neutral', [])]
+    neutral_features = defaultdict(list)
+    images = loader.imap(img_path for _, img_path in jobs)
+    for (subject_id, _), (_, frame) in tqdm(zip(jobs, images), total=len(jobs), desc="Calculating Subject Baselines"):
+        features = _process_image(frame, face_mesh)
+        if features is not None:
+            neutral_features[subject_id].append(features)
+    return {subject_id: np.mean(features, axis=0) for subject_id, features in neutral_features.items()}
+
+
+def _write_label_map(output_dir, class_dirs):
+    output_map_path = os.path.join(output_dir, "map_label.py")
+    with open(output_map_path, "w") as f:
+        f.write("# File ini dibuat secara otomatis oleh preprocess_master.py\n")
+        f.write(f"CLASS_NAMES = {class_dirs}\n")
+    return output_map_path
+
+
+def _augmented_features(frame, face_mesh, num_augment, rng):
+    """Fitur gambar asli diikuti fitur hasil augmentasi landmark (cermin + variasi geometris)."""
+    coords = _process_image_landmarks(frame, face_mesh)
+    if coords is None:
+        return []
+    img_h, img_w = frame.shape[:2]
+    variants = [coords]
+    if num_augment > 0:
+        variants += augment_landmarks(coords, img_w, num_augment - 1, rng)
+    all_features = [calculate_geometric_features(v, img_w, img_h) for v in variants]
+    return [f for f in all_features if f is not None]
+
+
+def run_delta_feature_extraction(source_dir, output_dir, loader, feature_format="csv", num_augment=0, seed=42):
     mp_face_mesh = mp.solutions.face_mesh.FaceMesh(
         static_image_mode=True, max_num_faces=1, min_detection_confidence=0.5)
     subjects = _get_subject_file_map(source_dir)
-    neutral_baselines = _calculate_subject_baselines(subjects, mp_face_mesh)
+    neutral_baselines = _calculate_subject_baselines(subjects, mp_face_mesh, loader)
     all_delta_features = []
     class_dirs = [d for d in sorted(os.listdir(source_dir)) if os.path.isdir(os.path.join(source_dir, d))]
     class_to_idx = {name: i for i, name in enumerate(class_dirs)}
-    for subject_id, emotions in tqdm(subjects.items(), desc="Calculating Delta Features"):
+    # Format "npy" menulis tiap sampel langsung ke feature store biner, tanpa menampung list di memori
+    store = FeatureStoreWriter(output_dir, class_dirs) if feature_format == "npy" else None
+    rng = np.random.default_rng(seed)
+    jobs = []
+    for subject_id, emotions in subjects.items():
         if subject_id not in neutral_baselines:
             print(f"Peringatan: Melewati subjek '{subject_id}' karena tidak memiliki baseline netral.")
             continue
-        baseline = neutral_baselines[subject_id]
         for emotion_name, img_paths in emotions.items():
-            label = class_to_idx[emotion_name]
-            for img_path in img_paths:
-                current_features = _process_image(cv2.imread(img_path), mp_face_mesh)
-                if current_features is not None:
-                    delta_features = current_features - baseline
-                    all_delta_features.append(np.append(delta_features, label))
+            jobs.extend((subject_id, class_to_idx[emotion_name], img_path) for img_path in img_paths)
+    images = loader.imap(img_path for _, _, img_path in jobs)
+    for (subject_id, label, _), (_, frame) in tqdm(zip(jobs, images), total=len(jobs), desc="Calculating Delta Features"):
+        baseline = neutral_baselines[subject_id]
+        for current_features in _augmented_features(frame, mp_face_mesh, num_augment, rng):
+            delta_features = current_features - baseline
+            if store is not None:
+                store.append(delta_features, label)
+            else:
+                all_delta_features.append(np.append(delta_features, label))
     mp_face_mesh.close()
+    if store is not None:
+        store.close()
+        if store.count == 0:
+            print("❌ Tidak ada delta fitur yang berhasil diekstrak. Proses dibatalkan.")
+            return
+        output_map_path = _write_label_map(output_dir, class_dirs)
+        print(f"\n✅ Preprocessing Delta Fitur selesai. {store.count} sampel diproses.")
+        print(f"✅ Feature store berhasil disimpan ke: {store.metadata_path}")
+        print(f"✅ Mapping label berhasil disimpan ke: {output_map_path}")
+        return
     if not all_delta_features:
         print("❌ Tidak ada delta fitur yang berhasil diekstrak. Proses dibatalkan.")
         return
@@ -168,16 +218,131 @@ def run_delta_feature_extraction(source_dir, output_dir):
     num_features = df.shape[1] - 1
     df.columns = [f'delta_feature_{i}' for i in range(num_features)] + ['label']
     output_csv_path = os.path.join(output_dir, "delta_emotion_features.csv")
-    output_map_path = os.path.join(output_dir, "map_label.py")
     df.to_csv(output_csv_path, index=False)
-    with open(output_map_path, "w") as f:
-        f.write("# File ini dibuat secara otomatis oleh preprocess_master.py\n")
-        f.write(f"CLASS_NAMES = {class_dirs}\n")
+    output_map_path = _write_label_map(output_dir, class_dirs)
     print(f"\n✅ Preprocessing Delta Fitur selesai. {len(all_delta_features)} sampel diproses.")
     print(f"✅ Delta fitur berhasil disimpan ke: {output_csv_path}")
     print(f"✅ Mapping label berhasil disimpan ke: {output_map_path}")
 
 
+# Shard disimpan float64, sama seperti jalur non-streaming, agar CSV hasil lanjutan identik
+SHARD_DTYPE = "float64"
+
+
+def _load_manifest(manifest_path, class_dirs):
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("class_names") != class_dirs:
+            raise ValueError("Daftar kelas berbeda dengan checkpoint sebelumnya. Hapus checkpoint untuk memulai ulang.")
+        if manifest.get("features_dtype", "float32") != SHARD_DTYPE:
+            raise ValueError("Checkpoint lama menyimpan shard float32. Hapus checkpoint untuk memulai ulang.")
+        return manifest
+    return {"class_names": class_dirs, "features_dtype": SHARD_DTYPE, "completed_subjects": {}}
+
+
+def _save_manifest(manifest_path, manifest):
+    # Tulis ke file sementara lalu rename, agar manifest tidak rusak jika proses mati di tengah penulisan
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp_path, manifest_path)
+
+
+def _extract_subject_deltas(emotions, class_to_idx, face_mesh, loader, num_augment=0, rng=None):
+    neutral_features = {}
+    for img_path, frame in loader.imap(emotions.get('neutral', [])):
+        features = _process_image(frame, face_mesh)
+        if features is not None:
+            neutral_features[img_path] = features
+    if not neutral_features:
+        return None
+    baseline = np.mean(list(neutral_features.values()), axis=0)
+    deltas, labels, files = [], [], []
+    # Gambar neutral cukup diproses ulang bila ada augmentasi; selain itu fitur di atas dipakai kembali
+    jobs = [(class_to_idx[emotion_name], img_path) for emotion_name, img_paths in emotions.items()
+            for img_path in img_paths if num_augment > 0 or emotion_name != 'neutral']
+    images = loader.imap(img_path for _, img_path in jobs)
+    for (label, img_path), (_, frame) in zip(jobs, images):
+        for current_features in _augmented_features(frame, face_mesh, num_augment, rng):
+            deltas.append(current_features - baseline)
+            labels.append(label)
+            files.append(img_path)
+    if num_augment == 0 and 'neutral' in class_to_idx:
+        for img_path, current_features in neutral_features.items():
+            deltas.append(current_features - baseline)
+            labels.append(class_to_idx['neutral'])
+            files.append(img_path)
+    return np.array(deltas, dtype=SHARD_DTYPE), np.array(labels, dtype=np.int64), files
+
+
+def run_streaming_delta_feature_extraction(source_dir, output_dir, checkpoint_dir, loader, feature_format="csv",
+                                           num_augment=0, seed=42):
+    """
+    Versi streaming dari `run_delta_feature_extraction`: setiap subjek yang selesai ditulis sebagai
+    shard .npz di `checkpoint_dir` dan dicatat di manifest. Jika proses terhenti, menjalankan ulang
+    perintah yang sama akan melewati subjek yang sudah ada di manifest. Memori hanya menampung satu subjek.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    subjects = _get_subject_file_map(source_dir)
+    class_dirs = [d for d in sorted(os.listdir(source_dir)) if os.path.isdir(os.path.join(source_dir, d))]
+    class_to_idx = {name: i for i, name in enumerate(class_dirs)}
+    manifest_path = os.path.join(checkpoint_dir, "manifest.json")
+    manifest = _load_manifest(manifest_path, class_dirs)
+    completed = manifest["completed_subjects"]
+    pending = [sid for sid in sorted(subjects) if sid not in completed or (
+        completed[sid]["shard"] and not os.path.exists(os.path.join(checkpoint_dir, completed[sid]["shard"])))]
+    if completed:
+        print(f"ℹ️ Melanjutkan dari checkpoint: {len(subjects) - len(pending)} subjek sudah selesai, "
+              f"{len(pending)} subjek tersisa.")
+
+    mp_face_mesh = mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=True, max_num_faces=1, min_detection_confidence=0.5)
+    try:
+        for subject_id in tqdm(pending, desc="Calculating Delta Features (streaming)"):
+            # RNG per subjek agar hasil augmentasi tetap sama walaupun proses dilanjutkan dari checkpoint
+            rng = np.random.default_rng([seed, sorted(subjects).index(subject_id)])
+            result = _extract_subject_deltas(subjects[subject_id], class_to_idx, mp_face_mesh, loader, num_augment, rng)
+            if result is None:
+                print(f"Peringatan: Melewati subjek '{subject_id}' karena tidak memiliki baseline netral.")
+                completed[subject_id] = {"shard": None, "num_samples": 0, "files": []}
+            else:
+                deltas, labels, files = result
+                shard_name = f"shard_{subject_id}.npz"
+                np.savez(os.path.join(checkpoint_dir, shard_name), features=deltas, labels=labels)
+                completed[subject_id] = {"shard": shard_name, "num_samples": len(labels), "files": files}
+            _save_manifest(manifest_path, manifest)
+    finally:
+        mp_face_mesh.close()
+
+    shard_names = [completed[sid]["shard"] for sid in sorted(completed) if completed[sid]["shard"]]
+    total = sum(completed[sid]["num_samples"] for sid in completed)
+    if total == 0:
+        print("❌ Tidak ada delta fitur yang berhasil diekstrak. Proses dibatalkan.")
+        return
+    if feature_format == "npy":
+        with FeatureStoreWriter(output_dir, class_dirs) as store:
+            for shard_name in shard_names:
+                with np.load(os.path.join(checkpoint_dir, shard_name)) as shard:
+                    for delta_features, label in zip(shard["features"], shard["labels"]):
+                        store.append(delta_features, label)
+        output_path = store.metadata_path
+    else:
+        output_path = os.path.join(output_dir, "delta_emotion_features.csv")
+        write_header = True
+        for shard_name in shard_names:
+            with np.load(os.path.join(checkpoint_dir, shard_name)) as shard:
+                df = pd.DataFrame(shard["features"])
+                df.columns = [f'delta_feature_{i}' for i in range(df.shape[1])]
+                df['label'] = shard["labels"]
+            df.to_csv(output_path, index=False, mode="w" if write_header else "a", header=write_header)
+            write_header = False
+    output_map_path = _write_label_map(output_dir, class_dirs)
+    print(f"\n✅ Preprocessing Delta Fitur selesai. {total} sampel diproses.")
+    print(f"✅ Delta fitur berhasil disimpan ke: {output_path}")
+    print(f"✅ Mapping label berhasil disimpan ke: {output_map_path}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Skrip Preprocessing untuk membuat baseline global DAN fitur delta secara sekuensial.",
@@ -188,13 +353,48 @@ def main():
 
     parser.add_argument("--output_dir", type=str, default="./runs",
                         help="Direktori untuk menyimpan semua file output.")
+
+    parser.add_argument("--feature_format", type=str, choices=["csv", "npy"], default="csv",
+                        help="Format output delta fitur: CSV teks, atau feature store biner .npy + sidecar JSON.")
+
+    parser.add_argument("--landmark_augment", type=int, default=0,
+                        help="Jumlah sampel augmentasi per gambar untuk fitur delta (0 = nonaktif). Sampel pertama\n"
+                             "adalah cermin landmark, sisanya variasi rotasi+jitter; FaceMesh tetap sekali per gambar.")
+
+    parser.add_argument("--io_workers", type=int, default=4,
+                        help="Jumlah thread untuk membaca & mendekode gambar secara paralel dengan FaceMesh.")
+
+    parser.add_argument("--prefetch", type=int, default=16,
+                        help="Jumlah maksimal gambar terdekode yang menunggu di antrean.")
+
+    parser.add_argument("--max_side", type=int, default=0,
+                        help="Jika > 0, JPEG yang sisi terpanjangnya >= 2x nilai ini didekode pada resolusi\n"
+                             "lebih rendah (IMREAD_REDUCED_*), minimal sebesar nilai ini.")
+
+    parser.add_argument("--checkpoint_dir", type=str, default=None,
+                        help="Aktifkan mode streaming: simpan shard per subjek di direktori ini dan lanjutkan\n"
+                             "dari checkpoint terakhir jika proses sebelumnya terhenti.")
     args = parser.parse_args()
     os.makedirs(args.output_dir, exist_ok=True)
-    print("\n--- LANGKAH 1: MENJALANKAN PEMBUATAN BASELINE GLOBAL ---")
-    run_global_baseline_creation(args.input, args.output_dir)
-    print("\n--- LANGKAH 2: MENJALANKAN EKSTRAKSI FITUR DELTA ---")
-    os.makedirs(args.output_dir, exist_ok=True)
-    run_delta_feature_extraction(args.input, args.output_dir)
+    loader = ImagePrefetcher(num_workers=args.io_workers, queue_size=args.prefetch,
+                             max_side=args.max_side or None, to_rgb=True)
+    try:
+        print("\n--- LANGKAH 1: MENJALANKAN PEMBUATAN BASELINE GLOBAL ---")
+        global_baseline_path = os.path.join(args.output_dir, 'global_neutral_baseline.npy')
+        if args.checkpoint_dir and os.path.exists(global_baseline_path):
+            print(f"ℹ️ Baseline global sudah ada di '{global_baseline_path}', langkah ini dilewati.")
+        else:
+            run_global_baseline_creation(args.input, args.output_dir, loader)
+        print("\n--- LANGKAH 2: MENJALANKAN EKSTRAKSI FITUR DELTA ---")
+        os.makedirs(args.output_dir, exist_ok=True)
+        if args.checkpoint_dir:
+            run_streaming_delta_feature_extraction(args.input, args.output_dir, args.checkpoint_dir, loader,
+                                                   args.feature_format, args.landmark_augment)
+        else:
+            run_delta_feature_extraction(args.input, args.output_dir, loader,
+                                         args.feature_format, args.landmark_augment)
+    finally:
+        loader.close()
     print("\n🎉 Semua proses preprocessing telah selesai.")
 
 
@@ -0,0 +1,82 @@
+import numpy as np
+
+SMOOTHING_METHODS = ("none", "ema", "mean", "vote", "hmm")
+
+
+class ProbabilityRingBuffer:
+    """Buffer melingkar berukuran tetap untuk vektor probabilitas per klasifikasi."""
+
+    def __init__(self, size, num_classes):
+        self.buffer = np.zeros((size, num_classes), dtype=np.float32)
+        self.index = 0
+        self.count = 0
+
+    def push(self, probabilities):
+        self.buffer[self.index] = probabilities
+        self.index = (self.index + 1) % len(self.buffer)
+        self.count = min(self.count + 1, len(self.buffer))
+
+    def values(self):
+        # Urutan tidak penting untuk rata-rata/voting, cukup baris yang sudah terisi
+        return self.buffer[:self.count]
+
+    def clear(self):
+        self.index = 0
+        self.count = 0
+
+
+class TemporalSmoother:
+    """
+    Filter temporal untuk aliran probabilitas emosi.
+
+    method:
+        "none" - tanpa smoothing, mengembalikan probabilitas terakhir.
+        "ema"  - exponential moving average dengan faktor `alpha`.
+        "mean" - rata-rata probabilitas dalam jendela `window` terakhir.
+        "vote" - proporsi argmax (majority vote) dalam jendela `window` terakhir.
+        "hmm"  - forward filter HMM dengan peluang bertahan di kelas yang sama `stay_prob`.
+    """
+
+    def __init__(self, num_classes, method="ema", window=8, alpha=0.4, stay_prob=0.9):
+        if method not in SMOOTHING_METHODS:
+            raise ValueError(f"Metode smoothing tidak dikenal: '{method}'. Pilihan: {SMOOTHING_METHODS}")
+        self.num_classes = num_classes
+        self.method = method
+        self.alpha = alpha
+        self.ring = ProbabilityRingBuffer(window, num_classes)
+        switch_prob = (1.0 - stay_prob) / max(num_classes - 1, 1)
+        self.transition = np.full((num_classes, num_classes), switch_prob, dtype=np.float32)
+        np.fill_diagonal(self.transition, stay_prob)
+        self.state = np.zeros(num_classes, dtype=np.float32)
+        self.initialized = False
+
+    def reset(self):
+        self.ring.clear()
+        self.state.fill(0)
+        self.initialized = False
+
+    def update(self, probabilities):
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        self.ring.push(probabilities)
+        if self.method == "none":
+            self.state[:] = probabilities
+        elif self.method == "ema":
+            if self.initialized:
+                self.state *= (1.0 - self.alpha)
+                self.state += self.alpha * probabilities
+            else:
+                self.state[:] = probabilities
+        elif self.method == "mean":
+            self.state[:] = self.ring.values().mean(axis=0)
+        elif self.method == "vote":
+            votes = np.bincount(self.ring.values().argmax(axis=1), minlength=self.num_classes)
+            self.state[:] = votes / votes.sum()
+        elif self.method == "hmm":
+            prior = self.transition.T @ self.state if self.initialized else np.full(
+                self.num_classes, 1.0 / self.num_classes, dtype=np.float32)
+            posterior = prior * probabilities
+            total = posterior.sum()
+            self.state[:] = posterior / total if total > 1e-12 else probabilities
+        self.initialized = True
+        # Salinan: pemanggil boleh mengubah hasilnya tanpa merusak state filter
+        return self.state.copy()
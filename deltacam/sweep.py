@@ -0,0 +1,146 @@
+# File: sweep.py
+# Tujuan: Menjalankan banyak konfigurasi hyperparameter MLPClassifier secara paralel
+#         dengan data yang dimuat & dibagi sekali, lalu hanya mengekspor model pemenang.
+
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.multiprocessing as torch_mp
+from sklearn.metrics import accuracy_score, f1_score, classification_report
+
+from train_classfier import (
+    MLPClassifier,
+    TensorBatchLoader,
+    load_and_split_data,
+    fit_model,
+    predict_loader,
+    export_model_to_onnx,
+    export_fused_model_to_onnx,
+    unscaled_model_path,
+)
+
+_SHARED_DATA = {}
+
+
+def _init_worker(shared_data, num_threads):
+    # Tensor dari proses induk sudah ada di shared memory, worker hanya memetakannya
+    torch.set_num_threads(num_threads)
+    _SHARED_DATA.update(shared_data)
+
+
+def _run_config(params):
+    torch.manual_seed(params['seed'])
+    train_loader = TensorBatchLoader(_SHARED_DATA['X_train'], _SHARED_DATA['y_train'],
+                                     params['batch_size'], shuffle=True)
+    val_loader = TensorBatchLoader(_SHARED_DATA['X_val'], _SHARED_DATA['y_val'], params['batch_size'])
+    model = MLPClassifier(_SHARED_DATA['X_train'].shape[1], params['num_classes'])
+    best_state, best_val_loss, epochs_run = fit_model(
+        model, train_loader, val_loader, params['learning_rate'], params['num_epochs'], patience=params['patience'])
+    result = dict(params)
+    if best_state is None:
+        # Val loss tidak pernah membaik (mis. NaN): trial dicatat gagal, worker tetap jalan
+        result.update({'val_loss': float('nan'), 'val_acc': float('nan'), 'val_f1': float('nan'),
+                       'epochs_run': epochs_run, 'failed': True})
+        return result, None
+    model.load_state_dict(best_state)
+    val_preds, val_labels = predict_loader(model, val_loader)
+    result.update({
+        'val_loss': best_val_loss,
+        'val_acc': accuracy_score(val_labels, val_preds),
+        'val_f1': f1_score(val_labels, val_preds, average='macro'),
+        'epochs_run': epochs_run,
+        'failed': False,
+    })
+    return result, best_state
+
+
+def run_sweep(config):
+    os.makedirs(config.output_dir, exist_ok=True)
+    splits, scaler = load_and_split_data(config.csv_path, config.output_dir)
+    shared_data = {
+        'X_train': torch.tensor(splits['X_train'], dtype=torch.float32).share_memory_(),
+        'y_train': torch.tensor(splits['y_train'], dtype=torch.long).share_memory_(),
+        'X_val': torch.tensor(splits['X_val'], dtype=torch.float32).share_memory_(),
+        'y_val': torch.tensor(splits['y_val'], dtype=torch.long).share_memory_(),
+    }
+    num_classes = len(np.unique(splits['y_train']))
+    grid = [
+        {'learning_rate': lr, 'batch_size': bs, 'num_epochs': epochs,
+         'patience': config.patience if config.patience > 0 else None,  # 0 = early stopping nonaktif
+         'seed': config.seed, 'num_classes': num_classes}
+        for lr, bs, epochs in itertools.product(config.learning_rates, config.batch_sizes, config.epochs)
+    ]
+    workers = config.workers or os.cpu_count() or 1
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🚀 Memulai sweep {len(grid)} konfigurasi dengan {workers} proses...")
+
+    results, states = [], []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=torch_mp.get_context("spawn"),
+                             initializer=_init_worker, initargs=(shared_data, threads_per_worker)) as executor:
+        futures = [executor.submit(_run_config, params) for params in grid]
+        for future in as_completed(futures):
+            result, state = future.result()
+            results.append(result)
+            states.append(state)
+            if result['failed']:
+                print(f"   ❌ lr={result['learning_rate']}, batch={result['batch_size']}: "
+                      f"trial gagal, val loss tidak pernah membaik.")
+                continue
+            print(f"   lr={result['learning_rate']}, batch={result['batch_size']}, "
+                  f"epoch={result['epochs_run']}/{result['num_epochs']} -> "
+                  f"Val Loss: {result['val_loss']:.4f}, Val Acc: {result['val_acc']:.4f}, Val F1: {result['val_f1']:.4f}")
+
+    # Trial gagal tetap masuk leaderboard (di urutan terakhir), tapi tidak bisa menang
+    order = sorted(range(len(results)), key=lambda i: (results[i]['failed'], results[i]['val_loss']))
+    leaderboard = pd.DataFrame([results[i] for i in order]).drop(columns=['num_classes'])
+    leaderboard_path = os.path.join(config.output_dir, 'sweep_leaderboard.csv')
+    leaderboard.to_csv(leaderboard_path, index=False)
+    print("\n--- Leaderboard Sweep (5 teratas) ---")
+    print(leaderboard.head(5).to_string(index=False))
+    print(f"✅ Leaderboard lengkap disimpan ke '{leaderboard_path}'")
+
+    best = results[order[0]]
+    if best['failed']:
+        print("❌ Semua trial gagal (val loss tidak pernah membaik). Tidak ada model yang diekspor.")
+        return
+    model = MLPClassifier(splits['X_train'].shape[1], num_classes)
+    model.load_state_dict(states[order[0]])
+    model_save_path = os.path.join(config.output_dir, 'best_emotion_model.pth')
+    torch.save(model.state_dict(), model_save_path)
+    print(f"✅ Model pemenang (lr={best['learning_rate']}, batch={best['batch_size']}) disimpan ke '{model_save_path}'")
+
+    test_loader = TensorBatchLoader(splits['X_test'], splits['y_test'], best['batch_size'])
+    test_preds, test_labels = predict_loader(model, test_loader)
+    print("\n--- Laporan Klasifikasi Final (dari model pemenang) ---")
+    print(classification_report(test_labels, test_preds, digits=4))
+
+    input_dim = splits['X_train'].shape[1]
+    export_model_to_onnx(model, input_dim, os.path.join(config.output_dir, 'emotion_model.onnx'))
+    fused_output_path = os.path.join(config.output_dir, 'emotion_model_fused.onnx')
+    export_fused_model_to_onnx(model, scaler, input_dim, fused_output_path)
+    export_fused_model_to_onnx(model, scaler, input_dim, unscaled_model_path(fused_output_path),
+                               personalized=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep hyperparameter paralel untuk Klasifikasi Emosi dari Fitur Geometris.")
+    parser.add_argument("--csv_path", type=str, default="./runs/delta_emotion_features.csv",
+                        help="Path ke file CSV berisi fitur, atau sidecar .json dari feature store biner.")
+    parser.add_argument("--output_dir", type=str, default="./runs",
+                        help="Direktori untuk menyimpan leaderboard dan model pemenang.")
+    parser.add_argument("--learning_rates", type=float, nargs="+", default=[0.003, 0.001, 0.0003])
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--epochs", type=int, nargs="+", default=[100])
+    parser.add_argument("--patience", type=int, default=20,
+                        help="Jumlah epoch tanpa perbaikan val loss sebelum early stopping (0 = nonaktif).")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Jumlah proses paralel (0 = jumlah CPU).")
+    parser.add_argument("--seed", type=int, default=42)
+
+    args = parser.parse_args()
+    run_sweep(args)
@@ -10,10 +10,13 @@ import torch.optim as optim
 from torch.utils.data import Dataset, DataLoader
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import accuracy_score, f1_score, classification_report
+from sklearn.metrics import classification_report
 import argparse
 import joblib
+import math
 import os
+import time
+from feature_store import load_feature_store
 
 
 class EmotionFeatureDataset(Dataset):
@@ -25,6 +28,36 @@ class EmotionFeatureDataset(Dataset):
     def __getitem__(self, idx): return self.features[idx], self.labels[idx]
 
 
+class TensorBatchLoader:
+    """
+    Pengganti DataLoader untuk data yang sudah ada di memori. Setiap epoch
+    seluruh tensor diacak sekali dengan permutasi, lalu batch diambil sebagai
+    potongan (slice) kontigu tanpa indexing/collate per sampel.
+    """
+
+    def __init__(self, features, labels, batch_size, shuffle=False):
+        self.features = torch.as_tensor(features, dtype=torch.float32)
+        self.labels = torch.as_tensor(labels, dtype=torch.long)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+
+    def to(self, device):
+        self.features = self.features.to(device)
+        self.labels = self.labels.to(device)
+        return self
+
+    def __len__(self): return math.ceil(len(self.features) / self.batch_size)
+
+    def __iter__(self):
+        features, labels = self.features, self.labels
+        if self.shuffle:
+            perm = torch.randperm(len(features), device=features.device)
+            features, labels = features[perm], labels[perm]
+        for start in range(0, len(features), self.batch_size):
+            end = start + self.batch_size
+            yield features[start:end], labels[start:end]
+
+
 class MLPClassifier(nn.Module):
 
     def __init__(self, input_dim, num_classes):
@@ -44,13 +77,37 @@ class MLPClassifier(nn.Module):
     def forward(self, x): return self.layers(x)
 
 
-def get_dataloaders(csv_path, batch_size, output_dir, test_split=0.2):
+class FusedScalerMLP(nn.Module):
+    """
+    Membungkus MLP dengan standardisasi StandardScaler dan scaling personal (opsional),
+    sehingga runtime cukup memanggil satu `session.run` tanpa sklearn/joblib.
+    Tanpa `scaling_factors` fitur hanya distandardisasi (setara scaling berisi satu).
+    """
+
+    def __init__(self, model, scaler):
+        super(FusedScalerMLP, self).__init__()
+        self.model = model
+        self.register_buffer('mean', torch.tensor(scaler.mean_, dtype=torch.float32))
+        self.register_buffer('scale', torch.tensor(scaler.scale_, dtype=torch.float32))
+
+    def forward(self, x, scaling_factors=None):
+        if scaling_factors is not None:
+            x = x * scaling_factors
+        return self.model((x - self.mean) / self.scale)
+
 
-    df = pd.read_csv(csv_path)
-    X = df.drop('label', axis=1).values
-    y = df['label'].values
-    input_dim = X.shape[1]
-    num_classes = len(np.unique(y))
+def load_features(path):
+    """Memuat fitur dari CSV, atau dari feature store biner jika path berupa sidecar .json."""
+    if path.endswith('.json'):
+        X, y, _ = load_feature_store(path)
+        return X, y
+    df = pd.read_csv(path)
+    return df.drop('label', axis=1).values, df['label'].values
+
+
+def load_and_split_data(csv_path, output_dir, test_split=0.2):
+    """Membaca fitur, membagi train/val/test, dan menstandardisasi fitur. Scaler disimpan ke output_dir."""
+    X, y = load_features(csv_path)
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_split, random_state=42, stratify=y)
     X_train, X_val, y_train, y_val = train_test_split(
         X_train, y_train, test_size=test_split, random_state=42, stratify=y_train)
@@ -62,15 +119,104 @@ def get_dataloaders(csv_path, batch_size, output_dir, test_split=0.2):
     joblib.dump(scaler, scaler_path)
     print(f"✅ Scaler berhasil disimpan ke '{scaler_path}'")
 
-    train_ds = EmotionFeatureDataset(X_train, y_train)
-    val_ds = EmotionFeatureDataset(X_val, y_val)
-    test_ds = EmotionFeatureDataset(X_test, y_test)
+    splits = {
+        'X_train': X_train, 'y_train': y_train,
+        'X_val': X_val, 'y_val': y_val,
+        'X_test': X_test, 'y_test': y_test,
+    }
+    return splits, scaler
+
+
+def get_dataloaders(csv_path, batch_size, output_dir, test_split=0.2):
+    splits, scaler = load_and_split_data(csv_path, output_dir, test_split)
+    input_dim = splits['X_train'].shape[1]
+    num_classes = len(np.unique(splits['y_train']))
+
+    train_loader = TensorBatchLoader(splits['X_train'], splits['y_train'], batch_size, shuffle=True)
+    val_loader = TensorBatchLoader(splits['X_val'], splits['y_val'], batch_size)
+    test_loader = TensorBatchLoader(splits['X_test'], splits['y_test'], batch_size)
+
+    return train_loader, val_loader, test_loader, input_dim, num_classes, scaler
 
-    train_loader = DataLoader(train_ds, batch_size=batch_size, shuffle=True)
-    val_loader = DataLoader(val_ds, batch_size=batch_size, shuffle=False)
-    test_loader = DataLoader(test_ds, batch_size=batch_size, shuffle=False)
 
-    return train_loader, val_loader, test_loader, input_dim, num_classes
+def evaluate_metrics(model, loader, criterion):
+    """
+    Menghitung rata-rata loss, akurasi, dan macro F1 dengan akumulasi di device
+    (confusion matrix via bincount), tanpa list Python per batch.
+    """
+    model.eval()
+    device = loader.features.device
+    total_loss = torch.zeros((), device=device)
+    confusion = None
+    with torch.no_grad():
+        for features, labels in loader:
+            outputs = model(features)
+            num_classes = outputs.shape[1]
+            if confusion is None:
+                confusion = torch.zeros(num_classes * num_classes, device=device, dtype=torch.long)
+            total_loss += criterion(outputs, labels) * len(labels)
+            confusion += torch.bincount(labels * num_classes + outputs.argmax(dim=1),
+                                        minlength=num_classes * num_classes)
+    confusion = confusion.view(num_classes, num_classes).float()
+    true_positive = confusion.diag()
+    support, predicted = confusion.sum(dim=1), confusion.sum(dim=0)
+    f1_per_class = 2 * true_positive / (support + predicted).clamp(min=1)
+    present = (support + predicted) > 0
+    num_samples = len(loader.features)
+    accuracy = true_positive.sum() / num_samples
+    macro_f1 = f1_per_class[present].mean()
+    return (total_loss / num_samples).item(), accuracy.item(), macro_f1.item()
+
+
+def predict_loader(model, loader):
+    model.eval()
+    with torch.no_grad():
+        preds = torch.cat([model(features).argmax(dim=1) for features, _ in loader])
+    return preds.cpu().numpy(), loader.labels.cpu().numpy()
+
+
+def fit_model(model, train_loader, val_loader, learning_rate, num_epochs, patience=None, verbose=False):
+    """
+    Melatih model dan menyimpan bobot terbaik (val loss terendah) di memori.
+    Jika `patience` diisi, training berhenti setelah `patience` epoch tanpa perbaikan.
+    Mengembalikan (best_state_dict, best_val_loss, jumlah_epoch_dijalankan).
+    """
+    criterion = nn.CrossEntropyLoss()
+    optimizer = optim.AdamW(model.parameters(), lr=learning_rate, weight_decay=1e-4)
+    scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, 'min', factor=0.5, patience=10)
+
+    best_val_loss = float('inf')
+    best_state = None
+    epochs_without_improvement = 0
+    epoch = 0
+    for epoch in range(num_epochs):
+        model.train()
+        for features, labels in train_loader:
+            optimizer.zero_grad()
+            loss = criterion(model(features), labels)
+            loss.backward()
+            optimizer.step()
+
+        avg_val_loss, val_acc, val_f1 = evaluate_metrics(model, val_loader, criterion)
+        scheduler.step(avg_val_loss)
+
+        if avg_val_loss < best_val_loss:
+            best_val_loss = avg_val_loss
+            best_state = {k: v.detach().cpu().clone() for k, v in model.state_dict().items()}
+            epochs_without_improvement = 0
+            if verbose:
+                print(f"✨ Model terbaik baru ditemukan! Val Loss: {avg_val_loss:.4f}")
+        else:
+            epochs_without_improvement += 1
+
+        if verbose and (epoch + 1) % 10 == 0:
+            print(f"Epoch [{epoch+1}/{num_epochs}], Val Loss: {avg_val_loss:.4f}, Val Acc: {val_acc:.4f}, Val F1: {val_f1:.4f}")
+
+        if patience is not None and epochs_without_improvement >= patience:
+            if verbose:
+                print(f"⏹️ Early stopping di epoch {epoch+1}: tidak ada perbaikan selama {patience} epoch.")
+            break
+    return best_state, best_val_loss, epoch + 1
 
 
 def export_model_to_onnx(model, input_dim, output_path):
@@ -96,84 +242,132 @@ def export_model_to_onnx(model, input_dim, output_path):
         print(f"❌ Gagal mengekspor model ke ONNX: {e}")
 
 
+def unscaled_model_path(fused_output_path):
+    """Path varian model gabungan tanpa input scaling_factors (mis. emotion_model_fused_unscaled.onnx)."""
+    root, ext = os.path.splitext(fused_output_path)
+    return f"{root}_unscaled{ext}"
+
+
+def export_fused_model_to_onnx(model, scaler, input_dim, output_path, personalized=True):
+    """
+    Mengekspor scaler + MLP sebagai satu graf ONNX. personalized=True menambahkan input
+    kedua `scaling_factors`; personalized=False menghasilkan graf yang cukup diberi
+    `input_features` (tanpa personalisasi).
+    """
+    model.to(torch.device('cpu'))
+    model.eval()
+    fused_model = FusedScalerMLP(model, scaler)
+    fused_model.eval()
+    dummy_input = torch.randn(1, input_dim)
+    args = (dummy_input,)
+    input_names = ['input_features']
+    dynamic_axes = {'input_features': {0: 'batch_size'}, 'output_logits': {0: 'batch_size'}}
+    if personalized:
+        args = (dummy_input, torch.ones(1, input_dim))
+        input_names.append('scaling_factors')
+        dynamic_axes['scaling_factors'] = {0: 'batch_size'}
+    variant = "personal" if personalized else "tanpa scaling personal"
+    print(f"\n🚀 Mengekspor model gabungan (scaler + MLP, {variant}) ke ONNX...")
+    try:
+        torch.onnx.export(
+            fused_model,
+            args,
+            output_path,
+            export_params=True,
+            opset_version=12,
+            do_constant_folding=True,
+            input_names=input_names,
+            output_names=['output_logits'],
+            dynamic_axes=dynamic_axes
+        )
+        print(f"✅ Model gabungan berhasil diekspor ke: {output_path}")
+    except Exception as e:
+        print(f"❌ Gagal mengekspor model gabungan ke ONNX: {e}")
+
+
 def train_evaluate_and_export(config):
     os.makedirs(config.output_dir, exist_ok=True)
-    train_loader, val_loader, test_loader, input_dim, num_classes = get_dataloaders(
+    train_loader, val_loader, test_loader, input_dim, num_classes, scaler = get_dataloaders(
         config.csv_path, config.batch_size, config.output_dir
     )
     model = MLPClassifier(input_dim, num_classes)
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     model.to(device)
-    criterion = nn.CrossEntropyLoss()
-    optimizer = optim.AdamW(model.parameters(), lr=config.learning_rate, weight_decay=1e-4)
-    scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, 'min', factor=0.5, patience=10, verbose=True)
-
-    best_val_loss = float('inf')
+    for loader in (train_loader, val_loader, test_loader):
+        loader.to(device)
     model_save_path = os.path.join(config.output_dir, 'best_emotion_model.pth')
 
-    print(f"🚀 Memulai Training untuk {config.num_epochs} epoch di {device}...")
+    print(f"🚀 Memulai Training untuk maksimal {config.num_epochs} epoch di {device}...")
+    best_state, best_val_loss, epochs_run = fit_model(
+        model, train_loader, val_loader, config.learning_rate, config.num_epochs,
+        patience=config.patience if config.patience > 0 else None, verbose=True)
 
-    # 3. Loop Training
-    for epoch in range(config.num_epochs):
-        model.train()
-        for features, labels in train_loader:
-            features, labels = features.to(device), labels.to(device)
-            optimizer.zero_grad()
-            outputs = model(features)
-            loss = criterion(outputs, labels)
-            loss.backward()
-            optimizer.step()
+    if best_state is None:
+        # Tidak ada epoch yang memperbaiki val loss (mis. loss NaN): jangan ekspor model rusak
+        print(f"❌ Training gagal: val loss tidak pernah membaik (terakhir: {best_val_loss}). Model tidak diekspor.")
+        return
 
-        model.eval()
-        val_loss, val_preds, val_labels = 0, [], []
-        with torch.no_grad():
-            for features, labels in val_loader:
-                features, labels = features.to(device), labels.to(device)
-                outputs = model(features)
-                val_loss += criterion(outputs, labels).item()
-                _, predicted = torch.max(outputs.data, 1)
-                val_preds.extend(predicted.cpu().numpy())
-                val_labels.extend(labels.cpu().numpy())
-
-        avg_val_loss = val_loss / len(val_loader)
-        scheduler.step(avg_val_loss)
+    # Bobot terbaik disimpan di memori selama training, ditulis ke disk sekali saja
+    model.load_state_dict(best_state)
+    torch.save(model.state_dict(), model_save_path)
+    print(f"✅ Model terbaik (Val Loss: {best_val_loss:.4f}, {epochs_run} epoch) disimpan ke '{model_save_path}'")
 
-        if avg_val_loss < best_val_loss:
-            best_val_loss = avg_val_loss
-            torch.save(model.state_dict(), model_save_path)
-            print(f"✨ Model terbaik baru ditemukan! Val Loss: {avg_val_loss:.4f}. Disimpan ke '{model_save_path}'")
-
-        if (epoch + 1) % 10 == 0:
-            acc = accuracy_score(val_labels, val_preds)
-            f1 = f1_score(val_labels, val_preds, average='macro')
-            print(f"Epoch [{epoch+1}/{config.num_epochs}], Val Loss: {avg_val_loss:.4f}, Val Acc: {acc:.4f}, Val F1: {f1:.4f}")
     print("\n🧪 Menjalankan Testing pada model TERBAIK...")
-    model.load_state_dict(torch.load(model_save_path))
-    model.eval()
-    test_preds, test_labels = [], []
-    with torch.no_grad():
-        for features, labels in test_loader:
-            features, labels = features.to(device), labels.to(device)
-            outputs = model(features)
-            _, predicted = torch.max(outputs.data, 1)
-            test_preds.extend(predicted.cpu().numpy())
-            test_labels.extend(labels.cpu().numpy())
+    test_preds, test_labels = predict_loader(model, test_loader)
     print("\n--- Laporan Klasifikasi Final (dari model terbaik) ---")
     print(classification_report(test_labels, test_preds, digits=4))
 
     onnx_output_path = os.path.join(config.output_dir, 'emotion_model.onnx')
     export_model_to_onnx(model, input_dim, onnx_output_path)
+    fused_output_path = os.path.join(config.output_dir, 'emotion_model_fused.onnx')
+    export_fused_model_to_onnx(model, scaler, input_dim, fused_output_path)
+    export_fused_model_to_onnx(model, scaler, input_dim, unscaled_model_path(fused_output_path),
+                               personalized=False)
+
+
+def benchmark_loaders(config, num_epochs=5):
+    """Membandingkan waktu satu epoch training DataLoader bawaan vs TensorBatchLoader."""
+    X, y = load_features(config.csv_path)
+    X = StandardScaler().fit_transform(X)
+    loaders = {
+        "DataLoader": DataLoader(EmotionFeatureDataset(X, y), batch_size=config.batch_size, shuffle=True),
+        "TensorBatchLoader": TensorBatchLoader(X, y, config.batch_size, shuffle=True),
+    }
+    criterion = nn.CrossEntropyLoss()
+    print(f"⏱️ Benchmark loader: {len(X)} sampel, batch {config.batch_size}, {num_epochs} epoch")
+    for name, loader in loaders.items():
+        torch.manual_seed(42)
+        model = MLPClassifier(X.shape[1], len(np.unique(y)))
+        optimizer = optim.AdamW(model.parameters(), lr=config.learning_rate)
+        model.train()
+        start = time.perf_counter()
+        for _ in range(num_epochs):
+            for features, labels in loader:
+                if len(features) < 2:
+                    continue  # BatchNorm butuh lebih dari satu sampel
+                optimizer.zero_grad()
+                criterion(model(features), labels).backward()
+                optimizer.step()
+        elapsed = (time.perf_counter() - start) / num_epochs
+        print(f"   {name:<18}: {elapsed * 1000:.1f} ms/epoch")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Training dan Ekspor Klasifikasi Emosi dari Fitur Geometris.")
     parser.add_argument("--csv_path", type=str, default="./runs/delta_emotion_features.csv",
-                        help="Path ke file CSV berisi fitur.")
+                        help="Path ke file CSV berisi fitur, atau sidecar .json dari feature store biner.")
     parser.add_argument("--output_dir", type=str, default="./runs",
                         help="Direktori untuk menyimpan semua hasil (model .pth, scaler .pkl, dan .onnx).")
     parser.add_argument("--learning_rate", type=float, default=0.001)
     parser.add_argument("--batch_size", type=int, default=64)
     parser.add_argument("--num_epochs", type=int, default=100)
+    parser.add_argument("--patience", type=int, default=20,
+                        help="Early stopping setelah sekian epoch tanpa perbaikan val loss (0 = nonaktif).")
+    parser.add_argument("--benchmark_loader", action="store_true",
+                        help="Hanya membandingkan kecepatan DataLoader vs TensorBatchLoader, tanpa training penuh.")
 
     args = parser.parse_args()
-    train_evaluate_and_export(args)
+    if args.benchmark_loader:
+        benchmark_loaders(args)
+    else:
+        train_evaluate_and_export(args)
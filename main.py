@@ -1,11 +1,10 @@
 import sys
+import asyncio
 import json
 import threading
 import time
-from typing import Literal
-import cv2
-import numpy as np
-import onnxruntime
+from collections import deque
+from typing import TYPE_CHECKING, Literal
 from PyQt6.QtWidgets import (
     QApplication,
     QWidget,
@@ -19,18 +18,32 @@ from PyQt6.QtWidgets import (
     QSpacerItem,
     QSizePolicy,
 )
-from PyQt6.QtCore import Qt, QPoint
+from PyQt6.QtCore import Qt, QPoint, QTimer, pyqtSignal
 from PyQt6.QtGui import QScreen
 from datetime import datetime
 import os
-import csv
 import random  # Import random for question selection
+from src.phq.bank import get_question_bank
+from src.runtime import AsyncRuntime, run_qt_app
+
+# cv2, numpy and onnxruntime are imported lazily in background threads so the
+# window can be shown before these heavy modules finish loading.
+if TYPE_CHECKING:
+    import numpy as np
+
+# Set by benchmarks/startup.py: wall-clock time (time.time()) the process was launched
+STARTUP_BENCHMARK_T0 = os.environ.get("STARTUP_BENCHMARK_T0")
 
 
 class ModernMentalHealthSurveyApp(QWidget):
-    def __init__(self):
+    # Emitted from the question bank loader thread; delivered on the GUI thread
+    questions_loaded = pyqtSignal(object)
+
+    def __init__(self, runtime: AsyncRuntime):
         super().__init__()
         self.setWindowTitle("Mental Health Quick Check")
+        # Capture and inference run as asyncio tasks; blocking calls use its executor
+        self.runtime = runtime
 
         # --- Define Log Directory ---
         self.log_directory = "logs"
@@ -64,14 +77,15 @@ class ModernMentalHealthSurveyApp(QWidget):
         self.ort_session = None
         self.input_name = None
         self.output_name = None
-        self._load_onnx_model()
+        self.model_ready = threading.Event()  # Set once loading finished (success or not)
+        self.pending_frames = deque(maxlen=10)  # Frames captured before the model is ready
         # --- End ONNX Configuration ---
 
         # --- Question Loading and Randomization ---
+        # Questions are loaded in the background so the window can appear first
         self.augmented_data_file = "Hasil Augmentasi - Sheet1.csv"  # Your CSV file
-        self.questions = (
-            self._load_and_randomize_questions()
-        )  # Call new method to load and randomize
+        self.questions_loading = True
+        self.questions = []
         # --- End Question Loading ---
 
         self.num_questions = len(self.questions)
@@ -96,21 +110,55 @@ class ModernMentalHealthSurveyApp(QWidget):
         )  # Logs to survey_log_file_name
 
         self.capture_active = False
-        self.capture_thread = None
+        self.capture_task = None
+        # Webcam index, video file, image directory or "synthetic" (see src/frame_source.py);
+        # None uses the FRAME_SOURCE environment variable, then webcam 0
+        self.frame_source = None
 
         self.init_ui()
         self.apply_styles()
         self._center_window()
 
-        self._start_webcam_capture()
+        self.display_question()
+        # Tasks are spawned once the event loop runs (the window is constructed before it)
+        QTimer.singleShot(0, self._start_background_tasks)
+        self.questions_loaded.connect(self._on_questions_loaded)
+        get_question_bank(
+            self.augmented_data_file, id_column="ID", columns=["Teks_Hasil_Augmentasi"]
+        ).load_async(self.questions_loaded.emit)
+
+    def _on_questions_loaded(self, grouped_data):
+        self.questions = self._randomize_questions(grouped_data)
+        self.questions_loading = False
+        self.num_questions = len(self.questions)
+        self.current_question_index = 0
+        self.user_answers = [None] * self.num_questions
         self.display_question()
         self._log_event(
             action_type="passive",
             event_type="question_displayed",
             details={"question_index": self.current_question_index + 1},
         )  # Logs to survey_log_file_name
+        if STARTUP_BENCHMARK_T0:
+            QTimer.singleShot(0, self._report_startup_benchmark)
+
+    def _report_startup_benchmark(self):
+        # Runs after the first question has been painted; the benchmark parses this line
+        elapsed = time.time() - float(STARTUP_BENCHMARK_T0)
+        print(f"STARTUP_METRIC time_to_first_question={elapsed:.4f}", flush=True)
+        self.close()
+
+    def _start_background_tasks(self):
+        self.runtime.spawn(self.runtime.run_blocking(self._load_onnx_model), name="onnx-load")
+        self._start_webcam_capture()
 
     def _load_onnx_model(self):
+        try:
+            self._create_onnx_session()
+        finally:
+            self.model_ready.set()
+
+    def _create_onnx_session(self):
         # ... (same as before) ...
         if not os.path.exists(self.onnx_model_path):
             print(
@@ -119,6 +167,8 @@ class ModernMentalHealthSurveyApp(QWidget):
             self.ort_session = None
             return
         try:
+            import onnxruntime
+
             self.ort_session = onnxruntime.InferenceSession(self.onnx_model_path)
             self.input_name = self.ort_session.get_inputs()[0].name
             self.output_name = self.ort_session.get_outputs()[0].name
@@ -181,10 +231,14 @@ class ModernMentalHealthSurveyApp(QWidget):
             )
 
     def _log_image_prediction(
-        self, predicted_label: str, confidence: float, predicted_index: int
+        self,
+        predicted_label: str,
+        confidence: float,
+        predicted_index: int,
+        captured_at: datetime = None,
     ):
         # This new method logs to self.prediction_log_file_name
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        timestamp = (captured_at or datetime.now()).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
         log_entry = {
             "timestamp": timestamp,
             "predicted_label": predicted_label,
@@ -229,8 +283,11 @@ class ModernMentalHealthSurveyApp(QWidget):
                 f"Error writing to prediction log file '{self.prediction_log_file_name}': {e}"
             )
 
-    def _preprocess_image(self, frame: np.ndarray) -> np.ndarray:
+    def _preprocess_image(self, frame: "np.ndarray") -> "np.ndarray":
         # ... (same as before, with mean/std normalization) ...
+        import cv2
+        import numpy as np
+
         img = cv2.resize(frame, self.input_size)
         img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         img = img.astype(np.float32) / 255.0
@@ -243,116 +300,94 @@ class ModernMentalHealthSurveyApp(QWidget):
 
     def _start_webcam_capture(self):
         # ... (same as before) ...
-        if self.capture_thread is None:
+        if self.capture_task is None:
             self.capture_active = True
-            self.capture_thread = threading.Thread(
-                target=self._webcam_capture_loop, daemon=True
+            self.capture_task = self.runtime.spawn(
+                self._webcam_capture_loop(), name="webcam-capture"
             )
-            self.capture_thread.start()
-            print("Webcam capture thread started.")
+            print("Webcam capture task started.")
 
-    def _webcam_capture_loop(self):
+    async def _webcam_capture_loop(self):
         # ... (modified to call _log_image_prediction) ...
         cap = None
         try:
-            cap = cv2.VideoCapture(0)
+            from src.frame_source import open_frame_source
+
+            cap = await self.runtime.run_blocking(open_frame_source, self.frame_source)
             if not cap.isOpened():
-                print(f"{datetime.now()}: Error: Could not open webcam.")
+                print(f"{datetime.now()}: Error: Could not open frame source.")
                 self.capture_active = False
                 return
             print(f"{datetime.now()}: Webcam opened successfully.")
 
             while self.capture_active:
-                ret, frame = cap.read()
+                ret, frame = await self.runtime.run_blocking(cap.read)
                 if ret:
-                    if self.ort_session:
-                        try:
-                            preprocessed_frame = self._preprocess_image(frame.copy())
-                            ort_inputs = {self.input_name: preprocessed_frame}
-                            ort_outs = self.ort_session.run(
-                                [self.output_name], ort_inputs
-                            )
-                            scores = ort_outs[0][0]
-                            predicted_index = np.argmax(scores)
-                            confidence = float(scores[predicted_index])
-                            predicted_label = "Unknown"
-                            if 0 <= predicted_index < len(self.class_labels):
-                                predicted_label = self.class_labels[predicted_index]
-
-                            # Log to the dedicated prediction log file
-                            self._log_image_prediction(
-                                predicted_label, confidence, predicted_index
-                            )
-
-                        except Exception as e:
-                            print(
-                                f"{datetime.now()}: Error during model inference: {e}"
-                            )
+                    # Queue frames until the model is warm, then drain in capture order
+                    self.pending_frames.append((datetime.now(), frame))
+                    if self.model_ready.is_set():
+                        if self.ort_session:
+                            while self.pending_frames:
+                                await self.runtime.run_blocking(
+                                    self._predict_frame, *self.pending_frames.popleft()
+                                )
+                        else:
+                            self.pending_frames.clear()
                 else:
                     print(
                         f"{datetime.now()}: Error: Failed to capture frame from webcam."
                     )
 
-                for _ in range(10):
-                    if not self.capture_active:
-                        break
-                    time.sleep(0.1)
+                await asyncio.sleep(1.0)  # Cancelled immediately on close
         except Exception as e:
             print(f"{datetime.now()}: Exception in webcam loop: {e}")
         finally:
             if cap and cap.isOpened():
                 cap.release()
             print(
-                f"{datetime.now()}: Webcam capture thread finished and webcam released."
+                f"{datetime.now()}: Webcam capture task finished and webcam released."
             )
             self.capture_active = False
 
+    def _predict_frame(self, captured_at: datetime, frame: "np.ndarray"):
+        import numpy as np
+
+        try:
+            preprocessed_frame = self._preprocess_image(frame)
+            ort_inputs = {self.input_name: preprocessed_frame}
+            ort_outs = self.ort_session.run([self.output_name], ort_inputs)
+            scores = ort_outs[0][0]
+            predicted_index = np.argmax(scores)
+            confidence = float(scores[predicted_index])
+            predicted_label = "Unknown"
+            if 0 <= predicted_index < len(self.class_labels):
+                predicted_label = self.class_labels[predicted_index]
+
+            # Log to the dedicated prediction log file
+            self._log_image_prediction(
+                predicted_label, confidence, predicted_index, captured_at
+            )
+
+        except Exception as e:
+            print(f"{datetime.now()}: Error during model inference: {e}")
+
     def _stop_webcam_capture(self):
         # ... (same as before) ...
-        print("Attempting to stop webcam capture thread...")
+        print("Attempting to stop webcam capture task...")
         self.capture_active = False
-        if self.capture_thread and self.capture_thread.is_alive():
-            self.capture_thread.join(timeout=2.5)
-            if self.capture_thread.is_alive():
-                print("Webcam capture thread did not stop in time.")
-            else:
-                print("Webcam capture thread stopped.")
-        self.capture_thread = None
+        # Cancellation is cooperative: the task releases the webcam in its finally block
+        # and run_qt_app waits for that cleanup after the window has closed
+        self.runtime.cancel()
+        self.capture_task = None
 
-    def _load_and_randomize_questions(self):
+    def _randomize_questions(self, grouped_data):
         """
-        Loads augmented questions from CSV, groups them by ID,
-        and selects one random question for each ID.
+        Selects one random augmented question for each ID from the shared
+        question bank (grouped by ID, already validated and deduplicated).
         """
-        grouped_data = {}
-        try:
-            with open(self.augmented_data_file, mode="r", encoding="utf-8") as file:
-                reader = csv.reader(file)
-                header = next(reader)  # Skip header row
-
-                for row in reader:
-                    if len(row) >= 6:  # Ensure row has enough columns
-                        try:
-                            q_id = int(row[0])  # ID is in the first column
-                            # Ensure the question text is properly stripped of potential extra quotes
-                            augmented_text = (
-                                row[5].strip().strip('"')
-                            )  # Augmented text is in the sixth column
-                            if q_id not in grouped_data:
-                                grouped_data[q_id] = []
-                            grouped_data[q_id].append(augmented_text)
-                        except ValueError:
-                            print(f"Skipping row due to invalid ID format: {row[0]}")
-                    else:
-                        print(f"Skipping malformed row (not enough columns): {row}")
-        except FileNotFoundError:
-            print(
-                f"Error: CSV file '{self.augmented_data_file}' not found. Using default questions."
-            )
-            return self._get_default_questions()
-        except Exception as e:
+        if grouped_data is None:
             print(
-                f"Error loading augmented data from CSV: {e}. Using default questions."
+                f"Error loading augmented data from '{self.augmented_data_file}'. Using default questions."
             )
             return self._get_default_questions()
 
@@ -364,7 +399,7 @@ class ModernMentalHealthSurveyApp(QWidget):
         for q_id in sorted_ids:
             augmented_texts = grouped_data.get(q_id, [])
             if augmented_texts:
-                selected_text = random.choice(augmented_texts)
+                (selected_text,) = random.choice(augmented_texts)
                 generated_questions.append(
                     {
                         "text": f"{q_id}. {selected_text}",
@@ -525,6 +560,13 @@ class ModernMentalHealthSurveyApp(QWidget):
             if child.widget():
                 child.widget().deleteLater()
 
+        if self.questions_loading:
+            self.question_label.setText("Memuat pertanyaan...")
+            self.progress_label.setText("")
+            self.prev_button.setEnabled(False)
+            self.next_button.setEnabled(False)
+            return
+
         if not self.questions:  # Handle case where no questions were loaded
             self.question_label.setText(
                 "No questions available. Please check the CSV file."
@@ -553,6 +595,7 @@ class ModernMentalHealthSurveyApp(QWidget):
                 if self.user_answers[self.current_question_index] == option_text:
                     radio_button.setChecked(True)
             self.prev_button.setEnabled(self.current_question_index > 0)
+            self.next_button.setEnabled(True)
             if self.current_question_index == self.num_questions - 1:
                 self.next_button.setText("Selesai")  # Translated
             else:
@@ -680,7 +723,11 @@ class ModernMentalHealthSurveyApp(QWidget):
         dialog.setIcon(QMessageBox.Icon.Information)
         dialog.setTextFormat(Qt.TextFormat.RichText)
         dialog.setText(result_message_intro)
-        dialog.exec()
+        # Non-modal open(): exec() would run a nested event loop under the asyncio loop
+        dialog.finished.connect(self._finish_survey)
+        dialog.open()
+
+    def _finish_survey(self, result=None):
         self.next_button.setEnabled(False)
         self.prev_button.setEnabled(False)
         self._log_event(action_type="passive", event_type="survey_completed")
@@ -798,9 +845,10 @@ if __name__ == "__main__":
     run_application = True
     if run_application:
         app_instance = QApplication(sys.argv)
-        survey_app = ModernMentalHealthSurveyApp()
+        runtime = AsyncRuntime(name="survey")
+        survey_app = ModernMentalHealthSurveyApp(runtime)
         survey_app.show()
-        exit_code = app_instance.exec()
+        exit_code = run_qt_app(app_instance, runtime)
         if exit_code == 0:
             print(f"\nAplikasi selesai.")  # Translated
             display_survey_log(survey_app.survey_log_file_name)
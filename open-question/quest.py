@@ -23,6 +23,9 @@ from PyQt6.QtGui import QScreen
 from datetime import datetime
 import os
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from src.frame_source import open_frame_source  # noqa: E402
+
 
 class ModernMentalHealthSurveyApp(QWidget):
     def __init__(self):
@@ -109,6 +112,8 @@ class ModernMentalHealthSurveyApp(QWidget):
 
         self.capture_active = False
         self.capture_thread = None
+        # Webcam index, video file, image directory or "synthetic" (see src/frame_source.py)
+        self.frame_source = None
 
         self.init_ui()
         self.apply_styles()
@@ -293,9 +298,9 @@ class ModernMentalHealthSurveyApp(QWidget):
     def _webcam_capture_loop(self):
         cap = None
         try:
-            cap = cv2.VideoCapture(0)
+            cap = open_frame_source(self.frame_source)
             if not cap.isOpened():
-                print(f"{datetime.now()}: Error: Could not open webcam. Capture disabled.")
+                print(f"{datetime.now()}: Error: Could not open frame source. Capture disabled.")
                 self.capture_active = False
                 return
             print(f"{datetime.now()}: Webcam opened successfully. Starting capture loop.")
@@ -22,6 +22,7 @@ from PyQt6.QtCore import Qt, QPoint
 from PyQt6.QtGui import QScreen
 from datetime import datetime
 import os
+from src.frame_source import open_frame_source
 
 
 class ModernMentalHealthSurveyApp(QWidget):
@@ -109,6 +110,8 @@ class ModernMentalHealthSurveyApp(QWidget):
 
         self.capture_active = False
         self.capture_thread = None
+        # Webcam index, video file, image directory or "synthetic" (see src/frame_source.py)
+        self.frame_source = None
 
         self.init_ui()
         self.apply_styles()
@@ -294,9 +297,9 @@ class ModernMentalHealthSurveyApp(QWidget):
         # ... (modified to call _log_image_prediction) ...
         cap = None
         try:
-            cap = cv2.VideoCapture(0)
+            cap = open_frame_source(self.frame_source)
             if not cap.isOpened():
-                print(f"{datetime.now()}: Error: Could not open webcam.")
+                print(f"{datetime.now()}: Error: Could not open frame source.")
                 self.capture_active = False
                 return
             print(f"{datetime.now()}: Webcam opened successfully.")
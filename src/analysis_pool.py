@@ -0,0 +1,184 @@
+"""
+Process pool for face analysis, so detection, FaceMesh and ONNX run outside the GUI
+process (and outside its GIL).
+
+Frames are handed over through a private frame bus (src/frame_bus.py): the GUI process
+copies a frame into a shared-memory slot once and only its sequence number is sent to
+the workers, which read the slot zero-copy. One worker detects the faces, then every
+face is classified as a separate job, so several faces spread across cores. Workers
+return only boxes, label indices and probabilities, plus the stage timings of the job
+while metrics are enabled (src/metrics.py), which the pool records in the GUI process.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .frame_bus import FrameBusPublisher, FrameBusSource
+from .metrics import METRICS
+
+Box = Tuple[int, int, int, int]
+# (box, label_index, probabilities)
+FaceAnalysis = Tuple[Box, int, np.ndarray]
+AnalysisCallback = Callable[[int, List[Box], List[FaceAnalysis]], None]
+# (result, [(stage, seconds), ...]) returned by the worker jobs
+JobResult = Tuple[Any, List[Tuple[str, float]]]
+
+_worker_bus = None
+_worker_analyzer = None
+
+
+def _init_worker(
+    bus_name: str,
+    analyzer_factory: Callable[..., Any],
+    factory_kwargs: Dict[str, Any],
+    metrics_enabled: bool = False,
+):
+    global _worker_bus, _worker_analyzer
+    # Only collects spans (see _detect/_classify); the parent exports them
+    METRICS.enabled = metrics_enabled
+    _worker_bus = FrameBusSource(bus_name, copy=False)
+    _worker_analyzer = analyzer_factory(**factory_kwargs)
+
+
+def _detect(sequence: int) -> JobResult:
+    with METRICS.collect() as timings:
+        frame = _worker_bus.frame(sequence)
+        if frame is None:
+            return None, timings
+        return [tuple(int(v) for v in box) for box in _worker_analyzer.detect(frame)], timings
+
+
+def _classify(sequence: int, box: Box) -> JobResult:
+    with METRICS.collect() as timings:
+        frame = _worker_bus.frame(sequence)
+        if frame is None:
+            return None, timings
+        return _worker_analyzer.classify(frame, box), timings
+
+
+class AnalysisPool:
+    """
+    Runs an analyzer in worker processes. The analyzer is created in every worker by
+    `analyzer_factory(**factory_kwargs)` (a module-level function or class, so it can be
+    pickled by reference) and must provide detect(frame) -> boxes and
+    classify(frame, box) -> FaceAnalysis or None.
+    submit() never blocks: while `max_pending_frames` frames are still being analysed
+    the new frame is dropped, like the apps' detection interval already does.
+    Attributes:
+        workers (int): Number of worker processes.
+        max_pending_frames (int): Frames analysed concurrently.
+        dropped_frames (int): Frames refused because the pool was busy.
+        broken (bool): A worker died or failed to start; the pool accepts no more frames.
+    """
+
+    def __init__(
+        self,
+        analyzer_factory: Callable[..., Any],
+        frame_shape: Tuple[int, int, int],
+        workers: int = 2,
+        factory_kwargs: Optional[Dict[str, Any]] = None,
+        max_pending_frames: Optional[int] = None,
+    ):
+        self.workers = workers
+        self.max_pending_frames = max_pending_frames or workers
+        self.dropped_frames = 0
+        self.broken = False
+        self.__lock = threading.Lock()
+        self.__pending: Dict[int, int] = {}  # ring slot -> sequence still read by workers
+        self.__slots = self.max_pending_frames + 1
+        height, width, channels = frame_shape
+        bus_name = f"phq_analysis_{os.getpid()}_{id(self):x}"
+        self.__bus = FrameBusPublisher(bus_name, width, height, channels, slots=self.__slots)
+        # spawn: forking a process that runs Qt and model threads is not safe
+        self.__executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(bus_name, analyzer_factory, factory_kwargs or {}, METRICS.enabled),
+        )
+
+    def submit(self, frame: np.ndarray, callback: AnalysisCallback) -> bool:
+        """
+        Queues `frame` for analysis. callback(sequence, boxes, analyses) is called exactly
+        once from a pool thread, when every face is classified or the pool failed (with the
+        analyses of that frame left empty). Returns False if the frame was dropped.
+        """
+        with self.__lock:
+            slot = (self.__bus.sequence + 1) % self.__slots
+            if self.broken or len(self.__pending) >= self.max_pending_frames or slot in self.__pending:
+                self.dropped_frames += 1
+                return False
+            sequence = self.__bus.publish(frame)
+            self.__pending[slot] = sequence
+        try:
+            future = self.__executor.submit(_detect, sequence)
+        except (RuntimeError, BrokenProcessPool) as e:
+            self.__fail(e)
+            self.__finish(sequence)
+            return False
+        # Worker timings are tagged with the camera of the submitting thread
+        camera = METRICS.current_camera()
+        future.add_done_callback(lambda f: self.__on_detected(sequence, f, callback, camera))
+        return True
+
+    def __on_detected(self, sequence: int, future: Future, callback: AnalysisCallback, camera: Optional[str]):
+        boxes = self.__result(future, camera) or []
+        if not boxes:
+            self.__finish(sequence)
+            callback(sequence, [], [])
+            return
+        futures = []
+        try:
+            for box in boxes:
+                futures.append(self.__executor.submit(_classify, sequence, box))
+        except (RuntimeError, BrokenProcessPool) as e:
+            # Jobs already queued would report to nobody; the caller still gets its callback
+            self.__fail(e)
+            for f in futures:
+                f.cancel()
+            self.__finish(sequence)
+            callback(sequence, boxes, [])
+            return
+        remaining = [len(futures)]
+
+        def on_classified(_):
+            with self.__lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            analyses = [a for a in (self.__result(f, camera) for f in futures) if a is not None]
+            self.__finish(sequence)
+            callback(sequence, boxes, analyses)
+
+        for f in futures:
+            f.add_done_callback(on_classified)
+
+    def __result(self, future: Future, camera: Optional[str]):
+        try:
+            result, timings = future.result()
+            METRICS.record_all(timings, camera)
+            return result
+        except BrokenProcessPool as e:
+            self.__fail(e)
+        except Exception as e:
+            print(f"Analysis worker error: {e}")
+        return None
+
+    def __fail(self, error: Exception):
+        if not self.broken:
+            self.broken = True
+            print(f"Analysis pool stopped: {error}")
+
+    def __finish(self, sequence: int):
+        with self.__lock:
+            self.__pending.pop(sequence % self.__slots, None)
+
+    def close(self):
+        self.__executor.shutdown(wait=True, cancel_futures=True)
+        self.__bus.close()
@@ -11,11 +11,15 @@ from PyQt6.QtWidgets import (
     QApplication,
     QSizePolicy,
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 
 from consts import WINDOW_TITLE
 from .handler.model import ModelHandler
 from .handler.webcam import WebcamHandler
+from .handler.rate_control import RateController
+from .config import model as cfg
+from .frame_source import frame_source_specs
+from .metrics import start_metrics
 from .handler.logging import SurveyLogging
 from .ui import apply_styles
 from .phq.manager import PHQ_QUESTIONS
@@ -26,10 +30,29 @@ class ModernMentalHealthSurveyApp(QWidget):
         super().__init__()
         self.setWindowTitle(WINDOW_TITLE)
 
-        # Initialize handlers
+        # Initialize handlers; the ONNX model loads in the background and
+        # frames captured before it is ready are queued by the webcam handler
         self.survey_logging = SurveyLogging()
-        self.model_handler = ModelHandler()
-        self.webcam_handler = WebcamHandler(self.model_handler)
+        # Stage timings (Prometheus endpoint + summary line) when METRICS_ENABLED=1
+        start_metrics()
+        self.model_handler = ModelHandler(load_in_background=True)
+        sources = frame_source_specs(cfg.FRAME_SOURCES)
+        self.webcam_handler = WebcamHandler(
+            self.model_handler,
+            frame_source=sources if len(sources) > 1 else sources[0],
+            camera_ids=cfg.CAMERA_IDS,
+            capture_interval=cfg.CAPTURE_INTERVAL_SECONDS,
+            inference_budget=cfg.INFERENCE_BUDGET_PER_SECOND,
+            # Capture less often when the machine is busy or on a low battery
+            rate_controller=RateController(
+                "capture",
+                cfg.CAPTURE_INTERVAL_SECONDS,
+                *cfg.CAPTURE_INTERVAL_BOUNDS,
+                **cfg.RATE_CONTROL_OPTIONS,
+            )
+            if cfg.ADAPTIVE_RATES
+            else None,
+        )
 
         # Setup UI
         self.questions = PHQ_QUESTIONS
@@ -41,11 +64,11 @@ class ModernMentalHealthSurveyApp(QWidget):
         apply_styles(self)
         self._center_window()
 
-        # Start webcam
-        self.webcam_handler.start_capture()
-
         self.display_question()
 
+        # Start webcam once the event loop is running, after the first question is shown
+        QTimer.singleShot(0, self.webcam_handler.start_capture)
+
     def _center_window(self):
         screen = QApplication.primaryScreen()
         if screen:
@@ -2,6 +2,12 @@ import cv2
 
 MODEL_NAME = "mnasnet_small.lamb_in1k"
 MODEL_PATH = "LMP_2019_model.onnx"
+# Quantized variant to load: "fp32", "fp16", "int8_dynamic" or "int8_static"
+# (generated with tools/quantize_models.py; missing variants fall back to fp32)
+MODEL_VARIANT = "fp32"
+# Model used by ModelHandler (survey app)
+EMOTION_MODEL_PATH = "model.onnx"
+EMOTION_MODEL_VARIANT = "fp32"
 HAAR_CASCADE_PATH = "haarcascade_frontalface_default.xml"
 CLASS_NAMES = [
     "anger",
@@ -17,10 +23,64 @@ WINDOW_TITLE = "Deteksi Emosi (Timm Preprocessing)"
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 VIDEO_FPS = 30
+# Webcam index, video file, image directory or "synthetic?realtime=0" (see src/frame_source.py);
+# None uses the FRAME_SOURCE environment variable, then webcam 0
+FRAME_SOURCE = None
+# Several cameras (group sessions): a list of sources like [0, 1, "bus:phq_camera2"];
+# None uses the ";"-separated FRAME_SOURCES environment variable, else FRAME_SOURCE only.
+# CAMERA_IDS tags logs and metrics per camera (None: "cam0", "cam1", ...).
+FRAME_SOURCES = None
+CAMERA_IDS = None
+# Analyses per second shared fairly by all cameras (None: every camera at its own interval)
+INFERENCE_BUDGET_PER_SECOND = None
 DETECTION_INTERVAL_SECONDS = 0.5
+# Seconds between two webcam frames predicted by the survey app (per camera)
+CAPTURE_INTERVAL_SECONDS = 1.0
+# --- Adaptive Rates (src/handler/rate_control.py) ---
+# The detection and capture intervals follow CPU load, stage latency and battery state
+# within these (min, max) bounds in seconds; False keeps the fixed intervals above
+ADAPTIVE_RATES = True
+DETECTION_INTERVAL_BOUNDS = (0.25, 2.0)
+CAPTURE_INTERVAL_BOUNDS = (0.5, 5.0)
+RATE_CONTROL_OPTIONS = {
+    "cpu_high": 0.85,  # Slow down above this system CPU load (0.0 - 1.0)
+    "cpu_low": 0.5,  # Speed up again below it
+    "latency_budget": 0.5,  # Max share of the interval the stage may take
+    "low_battery_percent": 20.0,  # Slow down when discharging below this capacity
+}
+# Worker processes for detection, FaceMesh and ONNX (src/analysis_pool.py); frames are
+# passed through shared memory and each face is classified as its own job.
+# 0 runs the analysis in the GUI process.
+ANALYSIS_WORKERS = 2
 HAAR_SCALE_FACTOR = 1.1
 HAAR_MIN_NEIGHBORS = 10
 HAAR_MIN_SIZE = (30, 30)
+# Detection runs on a grayscale copy shrunk by this factor; boxes are mapped back to
+# full resolution for the face crop (cost falls roughly with the square of the factor)
+DETECTION_DOWNSCALE = 2.0
+# --- Face Detector Configuration ---
+# Backend: "haar", "yunet", "dnn" or "mediapipe" (see src/detection)
+FACE_DETECTOR_BACKEND = "haar"
+FACE_DETECTOR_OPTIONS = {
+    "haar": {
+        "cascade_path": HAAR_CASCADE_PATH,
+        "scale_factor": HAAR_SCALE_FACTOR,
+        "min_neighbors": HAAR_MIN_NEIGHBORS,
+        "min_size": HAAR_MIN_SIZE,
+        "downscale": DETECTION_DOWNSCALE,
+    },
+    "yunet": {
+        "model_path": "face_detection_yunet_2023mar.onnx",
+        "score_threshold": 0.7,
+        "downscale": DETECTION_DOWNSCALE,
+    },
+    "dnn": {
+        "model_path": "res10_300x300_ssd_iter_140000.caffemodel",
+        "config_path": "deploy.prototxt",
+        "confidence": 0.5,
+    },
+    "mediapipe": {"model_selection": 0, "min_detection_confidence": 0.5},
+}
 # --- Drawing Configuration ---
 BOX_COLOR = (0, 255, 0)      # Green
 TEXT_COLOR = (255, 255, 255)  # White
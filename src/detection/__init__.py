@@ -0,0 +1,29 @@
+from .detectors import (
+    FACE_DETECTOR_BACKENDS,
+    DnnFaceDetector,
+    FaceDetector,
+    HaarFaceDetector,
+    MediaPipeFaceDetector,
+    YuNetFaceDetector,
+    create_face_detector,
+)
+from .scaling import (
+    crop_face,
+    map_box_to_full_resolution,
+    map_boxes_to_full_resolution,
+    prepare_detection_frame,
+)
+
+__all__ = [
+    "FACE_DETECTOR_BACKENDS",
+    "DnnFaceDetector",
+    "FaceDetector",
+    "HaarFaceDetector",
+    "MediaPipeFaceDetector",
+    "YuNetFaceDetector",
+    "create_face_detector",
+    "crop_face",
+    "map_box_to_full_resolution",
+    "map_boxes_to_full_resolution",
+    "prepare_detection_frame",
+]
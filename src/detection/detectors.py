@@ -0,0 +1,206 @@
+import os
+from typing import Dict, List, Sequence, Tuple, Type
+
+import cv2
+import numpy as np
+
+from ..metrics import METRICS
+from .scaling import Box, map_boxes_to_full_resolution, prepare_detection_frame
+
+
+class FaceDetector:
+    """
+    Base class for face detector backends.
+    detect() takes a full-resolution BGR frame, runs the backend on a copy shrunk by
+    `downscale` (grayscale for backends that set `grayscale`) and returns face boxes as
+    (x, y, w, h) tuples mapped back to the full frame's pixels, largest face first.
+    Backends implement _detect_scaled(), which returns boxes in the small image's pixels.
+    """
+
+    name = "base"
+    grayscale = False
+
+    def __init__(self, downscale: float = 1.0):
+        self.downscale = max(1.0, downscale)
+
+    def detect(self, frame: np.ndarray) -> List[Box]:
+        with METRICS.span("detect"):
+            image, scale = prepare_detection_frame(frame, self.downscale, self.grayscale)
+            boxes = self._detect_scaled(image)
+            return map_boxes_to_full_resolution(boxes, scale, frame.shape[1], frame.shape[0])
+
+    def _detect_scaled(self, image: np.ndarray) -> List[Sequence[float]]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class HaarFaceDetector(FaceDetector):
+    """
+    Haar cascade run on a grayscale frame downscaled by `downscale`.
+    `min_size` is given in full-resolution pixels.
+    """
+
+    name = "haar"
+    grayscale = True
+
+    def __init__(
+        self,
+        cascade_path: str = "haarcascade_frontalface_default.xml",
+        scale_factor: float = 1.1,
+        min_neighbors: int = 5,
+        min_size: Tuple[int, int] = (30, 30),
+        downscale: float = 2.0,
+    ):
+        super().__init__(downscale)
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise IOError(f"Could not load Haar cascade '{cascade_path}'")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+
+    def _detect_scaled(self, image: np.ndarray) -> List[Sequence[float]]:
+        min_size = (
+            max(1, int(self.min_size[0] / self.downscale)),
+            max(1, int(self.min_size[1] / self.downscale)),
+        )
+        faces = self.cascade.detectMultiScale(
+            image,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=min_size,
+        )
+        return list(faces)
+
+
+class YuNetFaceDetector(FaceDetector):
+    """OpenCV FaceDetectorYN (YuNet) loaded from a local .onnx model file."""
+
+    name = "yunet"
+
+    def __init__(
+        self,
+        model_path: str = "face_detection_yunet_2023mar.onnx",
+        score_threshold: float = 0.7,
+        nms_threshold: float = 0.3,
+        top_k: int = 50,
+        downscale: float = 1.0,
+    ):
+        super().__init__(downscale)
+        if not os.path.exists(model_path):
+            raise IOError(f"YuNet model not found at '{model_path}'")
+        self.detector = cv2.FaceDetectorYN.create(
+            model_path, "", (320, 320), score_threshold, nms_threshold, top_k
+        )
+        self.input_size = (320, 320)
+
+    def _detect_scaled(self, image: np.ndarray) -> List[Sequence[float]]:
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        image_h, image_w = image.shape[:2]
+        if self.input_size != (image_w, image_h):
+            self.input_size = (image_w, image_h)
+            self.detector.setInputSize(self.input_size)
+        _, faces = self.detector.detect(image)
+        if faces is None:
+            return []
+        return [face[:4] for face in faces]
+
+
+class DnnFaceDetector(FaceDetector):
+    """OpenCV DNN SSD face detector (res10_300x300) loaded from local Caffe files."""
+
+    name = "dnn"
+
+    def __init__(
+        self,
+        model_path: str = "res10_300x300_ssd_iter_140000.caffemodel",
+        config_path: str = "deploy.prototxt",
+        confidence: float = 0.5,
+        input_size: Tuple[int, int] = (300, 300),
+        downscale: float = 1.0,
+    ):
+        super().__init__(downscale)
+        for path in (model_path, config_path):
+            if not os.path.exists(path):
+                raise IOError(f"DNN face model file not found at '{path}'")
+        self.net = cv2.dnn.readNetFromCaffe(config_path, model_path)
+        self.confidence = confidence
+        self.input_size = input_size
+
+    def _detect_scaled(self, image: np.ndarray) -> List[Sequence[float]]:
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        image_h, image_w = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(image, 1.0, self.input_size, (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+        boxes = []
+        for detection in detections:
+            if detection[2] < self.confidence:
+                continue
+            x0, y0, x1, y1 = detection[3:7] * np.array([image_w, image_h, image_w, image_h])
+            boxes.append((x0, y0, x1 - x0, y1 - y0))
+        return boxes
+
+
+class MediaPipeFaceDetector(FaceDetector):
+    """MediaPipe face detection (BlazeFace). model_selection 0: short range, 1: full range."""
+
+    name = "mediapipe"
+
+    def __init__(
+        self, model_selection: int = 0, min_detection_confidence: float = 0.5, downscale: float = 1.0
+    ):
+        super().__init__(downscale)
+        import mediapipe as mp
+
+        self.detector = mp.solutions.face_detection.FaceDetection(
+            model_selection=model_selection,
+            min_detection_confidence=min_detection_confidence,
+        )
+
+    def _detect_scaled(self, image: np.ndarray) -> List[Sequence[float]]:
+        conversion = cv2.COLOR_GRAY2RGB if image.ndim == 2 else cv2.COLOR_BGR2RGB
+        image_h, image_w = image.shape[:2]
+        results = self.detector.process(cv2.cvtColor(image, conversion))
+        if not results.detections:
+            return []
+        boxes = []
+        for detection in results.detections:
+            bbox = detection.location_data.relative_bounding_box
+            boxes.append(
+                (bbox.xmin * image_w, bbox.ymin * image_h, bbox.width * image_w, bbox.height * image_h)
+            )
+        return boxes
+
+    def close(self):
+        self.detector.close()
+
+
+FACE_DETECTOR_BACKENDS: Dict[str, Type[FaceDetector]] = {
+    HaarFaceDetector.name: HaarFaceDetector,
+    YuNetFaceDetector.name: YuNetFaceDetector,
+    DnnFaceDetector.name: DnnFaceDetector,
+    MediaPipeFaceDetector.name: MediaPipeFaceDetector,
+}
+
+
+def create_face_detector(backend: str = "haar", **options) -> FaceDetector:
+    """
+    Creates a detector by backend name ("haar", "yunet", "dnn", "mediapipe").
+    `options` are passed to the backend's constructor.
+    """
+    if backend not in FACE_DETECTOR_BACKENDS:
+        raise ValueError(
+            f"Unknown face detector backend '{backend}', expected one of {list(FACE_DETECTOR_BACKENDS)}"
+        )
+    return FACE_DETECTOR_BACKENDS[backend](**options)
@@ -0,0 +1,71 @@
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Box = Tuple[int, int, int, int]
+
+
+def prepare_detection_frame(
+    frame: np.ndarray, downscale: float = 1.0, grayscale: bool = False
+) -> Tuple[np.ndarray, Tuple[float, float]]:
+    """
+    Converts a full-resolution BGR frame into the image a detector runs on.
+    The frame is converted to grayscale first (when requested) so the resize only touches
+    one channel, then shrunk by `downscale` with INTER_AREA. Detection cost of a sliding
+    window detector drops roughly with downscale ** 2.
+    Returns the small image and the (scale_x, scale_y) factors that map its coordinates
+    back to the full frame; they are computed from the real sizes so rounding is exact.
+    """
+    if grayscale and frame.ndim == 3:
+        frame_small = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    else:
+        frame_small = frame
+    frame_h, frame_w = frame.shape[:2]
+    if downscale <= 1.0:
+        return frame_small, (1.0, 1.0)
+    small_w = max(1, int(round(frame_w / downscale)))
+    small_h = max(1, int(round(frame_h / downscale)))
+    frame_small = cv2.resize(frame_small, (small_w, small_h), interpolation=cv2.INTER_AREA)
+    return frame_small, (frame_w / small_w, frame_h / small_h)
+
+
+def map_box_to_full_resolution(
+    box: Sequence[float], scale: Tuple[float, float], frame_w: int, frame_h: int
+) -> Optional[Box]:
+    """
+    Maps an (x, y, w, h) box found on the downscaled image back to full-resolution pixels,
+    clipped to the frame. Returns None when nothing of the box is left inside the frame.
+    """
+    scale_x, scale_y = scale
+    x, y, w, h = (float(v) for v in box[:4])
+    x0 = max(0, int(np.floor(x * scale_x)))
+    y0 = max(0, int(np.floor(y * scale_y)))
+    x1 = min(frame_w, int(np.ceil((x + w) * scale_x)))
+    y1 = min(frame_h, int(np.ceil((y + h) * scale_y)))
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def map_boxes_to_full_resolution(
+    boxes: Iterable[Sequence[float]], scale: Tuple[float, float], frame_w: int, frame_h: int
+) -> List[Box]:
+    """Maps boxes back to the full frame and sorts them largest face first."""
+    mapped = (map_box_to_full_resolution(box, scale, frame_w, frame_h) for box in boxes)
+    return sorted(
+        (box for box in mapped if box is not None), key=lambda b: b[2] * b[3], reverse=True
+    )
+
+
+def crop_face(frame: np.ndarray, box: Box, padding: float = 0.0) -> np.ndarray:
+    """
+    Crops a full-resolution face ROI, optionally grown by `padding` (fraction of the box
+    size on every side) so alignment has some context around the face.
+    """
+    x, y, w, h = box
+    pad_x, pad_y = int(w * padding), int(h * padding)
+    frame_h, frame_w = frame.shape[:2]
+    x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+    x1, y1 = min(frame_w, x + w + pad_x), min(frame_h, y + h + pad_y)
+    return frame[y0:y1, x0:x1]
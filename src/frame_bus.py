@@ -0,0 +1,310 @@
+"""
+Shared-memory frame bus: one process captures, any number of processes read.
+
+The publisher owns a shared-memory block holding a small header, a slot table and a
+ring of `slots` frame buffers. Frames are decoded straight into the next ring slot
+(one decode for all consumers), then the slot's sequence number is published.
+Subscribers attach by name, map the same memory and read the newest frame, either as a
+checked copy or as a zero-copy view that stays valid until the ring wraps around
+(about (slots - 1) / fps seconds).
+
+Run the capture service once, then point the apps at it via FRAME_SOURCE:
+    python -m src.frame_bus --source 0 --name phq_camera0
+    FRAME_SOURCE=bus:phq_camera0 py main.py
+    FRAME_SOURCE=bus:phq_camera0 py camera_concurrent.py
+"""
+
+import argparse
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .frame_source import FrameSource, open_frame_source
+
+MAGIC = 0x46425553  # "FBUS"
+VERSION = 1
+DEFAULT_BUS_NAME = "phq_camera0"
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "<u4"),
+        ("version", "<u4"),
+        ("width", "<u4"),
+        ("height", "<u4"),
+        ("channels", "<u4"),
+        ("slots", "<u4"),
+        ("latest", "<i8"),
+        ("closed", "<u4"),
+        ("fps", "<f4"),
+    ]
+)
+SLOT_DTYPE = np.dtype([("sequence", "<i8"), ("timestamp", "<f8")])
+WRITING = -1
+_ATTACH_LOCK = threading.Lock()
+
+
+def _align(offset: int, alignment: int = 64) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def _layout(width: int, height: int, channels: int, slots: int):
+    slot_table_offset = _align(HEADER_DTYPE.itemsize)
+    frames_offset = _align(slot_table_offset + SLOT_DTYPE.itemsize * slots)
+    frame_size = width * height * channels
+    return slot_table_offset, frames_offset, frames_offset + frame_size * slots
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attaches without registering the block with the resource tracker, so a subscriber
+    exiting does not unlink (or unregister) the publisher's memory."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 always registers; skip it for this call
+        from multiprocessing import resource_tracker
+
+        # Unregistering after a normal attach is not an option: the tracker keeps one entry
+        # per name and is shared by the whole process tree (e.g. analysis pool workers), so
+        # it would also drop the publisher's own registration. Only the registration made
+        # by this thread is skipped; the lock keeps overlapping attaches (frame sources are
+        # opened in executor threads) from saving each other's filter as the original.
+        with _ATTACH_LOCK:
+            register = resource_tracker.register
+            attaching = threading.get_ident()
+
+            def register_unless_attaching(key, rtype):
+                if rtype != "shared_memory" or threading.get_ident() != attaching:
+                    register(key, rtype)
+
+            resource_tracker.register = register_unless_attaching
+            try:
+                return shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+
+
+class _FrameRing:
+    """Numpy views over a frame-bus shared-memory block."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, header=None):
+        self.shm = shm
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf, offset=0)
+        if header is not None:
+            self.header[()] = header
+        if self.header["magic"] != MAGIC or self.header["version"] != VERSION:
+            raise ValueError(f"Shared memory '{shm.name}' is not a frame bus (version {VERSION})")
+        self.width = int(self.header["width"])
+        self.height = int(self.header["height"])
+        self.channels = int(self.header["channels"])
+        self.slots = int(self.header["slots"])
+        slot_table_offset, frames_offset, _ = _layout(self.width, self.height, self.channels, self.slots)
+        self.slot_table = np.ndarray((self.slots,), dtype=SLOT_DTYPE, buffer=shm.buf, offset=slot_table_offset)
+        self.frames = np.ndarray(
+            (self.slots, self.height, self.width, self.channels),
+            dtype=np.uint8,
+            buffer=shm.buf,
+            offset=frames_offset,
+        )
+
+    def release(self):
+        # Drop the views before closing, otherwise the mmap cannot be closed
+        self.header = self.slot_table = self.frames = None
+        self.shm.close()
+
+
+class FrameBusPublisher:
+    """
+    Creates the shared-memory ring and publishes frames into it.
+    Use begin_write()/commit() to decode straight into shared memory, or publish(frame).
+    Attributes:
+        name (str): Shared-memory name subscribers attach to.
+        sequence (int): Sequence number of the last published frame (0: none yet).
+    """
+
+    def __init__(
+        self, name: str, width: int, height: int, channels: int = 3, slots: int = 4, fps: float = 30.0
+    ):
+        if slots < 2:
+            raise ValueError("A frame bus needs at least 2 slots")
+        self.name = name
+        _, _, size = _layout(width, height, channels, slots)
+        self.__shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.zeros((), dtype=HEADER_DTYPE)
+        header["magic"], header["version"] = MAGIC, VERSION
+        header["width"], header["height"], header["channels"] = width, height, channels
+        header["slots"], header["fps"] = slots, fps
+        self.__ring = _FrameRing(self.__shm, header)
+        self.__ring.slot_table["sequence"] = 0
+        self.sequence = 0
+
+    @property
+    def frame_shape(self) -> Tuple[int, int, int]:
+        return self.__ring.height, self.__ring.width, self.__ring.channels
+
+    def begin_write(self) -> Tuple[int, np.ndarray]:
+        """Returns (sequence, slot view) for the next frame; the slot is marked as being written."""
+        sequence = self.sequence + 1
+        slot = sequence % self.__ring.slots
+        self.__ring.slot_table["sequence"][slot] = WRITING
+        return sequence, self.__ring.frames[slot]
+
+    def commit(self, sequence: int, timestamp: Optional[float] = None):
+        slot = sequence % self.__ring.slots
+        self.__ring.slot_table["timestamp"][slot] = timestamp if timestamp is not None else time.time()
+        self.__ring.slot_table["sequence"][slot] = sequence
+        self.__ring.header["latest"] = sequence
+        self.sequence = sequence
+
+    def publish(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        if frame.shape != self.frame_shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match the bus {self.frame_shape}")
+        sequence, buffer = self.begin_write()
+        np.copyto(buffer, frame)
+        self.commit(sequence, timestamp)
+        return sequence
+
+    def close(self, unlink: bool = True):
+        if self.__ring is None:
+            return
+        self.__ring.header["closed"] = 1
+        self.__ring.release()
+        self.__ring = None
+        if unlink:
+            self.__shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FrameBusSource(FrameSource):
+    """
+    Subscribes to a frame bus. read() waits for a frame newer than the last one returned
+    and copies it out, retrying if the publisher overwrote the slot mid-copy. With
+    copy=False, read() returns a zero-copy view into shared memory instead; check
+    is_current(sequence) after using it if the consumer can fall behind by a whole ring.
+    Attributes:
+        name (str): Shared-memory name of the bus.
+        timeout (float): Seconds read() waits for a new frame before giving up.
+        copy (bool): Return copies (default) or zero-copy views.
+        last_sequence (int): Sequence number of the last frame returned.
+        last_timestamp (float): Capture time of the last frame returned.
+    """
+
+    def __init__(self, name: str = DEFAULT_BUS_NAME, timeout: float = 2.0, copy: bool = True, **options):
+        self.name = name
+        self.timeout = timeout
+        self.copy = copy
+        self.last_sequence = 0
+        self.last_timestamp = None
+        try:
+            self.__ring = _FrameRing(_attach_shared_memory(name))
+        except (FileNotFoundError, ValueError) as e:
+            print(f"Could not attach to frame bus '{name}': {e}")
+            self.__ring = None
+        fps = float(self.__ring.header["fps"]) if self.__ring is not None else 30.0
+        super().__init__(fps=fps, realtime=False, **options)
+        self._opened = self.__ring is not None
+
+    def isOpened(self) -> bool:
+        return self._opened and self.__ring is not None and not self.__ring.header["closed"]
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.isOpened():
+            return False, None
+        if self.max_frames is not None and self.frames_read >= self.max_frames:
+            self._opened = False
+            return False, None
+        deadline = time.monotonic() + self.timeout
+        while True:
+            sequence = int(self.__ring.header["latest"])
+            if sequence > self.last_sequence:
+                frame = self.__take(sequence, image)
+                if frame is not None:
+                    self.frames_read += 1
+                    return True, frame
+            if self.__ring.header["closed"] or time.monotonic() > deadline:
+                return False, None
+            time.sleep(0.001)
+
+    def __take(self, sequence: int, image: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        slot = sequence % self.__ring.slots
+        source = self.__ring.frames[slot]
+        if self.copy:
+            if image is None or image.shape != source.shape or image.dtype != source.dtype:
+                image = np.empty_like(source)
+            np.copyto(image, source)
+            frame = image
+        else:
+            frame = source
+        timestamp = float(self.__ring.slot_table["timestamp"][slot])
+        if self.__ring.slot_table["sequence"][slot] != sequence:
+            return None  # Overwritten while reading; take the newer frame instead
+        self.last_sequence = sequence
+        self.last_timestamp = timestamp
+        return frame
+
+    def is_current(self, sequence: Optional[int] = None) -> bool:
+        """True if the slot of `sequence` (default: last frame returned) still holds that frame."""
+        sequence = self.last_sequence if sequence is None else sequence
+        if self.__ring is None or sequence <= 0:
+            return False
+        return int(self.__ring.slot_table["sequence"][sequence % self.__ring.slots]) == sequence
+
+    def frame(self, sequence: int) -> Optional[np.ndarray]:
+        """Zero-copy view of frame `sequence`, or None if its slot has been reused."""
+        if not self.is_current(sequence):
+            return None
+        return self.__ring.frames[sequence % self.__ring.slots]
+
+    def release(self):
+        super().release()
+        if self.__ring is not None:
+            self.__ring.release()
+            self.__ring = None
+
+
+def run_capture_service(source_spec, name: str = DEFAULT_BUS_NAME, slots: int = 4):
+    """Captures from `source_spec` and publishes every frame on the bus until interrupted."""
+    source = open_frame_source(source_spec)
+    ret, frame = source.read()
+    if not ret:
+        print(f"Could not read from frame source '{source_spec}'.")
+        source.release()
+        return
+    height, width, channels = frame.shape
+    publisher = FrameBusPublisher(name, width, height, channels, slots=slots, fps=source.fps)
+    print(f"Publishing {width}x{height} frames on frame bus '{name}' ({slots} slots). Ctrl+C to stop.")
+    try:
+        publisher.publish(frame)
+        while source.isOpened():
+            sequence, buffer = publisher.begin_write()
+            # Decode straight into shared memory when the source supports it
+            ret, frame = source.read(buffer)
+            if not ret:
+                break
+            if not np.shares_memory(frame, buffer):
+                np.copyto(buffer, frame)
+            publisher.commit(sequence)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.release()
+        publisher.close()
+        print(f"Frame bus '{name}' closed after {publisher.sequence} frames.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish one camera to several apps over shared memory.")
+    parser.add_argument("--source", type=str, default="0", help="Frame source spec (see src/frame_source.py).")
+    parser.add_argument("--name", type=str, default=DEFAULT_BUS_NAME, help="Shared-memory name of the bus.")
+    parser.add_argument("--slots", type=int, default=4, help="Frames kept in the ring buffer.")
+    args = parser.parse_args()
+    run_capture_service(args.source, args.name, args.slots)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+import os
+import time
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl
+
+import cv2
+import numpy as np
+
+FRAME_SOURCE_ENV = "FRAME_SOURCE"
+FRAME_SOURCES_ENV = "FRAME_SOURCES"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class FrameSource:
+    """
+    Base class for frame sources. Mirrors the part of cv2.VideoCapture the pipelines use
+    (isOpened, read, release), so a source can replace a webcam without other changes.
+    Replay sources deliver frames either in real time (paced to `fps`; frames are dropped
+    when the reader falls behind, like a live camera) or as fast as they are read, and
+    report isOpened() == False once they run out of frames.
+    Attributes:
+        fps (float): Nominal frame rate of the source.
+        realtime (bool): Pace reads to `fps` instead of returning frames immediately.
+        loop (bool): Start over at the end of the recording.
+        max_frames (Optional[int]): Stop after this many frames (None: no limit).
+        frames_read (int): Frames returned by read() so far.
+    """
+
+    def __init__(
+        self,
+        fps: float = 30.0,
+        realtime: bool = True,
+        loop: bool = False,
+        max_frames: Optional[int] = None,
+    ):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.realtime = realtime
+        self.loop = loop
+        self.max_frames = max_frames
+        self.frames_read = 0
+        self._position = 0
+        self._start = None
+        self._opened = True
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self._opened:
+            return False, None
+        if self.max_frames is not None and self.frames_read >= self.max_frames:
+            self._opened = False
+            return False, None
+        if self.realtime:
+            self._pace()
+        frame = self._read_next(image)
+        if frame is None and self.loop and self._rewind():
+            frame = self._read_next(image)
+        if frame is None:
+            self._opened = False
+            return False, None
+        self._position += 1
+        self.frames_read += 1
+        return True, frame
+
+    def release(self):
+        self._opened = False
+
+    def _pace(self):
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now - self._position / self.fps
+        due = (now - self._start) * self.fps
+        if due < self._position:
+            time.sleep((self._position - due) / self.fps)
+            return
+        behind = int(due) - self._position
+        if behind > 0:
+            self._skip(behind)
+            self._position += behind
+
+    def _read_next(self, image: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def _skip(self, count: int):
+        for _ in range(count):
+            if self._read_next(None) is None:
+                return
+
+    def _rewind(self) -> bool:
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+# Camera spec options and the capture properties they set
+CAMERA_PROPERTIES = {
+    "width": cv2.CAP_PROP_FRAME_WIDTH,
+    "height": cv2.CAP_PROP_FRAME_HEIGHT,
+    "fps": cv2.CAP_PROP_FPS,
+}
+
+
+class CameraSource(FrameSource):
+    """
+    A live webcam (cv2.VideoCapture on a device index); pacing is left to the device.
+    `width`, `height` and `fps` are requested from the driver, which may pick the closest
+    mode it supports; `fps` reports what the device actually runs at.
+    """
+
+    def __init__(
+        self,
+        index: int = 0,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        fps: Optional[float] = None,
+    ):
+        self.cap = cv2.VideoCapture(index)
+        requested = {"width": width, "height": height, "fps": fps}
+        for name, value in requested.items():
+            if value is not None and self.cap.isOpened() and not self.cap.set(CAMERA_PROPERTIES[name], value):
+                print(f"Camera {index}: could not set {name}={value}")
+        super().__init__(fps=self.cap.get(cv2.CAP_PROP_FPS), realtime=False)
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        ret, frame = self.cap.read(image)
+        if ret:
+            self.frames_read += 1
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    """Replays a recorded video file at its own frame rate (or `fps` if given)."""
+
+    def __init__(self, path: str, fps: Optional[float] = None, **options):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(fps=fps or self.cap.get(cv2.CAP_PROP_FPS), **options)
+
+    def isOpened(self) -> bool:
+        return self._opened and self.cap.isOpened()
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+    def _read_next(self, image):
+        ret, frame = self.cap.read(image)
+        return frame if ret else None
+
+    def _skip(self, count):
+        for _ in range(count):
+            if not self.cap.grab():
+                return
+
+    def _rewind(self):
+        return self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+
+class ImageDirectorySource(FrameSource):
+    """Replays the images of a directory in file-name order as a video at `fps`."""
+
+    def __init__(self, directory: str, fps: float = 30.0, **options):
+        self.directory = directory
+        self.paths = sorted(
+            os.path.join(directory, f)
+            for f in (os.listdir(directory) if os.path.isdir(directory) else [])
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.__index = 0
+        super().__init__(fps=fps, **options)
+        self._opened = bool(self.paths)
+
+    def _read_next(self, image):
+        while self.__index < len(self.paths):
+            frame = cv2.imread(self.paths[self.__index])
+            self.__index += 1
+            if frame is not None:
+                return frame
+        return None
+
+    def _skip(self, count):
+        self.__index = min(len(self.paths), self.__index + count)
+
+    def _rewind(self):
+        self.__index = 0
+        return bool(self.paths)
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generates frames with a moving, face-like pattern (head, eyes, mouth) on a gradient
+    background. Deterministic for a given `seed`, so runs are comparable in CI.
+    """
+
+    def __init__(
+        self,
+        width: int = 640,
+        height: int = 480,
+        fps: float = 30.0,
+        num_frames: Optional[int] = None,
+        seed: int = 0,
+        **options,
+    ):
+        super().__init__(fps=fps, **options)
+        self.width = width
+        self.height = height
+        self.num_frames = num_frames
+        self.__index = 0
+        rng = np.random.default_rng(seed)
+        self.__phase = rng.uniform(0, 2 * np.pi, size=3)
+        gradient = np.linspace(60, 180, width, dtype=np.float32)[None, :, None]
+        tint = np.array([1.0, 0.9, 0.8], dtype=np.float32)
+        self.__background = np.ascontiguousarray(
+            np.broadcast_to(gradient * tint, (height, width, 3)), dtype=np.uint8
+        )
+
+    def _read_next(self, image):
+        if self.num_frames is not None and self.__index >= self.num_frames:
+            return None
+        if image is None or image.shape != self.__background.shape:
+            image = np.empty(self.__background.shape, dtype=np.uint8)
+        np.copyto(image, self.__background)
+
+        t = self.__index / self.fps
+        face_h = int(self.height * 0.45)
+        face_w = int(face_h * 0.75)
+        cx = int(self.width / 2 + self.width * 0.2 * np.sin(0.5 * t + self.__phase[0]))
+        cy = int(self.height / 2 + self.height * 0.1 * np.sin(0.7 * t + self.__phase[1]))
+        cv2.ellipse(image, (cx, cy), (face_w // 2, face_h // 2), 0, 0, 360, (150, 180, 220), -1)
+        eye_dx, eye_y = face_w // 5, cy - face_h // 8
+        for ex in (cx - eye_dx, cx + eye_dx):
+            cv2.ellipse(image, (ex, eye_y), (face_w // 10, face_h // 20), 0, 0, 360, (40, 40, 40), -1)
+        mouth_open = int(face_h // 30 * (1.5 + np.sin(2 * t + self.__phase[2])))
+        cv2.ellipse(
+            image, (cx, cy + face_h // 4), (face_w // 5, max(1, mouth_open)), 0, 0, 360, (60, 60, 160), -1
+        )
+
+        self.__index += 1
+        return image
+
+    def _skip(self, count):
+        self.__index += count
+
+    def _rewind(self):
+        self.__index = 0
+        return True
+
+
+FRAME_SOURCE_KINDS = {
+    "camera": CameraSource,
+    "video": VideoFileSource,
+    "images": ImageDirectorySource,
+    "synthetic": SyntheticSource,
+    "bus": None,  # src.frame_bus.FrameBusSource, imported on use
+}
+_INT_OPTIONS = ("max_frames", "num_frames", "width", "height", "seed")
+_BOOL_OPTIONS = ("realtime", "loop", "copy")
+_FLOAT_OPTIONS = ("fps", "timeout")
+
+
+def _parse_options(query: str) -> Dict[str, Union[int, float, bool]]:
+    options = {}
+    for key, value in parse_qsl(query):
+        if key in _BOOL_OPTIONS:
+            options[key] = value.lower() in ("1", "true", "yes")
+        elif key in _INT_OPTIONS:
+            options[key] = int(value)
+        elif key in _FLOAT_OPTIONS:
+            options[key] = float(value)
+        else:
+            raise ValueError(f"Unknown frame source option '{key}'")
+    return options
+
+
+def open_frame_source(spec: Union[None, int, str, FrameSource] = None) -> FrameSource:
+    """
+    Opens a frame source from a spec of the form "[kind:]target[?option=value&...]":
+        0, "camera:1"                       webcam device index
+        "camera:0?width=1280&height=720"    webcam with a requested capture mode
+        "video:clip.mp4?realtime=0&loop=1"  recorded video
+        "images:frames/?fps=15"             image directory
+        "synthetic?num_frames=300&realtime=0"
+        "bus:phq_camera0?timeout=2"         shared camera published by src/frame_bus.py
+    A bare path is opened as a video file or image directory. Options: width, height, fps
+    (camera); realtime, loop, fps, max_frames (all replay sources); width, height,
+    num_frames, seed (synthetic); timeout, copy, max_frames (bus).
+    Without a spec the FRAME_SOURCE environment variable is used, then webcam 0.
+    FrameSource instances are returned unchanged.
+    """
+    if isinstance(spec, FrameSource):
+        return spec
+    if spec is None:
+        spec = os.environ.get(FRAME_SOURCE_ENV, "0")
+    if isinstance(spec, int):
+        return CameraSource(spec)
+
+    head, _, query = str(spec).partition("?")
+    kind, sep, target = head.partition(":")
+    if not sep or kind not in FRAME_SOURCE_KINDS:
+        # No (known) kind prefix, e.g. "0", "clip.mp4" or a Windows path like "C:\\clip.mp4"
+        target = head
+        if target.isdigit():
+            kind = "camera"
+        elif target == "synthetic":
+            kind = "synthetic"
+        elif os.path.isdir(target):
+            kind = "images"
+        else:
+            kind = "video"
+
+    options = _parse_options(query)
+    if kind == "camera":
+        unsupported = sorted(set(options) - set(CAMERA_PROPERTIES))
+        if unsupported:
+            raise ValueError(f"Camera sources do not support option(s): {', '.join(unsupported)}")
+        return CameraSource(int(target or 0), **options)
+    if kind == "synthetic":
+        return SyntheticSource(**options)
+    if kind == "bus":
+        from .frame_bus import DEFAULT_BUS_NAME, FrameBusSource
+
+        return FrameBusSource(target or DEFAULT_BUS_NAME, **options)
+    return FRAME_SOURCE_KINDS[kind](target, **options)
+
+
+def frame_source_specs(specs: Optional[List[Union[int, str, FrameSource]]] = None) -> List:
+    """
+    Frame sources of a multi-camera setup: `specs` if given, else the ";"-separated
+    FRAME_SOURCES environment variable (e.g. "0;1;bus:phq_camera2"), else a single
+    default source (None: FRAME_SOURCE, then webcam 0).
+    """
+    if specs:
+        return list(specs)
+    env = os.environ.get(FRAME_SOURCES_ENV, "")
+    specs = [spec.strip() for spec in env.split(";") if spec.strip()]
+    return specs or [None]
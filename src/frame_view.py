@@ -0,0 +1,64 @@
+from typing import Optional
+
+import numpy as np
+from PyQt6.QtCore import QRectF, QSize, Qt
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtWidgets import QSizePolicy, QWidget
+
+
+class FrameView(QWidget):
+    """
+    Displays OpenCV BGR frames without per-frame conversion or scaling in Python.
+    set_frame() wraps the numpy buffer as a Format_BGR888 QImage (no cvtColor, no copy)
+    and schedules a repaint; paintEvent() lets QPainter scale it into the widget,
+    keeping the aspect ratio. The wrapped array is referenced, not copied, until the
+    next set_frame(), and may be painted at any time until then: callers must not write
+    into the buffer currently passed to set_frame(). The camera apps read into two
+    alternating buffers (the executor fills one while the other is displayed) and draw
+    overlays on a buffer before handing it over.
+    Attributes:
+        smooth (bool): Use bilinear filtering when scaling (nearest neighbour otherwise).
+    """
+
+    def __init__(self, parent: Optional[QWidget] = None, smooth: bool = True):
+        super().__init__(parent)
+        self.smooth = smooth
+        self.__frame = None
+        self.__image = None
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+
+    def set_frame(self, frame: np.ndarray):
+        if frame.ndim != 3 or frame.shape[2] != 3 or frame.dtype != np.uint8:
+            raise ValueError(f"Expected an HxWx3 uint8 BGR frame, got {frame.shape} {frame.dtype}")
+        if not frame.flags["C_CONTIGUOUS"]:
+            frame = np.ascontiguousarray(frame)
+        self.__frame = frame
+        self.__image = QImage(
+            frame.data, frame.shape[1], frame.shape[0], frame.strides[0], QImage.Format.Format_BGR888
+        )
+        self.update()
+
+    def clear(self):
+        self.__frame = None
+        self.__image = None
+        self.update()
+
+    def sizeHint(self) -> QSize:
+        if self.__image is not None:
+            return self.__image.size()
+        return QSize(640, 480)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.GlobalColor.black)
+        if self.__image is not None:
+            image_w, image_h = self.__image.width(), self.__image.height()
+            scale = min(self.width() / image_w, self.height() / image_h)
+            target_w, target_h = image_w * scale, image_h * scale
+            target = QRectF(
+                (self.width() - target_w) / 2, (self.height() - target_h) / 2, target_w, target_h
+            )
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, self.smooth)
+            painter.drawImage(target, self.__image)
+        painter.end()
@@ -0,0 +1,72 @@
+import threading
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LatencyHistogram:
+    """
+    A thread-safe latency recorder.
+    Keeps the most recent samples for percentiles and cumulative bucket counts
+    for a histogram over the whole lifetime.
+    Attributes:
+        max_samples (int): Number of recent samples kept for percentiles.
+        bucket_bounds_ms (Sequence[float]): Upper bounds of the histogram buckets, in milliseconds.
+    """
+
+    def __init__(
+        self,
+        max_samples: int = 1000,
+        bucket_bounds_ms: Sequence[float] = DEFAULT_BUCKET_BOUNDS_MS,
+    ):
+        self.max_samples = max_samples
+        self.bucket_bounds_ms = tuple(bucket_bounds_ms)
+        self.__samples = deque(maxlen=max_samples)
+        self.__bucket_counts = [0] * (len(self.bucket_bounds_ms) + 1)
+        self.__count = 0
+        self.__total_ms = 0.0
+        self.__lock = threading.Lock()
+
+    def record(self, seconds: float):
+        ms = seconds * 1000.0
+        bucket = bisect_left(self.bucket_bounds_ms, ms)
+        with self.__lock:
+            self.__samples.append(ms)
+            self.__bucket_counts[bucket] += 1
+            self.__count += 1
+            self.__total_ms += ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self.__lock:
+            samples = list(self.__samples)
+        return float(np.percentile(samples, q)) if samples else None
+
+    def summary(self) -> Dict[str, Any]:
+        with self.__lock:
+            samples = np.array(self.__samples, dtype=np.float64)
+            count = self.__count
+            total_ms = self.__total_ms
+            bucket_counts = list(self.__bucket_counts)
+        labels = [f"<={bound}ms" for bound in self.bucket_bounds_ms] + [
+            f">{self.bucket_bounds_ms[-1]}ms"
+        ]
+        summary = {
+            "count": count,
+            "mean_ms": total_ms / count if count else None,
+            "buckets": dict(zip(labels, bucket_counts)),
+        }
+        if samples.size:
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            summary.update(
+                {
+                    "p50_ms": float(p50),
+                    "p95_ms": float(p95),
+                    "p99_ms": float(p99),
+                    "max_ms": float(samples.max()),
+                }
+            )
+        return summary
@@ -43,8 +43,9 @@ class LoggingHandler:
         action_type: Literal["active", "passive"],
         event_type: str,
         details: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[datetime] = None,
     ):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        timestamp = (timestamp or datetime.now()).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
         log_entry = {
             "timestamp": timestamp,
             "action_type": action_type,
@@ -116,15 +117,24 @@ class OpenQuestionLogging(LoggingHandler):
 
 
 class EmotionLogging(LoggingHandler):
-    def __init__(self, timestamp: Optional[str] = None):
-        super().__init__(taskname="emotion", timestamp=timestamp)
-
-    def add_label(self, label: str, confidence: float):
+    def __init__(self, timestamp: Optional[str] = None, camera_id: Optional[str] = None):
+        # One log file per camera in multi-camera sessions, e.g. emotion_cam1_log_<timestamp>.json
+        taskname = "emotion" if camera_id is None else f"emotion_{camera_id}"
+        super().__init__(taskname=taskname, timestamp=timestamp)
+        self.camera_id = camera_id
+
+    def add_label(
+        self, label: str, confidence: float, timestamp: Optional[datetime] = None
+    ):
+        details = {
+            "label": label,
+            "confidence": round(confidence, 4),
+        }
+        if self.camera_id is not None:
+            details["camera_id"] = self.camera_id
         self.write_log_event(
             action_type="passive",
             event_type="emotion_detected",
-            details={
-                "label": label,
-                "confidence": round(confidence, 4),
-            },
+            details=details,
+            timestamp=timestamp,
         )
@@ -1,8 +1,37 @@
 import os
+import threading
+import time
 import cv2
 import numpy as np
-import onnxruntime
-from typing import Optional
+from typing import Any, Dict, Optional
+from ..config import model as cfg
+from .latency import LatencyHistogram
+
+# File suffix of every model variant produced by tools/quantize_models.py
+MODEL_VARIANTS = {
+    "fp32": "",
+    "fp16": ".fp16",
+    "int8_dynamic": ".int8_dynamic",
+    "int8_static": ".int8_static",
+}
+
+
+def model_variant_path(model_path: str, variant: str = "fp32") -> str:
+    """
+    Returns the path of a quantized variant of `model_path`, e.g.
+    "model.onnx" -> "model.int8_static.onnx". Falls back to the FP32 model
+    when the variant is unknown or has not been generated.
+    """
+    if variant not in MODEL_VARIANTS:
+        print(f"Unknown model variant '{variant}', using fp32.")
+        return model_path
+    stem, ext = os.path.splitext(model_path)
+    path = f"{stem}{MODEL_VARIANTS[variant]}{ext}"
+    if not os.path.exists(path):
+        if variant != "fp32":
+            print(f"Model variant '{path}' not found, using '{model_path}'.")
+        return model_path
+    return path
 
 
 class ModelHandler:
@@ -11,16 +40,27 @@ class ModelHandler:
     This class is responsible for loading the model, preprocessing images,
     and making predictions.
     Attributes:
-        onnx_model_path (str): Path to the ONNX model file.
+        onnx_model_path (str): Path to the ONNX model file of the selected variant.
+        model_variant (str): Requested variant, one of MODEL_VARIANTS.
         class_labels (list): List of emotion class labels.
         input_size (tuple): Size of the input image for the model.
         ort_session (onnxruntime.InferenceSession): ONNX runtime session.
         input_name (str): Name of the input tensor for the model.
         output_name (str): Name of the output tensor for the model.
+        ready (threading.Event): Set once loading has finished (successfully or not).
+        warmup_runs (int): Number of dummy inferences run right after loading.
+        latency (Dict[str, LatencyHistogram]): Inference latencies; "cold" holds the
+            warm-up runs and "warm" holds the steady-state predictions.
     """
 
-    def __init__(self):
-        self.onnx_model_path = "model.onnx"
+    def __init__(
+        self,
+        load_in_background: bool = False,
+        warmup_runs: int = 3,
+        model_variant: Optional[str] = None,
+    ):
+        self.model_variant = model_variant if model_variant else cfg.EMOTION_MODEL_VARIANT
+        self.onnx_model_path = model_variant_path(cfg.EMOTION_MODEL_PATH, self.model_variant)
         self.class_labels = [
             "anger",
             "contempt",
@@ -37,9 +77,64 @@ class ModelHandler:
         self.ort_session = None
         self.input_name = None
         self.output_name = None
-        self._load_model()
+        self.ready = threading.Event()
+        self.warmup_runs = warmup_runs
+        self.load_time_ms = None
+        self.first_inference_ms = None
+        self.latency = {"cold": LatencyHistogram(), "warm": LatencyHistogram()}
+        if load_in_background:
+            # onnxruntime import and session creation happen off the UI thread
+            threading.Thread(target=self._load_model, daemon=True).start()
+        else:
+            self._load_model()
 
     def _load_model(self):
+        try:
+            start = time.perf_counter()
+            self._create_session()
+            self.load_time_ms = (time.perf_counter() - start) * 1000.0
+            self._warm_up()
+        finally:
+            self.ready.set()
+
+    def _warm_up(self):
+        """
+        Runs dummy inferences so one-off costs (memory arena growth, kernel
+        selection) are paid at load time instead of on the first real frame.
+        """
+        if self.ort_session is None or self.warmup_runs <= 0:
+            return
+
+        input_shape = [
+            dim if isinstance(dim, int) and dim > 0 else 1
+            for dim in self.ort_session.get_inputs()[0].shape
+        ]
+        if len(input_shape) != 4:
+            input_shape = [1, 3, *self.input_size]
+        dummy_input = np.zeros(input_shape, dtype=np.float32)
+        try:
+            for i in range(self.warmup_runs):
+                start = time.perf_counter()
+                self.ort_session.run([self.output_name], {self.input_name: dummy_input})
+                elapsed = time.perf_counter() - start
+                if i == 0:
+                    self.first_inference_ms = elapsed * 1000.0
+                self.latency["cold"].record(elapsed)
+            print(
+                f"Model warm-up done: {self.warmup_runs} runs, first inference {self.first_inference_ms:.1f} ms."
+            )
+        except Exception as e:
+            print(f"Error during model warm-up: {e}")
+
+    def get_latency_stats(self) -> Dict[str, Any]:
+        return {
+            "load_time_ms": self.load_time_ms,
+            "first_inference_ms": self.first_inference_ms,
+            "cold": self.latency["cold"].summary(),
+            "warm": self.latency["warm"].summary(),
+        }
+
+    def _create_session(self):
         if not os.path.exists(self.onnx_model_path):
             print(
                 f"ONNX Model Error: File not found at '{self.onnx_model_path}'. Inference will be disabled."
@@ -47,6 +142,8 @@ class ModelHandler:
             return
 
         try:
+            import onnxruntime
+
             self.ort_session = onnxruntime.InferenceSession(self.onnx_model_path)
             self.input_name = self.ort_session.get_inputs()[0].name
             self.output_name = self.ort_session.get_outputs()[0].name
@@ -78,7 +175,9 @@ class ModelHandler:
 
         try:
             ort_inputs = {self.input_name: preprocessed_frame}
+            start = time.perf_counter()
             ort_outs = self.ort_session.run([self.output_name], ort_inputs)
+            self.latency["warm"].record(time.perf_counter() - start)
             scores = ort_outs[0][0]
             predicted_index = np.argmax(scores)
             confidence = float(scores[predicted_index])
@@ -0,0 +1,179 @@
+import glob
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+POWER_SUPPLY_DIR = "/sys/class/power_supply"
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def read_battery(power_supply_dir: str = POWER_SUPPLY_DIR) -> Tuple[Optional[bool], Optional[float]]:
+    """
+    Returns (discharging, capacity percent) of the first battery under `power_supply_dir`,
+    or (None, None) where there is none (desktops, containers, other platforms).
+    """
+    for supply in sorted(glob.glob(os.path.join(power_supply_dir, "*"))):
+        if _read_text(os.path.join(supply, "type")) != "Battery":
+            continue
+        status = _read_text(os.path.join(supply, "status"))
+        capacity = _read_text(os.path.join(supply, "capacity"))
+        try:
+            capacity = float(capacity) if capacity is not None else None
+        except ValueError:
+            capacity = None
+        return (status == "Discharging" if status is not None else None), capacity
+    return None, None
+
+
+class CpuLoadProbe:
+    """
+    System-wide CPU load (0.0 idle to 1.0 saturated) since the previous call.
+    Reads /proc/stat; elsewhere falls back to the 1-minute load average per core.
+    """
+
+    def __init__(self, proc_stat_path: str = "/proc/stat"):
+        self.proc_stat_path = proc_stat_path
+        self.__last = self.__read_times()
+
+    def __read_times(self) -> Optional[Tuple[int, int]]:
+        line = _read_text(self.proc_stat_path)
+        if not line or not line.startswith("cpu "):
+            return None
+        fields = [int(value) for value in line.splitlines()[0].split()[1:]]
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+        return sum(fields), idle
+
+    def load(self) -> Optional[float]:
+        times = self.__read_times()
+        if times is not None and self.__last is not None:
+            total = times[0] - self.__last[0]
+            idle = times[1] - self.__last[1]
+            self.__last = times
+            if total > 0:
+                return min(1.0, max(0.0, 1.0 - idle / total))
+            return None
+        try:
+            return min(1.0, os.getloadavg()[0] / (os.cpu_count() or 1))
+        except (AttributeError, OSError):
+            return None
+
+
+class RateController:
+    """
+    Adapts the interval of a periodic stage (detection, classification, capture) to the
+    machine it runs on. Callers report the stage's latency with observe() and ask for
+    the current interval with update(), which re-evaluates at most every
+    `update_seconds`:
+        - CPU load above `cpu_high`, the stage taking more than `latency_budget` of its
+          interval, or a low battery lengthen the interval by `step`;
+        - CPU load below `cpu_low` with the stage well within budget on mains power
+          shortens it again.
+    While discharging, the interval never goes below the configured base interval.
+    Attributes:
+        name (str): Stage name used in log lines.
+        base_interval (float): Configured interval, the starting point.
+        min_interval (float): Shortest interval (highest rate) allowed.
+        max_interval (float): Longest interval (lowest rate) allowed.
+        interval (float): Current interval in seconds.
+        latency (Optional[float]): Smoothed latency of the stage in seconds.
+        cpu_load (Optional[float]): Last CPU load reading (0.0 - 1.0).
+        on_battery (Optional[bool]): Whether the last reading found a discharging battery.
+        battery_percent (Optional[float]): Last battery capacity reading.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_interval: float,
+        min_interval: float,
+        max_interval: float,
+        latency_budget: float = 0.5,
+        cpu_high: float = 0.85,
+        cpu_low: float = 0.5,
+        low_battery_percent: float = 20.0,
+        step: float = 1.25,
+        update_seconds: float = 2.0,
+        power_supply_dir: str = POWER_SUPPLY_DIR,
+    ):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError(f"Invalid interval bounds ({min_interval}, {max_interval}) for '{name}'")
+        self.name = name
+        self.base_interval = min(max(base_interval, min_interval), max_interval)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.latency_budget = latency_budget
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.low_battery_percent = low_battery_percent
+        self.step = step
+        self.update_seconds = update_seconds
+        self.power_supply_dir = power_supply_dir
+        self.interval = self.base_interval
+        self.latency = None
+        self.cpu_load = None
+        self.on_battery = None
+        self.battery_percent = None
+        self.__cpu = CpuLoadProbe()
+        self.__next_update = time.monotonic() + update_seconds
+        self.__lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        """Current rate in runs per second."""
+        return 1.0 / self.interval
+
+    def observe(self, seconds: float):
+        """Reports one run of the stage; may be called from any thread."""
+        with self.__lock:
+            self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+
+    def update(self) -> float:
+        """Returns the current interval, re-evaluating it when `update_seconds` have passed."""
+        now = time.monotonic()
+        if now < self.__next_update:
+            return self.interval
+        self.__next_update = now + self.update_seconds
+        self.cpu_load = self.__cpu.load()
+        self.on_battery, self.battery_percent = read_battery(self.power_supply_dir)
+        with self.__lock:
+            latency = self.latency
+
+        low_battery = (
+            self.on_battery
+            and self.battery_percent is not None
+            and self.battery_percent <= self.low_battery_percent
+        )
+        cpu_high = self.cpu_load is not None and self.cpu_load >= self.cpu_high
+        cpu_low = self.cpu_load is None or self.cpu_load <= self.cpu_low
+        over_budget = latency is not None and latency > self.latency_budget * self.interval
+        # Shortening the interval must not push the stage over budget right away
+        headroom = latency is None or latency * self.step <= 0.5 * self.latency_budget * self.interval
+        floor = max(self.min_interval, self.base_interval) if self.on_battery else self.min_interval
+
+        interval = self.interval
+        if cpu_high or over_budget or low_battery:
+            interval = self.interval * self.step
+        elif cpu_low and headroom and not self.on_battery:
+            interval = self.interval / self.step
+        interval = min(max(interval, floor), self.max_interval)
+        if interval != self.interval:
+            print(
+                f"Rate control '{self.name}': interval {self.interval:.2f}s -> {interval:.2f}s "
+                f"(cpu={self._format(self.cpu_load, 100, '%')}, "
+                f"latency={self._format(latency, 1000, 'ms')}, "
+                f"battery={self._format(self.battery_percent, 1, '%') if self.on_battery else 'mains'})"
+            )
+            self.interval = interval
+        return self.interval
+
+    @staticmethod
+    def _format(value: Optional[float], scale: float, unit: str) -> str:
+        return "n/a" if value is None else f"{value * scale:.0f}{unit}"
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, Optional, Tuple
+
+
+class FairScheduler:
+    """
+    Shares one inference budget across several cameras.
+    Cameras offer work with offer(); every camera keeps at most `max_queued` items (the
+    oldest is dropped, so a tight budget still serves recent frames). take() hands out
+    at most `budget_per_second` items per second across all cameras, always from the
+    waiting camera that was served least recently, so a busy camera cannot starve the
+    others. Consumers poll take() and sleep for wait_time() when it returns None.
+    Attributes:
+        budget_per_second (Optional[float]): Items per second for all cameras together
+            (None: no limit).
+        max_queued (int): Items kept per camera.
+        served (Dict[Hashable, int]): Items handed out per camera.
+        dropped (Dict[Hashable, int]): Items replaced before they were served, per camera.
+    """
+
+    def __init__(self, budget_per_second: Optional[float] = None, max_queued: int = 1):
+        self.budget_per_second = budget_per_second
+        self.max_queued = max_queued
+        self.served: Dict[Hashable, int] = {}
+        self.dropped: Dict[Hashable, int] = {}
+        self.__queues: Dict[Hashable, Deque[Any]] = {}
+        self.__last_served: Dict[Hashable, float] = {}
+        self.__next_slot = 0.0
+        self.__lock = threading.Lock()
+
+    def add_camera(self, camera_id: Hashable):
+        with self.__lock:
+            self.__queue(camera_id)
+
+    def offer(self, camera_id: Hashable, item: Any = None):
+        with self.__lock:
+            queue = self.__queue(camera_id)
+            if len(queue) == queue.maxlen:
+                self.dropped[camera_id] += 1
+            queue.append(item)
+
+    def pending(self, camera_id: Hashable) -> bool:
+        with self.__lock:
+            return bool(self.__queues.get(camera_id))
+
+    def wait_time(self) -> Optional[float]:
+        """Seconds until take() can return an item (0.0: now); None while nothing is queued."""
+        with self.__lock:
+            return self.__wait_time(time.monotonic())
+
+    def take(self) -> Optional[Tuple[Hashable, Any]]:
+        """Returns (camera_id, item) if the budget allows one now, else None."""
+        with self.__lock:
+            return self.__take(time.monotonic())
+
+    def __queue(self, camera_id: Hashable) -> Deque[Any]:
+        queue = self.__queues.get(camera_id)
+        if queue is None:
+            queue = self.__queues[camera_id] = deque(maxlen=self.max_queued)
+            self.served[camera_id] = 0
+            self.dropped[camera_id] = 0
+        return queue
+
+    def __wait_time(self, now: float) -> Optional[float]:
+        """Seconds until an item can be taken; None while nothing is queued."""
+        if not any(self.__queues.values()):
+            return None
+        if self.budget_per_second:
+            return max(0.0, self.__next_slot - now)
+        return 0.0
+
+    def __take(self, now: float) -> Optional[Tuple[Hashable, Any]]:
+        if self.__wait_time(now) != 0.0:
+            return None
+        # Least recently served first; cameras never served go first, in insertion order
+        camera_id = min(
+            (cid for cid, queue in self.__queues.items() if queue),
+            key=lambda cid: self.__last_served.get(cid, float("-inf")),
+        )
+        item = self.__queues[camera_id].popleft()
+        self.__last_served[camera_id] = now
+        self.served[camera_id] += 1
+        if self.budget_per_second:
+            # Catch up by at most one interval after an idle or late poll
+            interval = 1.0 / self.budget_per_second
+            self.__next_slot = max(self.__next_slot, now - interval) + interval
+        return camera_id, item
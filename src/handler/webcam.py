@@ -1,86 +1,257 @@
-import threading
+import asyncio
 import time
-import cv2
+from collections import deque
 from datetime import datetime
+from typing import List, Optional, Sequence, Tuple, Union
 from .model import ModelHandler
 from .logging import EmotionLogging
+from .rate_control import RateController
+from .scheduler import FairScheduler
+from ..frame_source import FrameSource, open_frame_source
+from ..metrics import METRICS
+from ..runtime import AsyncRuntime
+
+FrameSourceSpec = Union[None, int, str, FrameSource]
+
+
+class CameraStream:
+    """
+    Capture state of one camera.
+    Attributes:
+        camera_id (Optional[str]): Tag used in logs and metrics (None with a single camera).
+        frame_source: Webcam index, source spec or FrameSource to capture from.
+        logging_handler (EmotionLogging): Prediction log of this camera.
+        pending_frames (deque): Frames captured while the model is still loading,
+            predicted (with their capture timestamps) once the model is ready.
+        frames_captured (int): Frames read from the source.
+        last_label (Optional[str]): Most recent prediction of this camera.
+        last_confidence (Optional[float]): Confidence of `last_label`.
+    """
+
+    def __init__(self, camera_id: Optional[str], frame_source: FrameSourceSpec, max_pending_frames: int):
+        self.camera_id = camera_id
+        self.frame_source = frame_source
+        self.logging_handler = EmotionLogging(camera_id=camera_id)
+        self.pending_frames = deque(maxlen=max_pending_frames)
+        self.frames_captured = 0
+        self.last_label = None
+        self.last_confidence = None
+
+    @property
+    def name(self) -> str:
+        return "Webcam" if self.camera_id is None else f"Camera {self.camera_id}"
 
 
 class WebcamHandler:
     """
     Handles webcam capture and prediction using a model handler.
-    This class manages the webcam capture in a separate thread, allowing
-    for real-time predictions based on the captured frames.
+    Runs as asyncio tasks on an AsyncRuntime: one capture task per camera, one inference
+    task that takes frames from a FairScheduler (all cameras share one inference
+    budget and none can starve the others) and one logging task fed through a bounded
+    queue. Frames may be dropped when inference falls behind, predictions never are: a
+    full log queue makes inference wait, and predictions still queued at stop are
+    written before the logs are saved. Camera reads, model calls and log writes are
+    offloaded to the runtime's executor, and stop_capture() cancels the tasks instead
+    of joining threads.
     Attributes:
         model_handler (ModelHandler): An instance of ModelHandler to handle model operations.
-        logging_handler (EmotionLogging): An instance of EmotionLogging to log predictions.
+        cameras (List[CameraStream]): Capture state per camera.
+        scheduler (FairScheduler): Shares `inference_budget` predictions per second
+            across the cameras.
+        runtime (AsyncRuntime): Runs the tasks; its own background loop unless one is given.
         capture_active (bool): Flag indicating if the webcam capture is active.
-        capture_thread (threading.Thread): Thread for capturing webcam frames.
+        frame_source: Webcam index, source spec or FrameSource to capture from, or a list
+            of them for several cameras (see src/frame_source.py); None uses FRAME_SOURCE
+            or webcam 0.
+        capture_interval (float): Seconds between two captured frames of one camera.
+        rate_controller (Optional[RateController]): Adapts `capture_interval` (and the
+            default inference budget) to CPU load, prediction latency and battery state.
     """
 
-    def __init__(self, model_handler: ModelHandler):
+    def __init__(
+        self,
+        model_handler: ModelHandler,
+        max_pending_frames: int = 10,
+        frame_source: Union[FrameSourceSpec, Sequence[FrameSourceSpec]] = None,
+        capture_interval: float = 1.0,
+        camera_ids: Optional[Sequence[str]] = None,
+        inference_budget: Optional[float] = None,
+        runtime: Optional[AsyncRuntime] = None,
+        max_queued_logs: int = 100,
+        rate_controller: Optional[RateController] = None,
+    ):
         self.model_handler = model_handler
-        self.logging_handler = EmotionLogging()
+        self.frame_source = frame_source
+        self.capture_interval = capture_interval
+        sources = list(frame_source) if isinstance(frame_source, (list, tuple)) else [frame_source]
+        if camera_ids is None:
+            camera_ids = [None] if len(sources) == 1 else [f"cam{i}" for i in range(len(sources))]
+        if len(camera_ids) != len(sources):
+            raise ValueError(f"Got {len(camera_ids)} camera ids for {len(sources)} frame sources")
+        self.cameras: List[CameraStream] = [
+            CameraStream(camera_id, source, max_pending_frames)
+            for camera_id, source in zip(camera_ids, sources)
+        ]
+        self.rate_controller = rate_controller
+        if rate_controller is not None:
+            self.capture_interval = rate_controller.interval
+        # Default budget: every camera predicted once per capture interval
+        self.__adaptive_budget = inference_budget is None
+        self.scheduler = FairScheduler(inference_budget or len(self.cameras) / self.capture_interval)
+        self.runtime = runtime or AsyncRuntime(name="webcam")
+        self.max_queued_logs = max_queued_logs
         self.capture_active = False
-        self.capture_thread = None
+        self.__frame_offered = None
+        self.__log_queue = None
+        self.__inference_task = None
+        # Predictions made but not yet in the log queue; filled from the executor, so a
+        # prediction finishing while the inference task is cancelled is still logged
+        self.__unqueued_logs = deque()
+
+    @property
+    def logging_handler(self) -> EmotionLogging:
+        return self.cameras[0].logging_handler
 
     def start_capture(self):
-        if self.capture_thread is None:
-            self.capture_active = True
-            self.capture_thread = threading.Thread(
-                target=self._capture_loop, daemon=True
-            )
-            self.capture_thread.start()
-            print("Webcam capture thread started.")
+        if self.capture_active:
+            return
+        self.capture_active = True
+        self.runtime.spawn(self._run(), name="webcam")
 
     def stop_capture(self):
-        print("Attempting to stop webcam capture thread...")
+        print("Attempting to stop webcam capture tasks...")
         self.capture_active = False
-        if self.capture_thread and self.capture_thread.is_alive():
-            self.capture_thread.join(timeout=2.5)
-            if self.capture_thread.is_alive():
-                print("Webcam capture thread did not stop in time.")
-            else:
-                print("Webcam capture thread stopped.")
-        self.capture_thread = None
-
-    def _capture_loop(self):
+        self.runtime.stop()
+
+    async def _run(self):
+        # Loop-bound primitives are created on the runtime's loop
+        self.__frame_offered = asyncio.Event()
+        self.__log_queue = asyncio.Queue(maxsize=self.max_queued_logs)
+        for camera in self.cameras:
+            self.scheduler.add_camera(camera.camera_id)
+            self.runtime.spawn(self._capture_loop(camera), name=f"capture-{camera.camera_id}")
+            print(f"{camera.name} capture task started.")
+        self.__inference_task = self.runtime.spawn(self._inference_loop(), name="inference")
+        self.runtime.spawn(self._logging_loop(), name="emotion-log")
+
+    async def _capture_loop(self, camera: CameraStream):
+        METRICS.set_camera(camera.camera_id)  # Task-local; carried into executor calls
         cap = None
         try:
-            cap = cv2.VideoCapture(0)
+            cap = await self.runtime.run_blocking(open_frame_source, camera.frame_source)
             if not cap.isOpened():
-                print(f"{datetime.now()}: Error: Could not open webcam.")
-                self.capture_active = False
+                print(f"{datetime.now()}: Error: Could not open frame source of {camera.name}.")
                 return
-            print(f"{datetime.now()}: Webcam opened successfully.")
+            print(f"{datetime.now()}: {camera.name}: {type(cap).__name__} opened successfully.")
 
             while self.capture_active:
-                ret, frame = cap.read()
+                with METRICS.span("capture"):
+                    ret, frame = await self.runtime.run_blocking(cap.read)
                 if ret:
-                    if self.model_handler.ort_session:
-                        preprocessed_frame = self.model_handler.preprocess_image(
-                            frame.copy()
-                        )
-                        if preprocessed_frame is not None:
-                            predicted_label, confidence, _ = self.model_handler.predict(
-                                preprocessed_frame
-                            )
-                            if predicted_label is not None:
-                                self.logging_handler.add_label(
-                                    predicted_label, confidence
-                                )
-
-                # Small delay to reduce CPU usage
-                for _ in range(10):
-                    if not self.capture_active:
-                        break
-                    time.sleep(0.1)
+                    camera.frames_captured += 1
+                    if self.model_handler.ready.is_set():
+                        if self.model_handler.ort_session:
+                            self.scheduler.offer(camera.camera_id, (datetime.now(), frame))
+                            self.__frame_offered.set()
+                        else:
+                            camera.pending_frames.clear()
+                    else:
+                        camera.pending_frames.append((datetime.now(), frame))
+
+                elif not cap.isOpened():
+                    break  # Recording finished
+
+                await asyncio.sleep(self._next_interval())
         except Exception as e:
-            print(f"{datetime.now()}: Exception in webcam loop: {e}")
+            print(f"{datetime.now()}: Exception in {camera.name} loop: {e}")
         finally:
             if cap and cap.isOpened():
                 cap.release()
-            print(
-                f"{datetime.now()}: Webcam capture thread finished and webcam released."
-            )
-            self.capture_active = False
+            print(f"{datetime.now()}: {camera.name} capture task finished and source released.")
+
+    async def _inference_loop(self):
+        while not self.model_handler.ready.is_set():
+            await asyncio.sleep(0.1)
+        while True:
+            self.__frame_offered.clear()
+            job = self.scheduler.take()
+            if job is None:
+                try:
+                    # None: nothing queued, sleep until a camera offers a frame
+                    await asyncio.wait_for(self.__frame_offered.wait(), timeout=self.scheduler.wait_time())
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            camera_id, item = job
+            camera = next(c for c in self.cameras if c.camera_id == camera_id)
+            started = time.perf_counter()
+            with METRICS.camera(camera_id):
+                predicted = await self.runtime.run_blocking(self._predict_camera, camera, item)
+            if self.rate_controller is not None and predicted:
+                # Inference time needed per capture interval: one prediction per camera
+                elapsed = time.perf_counter() - started
+                self.rate_controller.observe(elapsed / predicted * len(self.cameras))
+            while self.__unqueued_logs:
+                # Removed only once queued: a cancelled put() leaves it for the final flush
+                await self.__log_queue.put(self.__unqueued_logs[0])
+                self.__unqueued_logs.popleft()
+
+    async def _logging_loop(self):
+        try:
+            while True:
+                entry = await self.__log_queue.get()
+                await self.runtime.run_blocking(self._write_log, *entry)
+        finally:
+            # On stop, let the inference task finish its in-flight prediction first
+            if self.__inference_task is not None:
+                await asyncio.wait([self.__inference_task])
+            remaining = []
+            while not self.__log_queue.empty():
+                remaining.append(self.__log_queue.get_nowait())
+            remaining.extend(self.__unqueued_logs)
+            self.__unqueued_logs.clear()
+            await self.runtime.run_blocking(self._flush_logs, remaining)
+
+    def _write_log(self, camera: CameraStream, captured_at: datetime, label: str, confidence: float):
+        camera.last_label, camera.last_confidence = label, confidence
+        with METRICS.camera(camera.camera_id), METRICS.span("log"):
+            camera.logging_handler.add_label(label, confidence, timestamp=captured_at)
+
+    def _flush_logs(self, entries: List[Tuple[CameraStream, datetime, str, float]]):
+        """Writes the predictions still queued at stop, then saves every camera's log file."""
+        for entry in entries:
+            self._write_log(*entry)
+        for camera in self.cameras:
+            camera.logging_handler.save_log()
+
+    def _next_interval(self) -> float:
+        if self.rate_controller is None:
+            return self.capture_interval
+        self.capture_interval = self.rate_controller.update()
+        if self.__adaptive_budget:
+            self.scheduler.budget_per_second = len(self.cameras) / self.capture_interval
+        return self.capture_interval
+
+    def _predict_camera(self, camera: CameraStream, item) -> int:
+        """
+        Predicts the frames queued while the model was loading, then `item`; the
+        predictions are handed to the logging task. Returns how many were made.
+        """
+        predictions = []
+        while camera.pending_frames:
+            predictions.append(self._predict(*camera.pending_frames.popleft()))
+        predictions.append(self._predict(*item))
+        predictions = [(camera, *p) for p in predictions if p is not None]
+        self.__unqueued_logs.extend(predictions)
+        return len(predictions)
+
+    def _predict(self, captured_at: datetime, frame) -> Optional[Tuple[datetime, str, float]]:
+        with METRICS.span("preprocess"):
+            preprocessed_frame = self.model_handler.preprocess_image(frame)
+        if preprocessed_frame is None:
+            return None
+        with METRICS.span("onnx"):
+            predicted_label, confidence, _ = self.model_handler.predict(preprocessed_frame)
+        if predicted_label is None:
+            return None
+        return captured_at, predicted_label, confidence
@@ -0,0 +1,275 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .handler.latency import LatencyHistogram
+
+METRIC_NAME = "emotion_stage_duration_seconds"
+# Camera the current thread works for; spans started there are tagged with it
+_CAMERA: ContextVar[Optional[str]] = ContextVar("metrics_camera", default=None)
+# Set inside Metrics.collect(): spans are appended here instead of recorded
+_COLLECTED: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("metrics_collected", default=None)
+
+
+class _NullSpan:
+    """Returned by Metrics.span() while disabled; entering and leaving it does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: LatencyHistogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.record(time.perf_counter() - self.start)
+        return False
+
+
+class _CollectingSpan:
+    __slots__ = ("stage", "collected", "start")
+
+    def __init__(self, stage: str, collected: List[Tuple[str, float]]):
+        self.stage = stage
+        self.collected = collected
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.collected.append((self.stage, time.perf_counter() - self.start))
+        return False
+
+
+class Metrics:
+    """
+    Per-stage timing for the hot paths (capture, detect, mesh, features, scaler, onnx,
+    draw, log). Spans may nest; every stage gets its own LatencyHistogram.
+    While disabled, span() returns a shared no-op object, so instrumented code pays one
+    attribute check per span.
+    Results are exposed as Prometheus text (serve_http) and as a periodic summary line
+    (start_summary_log). With several cameras, spans are tagged with the camera set by
+    camera() / set_camera() on the current thread. Work done in another process is timed
+    inside collect() there and handed back to record_all() in the exporting process.
+    Attributes:
+        enabled (bool): Whether spans are recorded.
+        histograms (Dict[Tuple[str, Optional[str]], LatencyHistogram]): Durations per
+            (stage, camera id) pair; the camera id is None for single-camera apps.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.histograms: Dict[Tuple[str, Optional[str]], LatencyHistogram] = {}
+        self.__lock = threading.Lock()
+        self.__server = None
+        self.__stop = threading.Event()
+
+    def histogram(self, stage: str, camera: Optional[str] = None) -> LatencyHistogram:
+        key = (stage, camera)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.__lock:
+                histogram = self.histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def span(self, stage: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        collected = _COLLECTED.get()
+        if collected is not None:
+            return _CollectingSpan(stage, collected)
+        return _Span(self.histogram(stage, _CAMERA.get()))
+
+    @staticmethod
+    def set_camera(camera: Optional[str]):
+        """Tags the spans of the current thread (e.g. a per-camera capture thread)."""
+        _CAMERA.set(camera)
+
+    @staticmethod
+    def current_camera() -> Optional[str]:
+        """Camera the spans of the current thread are tagged with."""
+        return _CAMERA.get()
+
+    @staticmethod
+    @contextmanager
+    def camera(camera: Optional[str]):
+        """Tags the spans inside the block with `camera`."""
+        token = _CAMERA.set(camera)
+        try:
+            yield
+        finally:
+            _CAMERA.reset(token)
+
+    def timed(self, stage: str):
+        """Decorator form of span()."""
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def record(self, stage: str, seconds: float):
+        if self.enabled:
+            collected = _COLLECTED.get()
+            if collected is not None:
+                collected.append((stage, seconds))
+            else:
+                self.histogram(stage, _CAMERA.get()).record(seconds)
+
+    @staticmethod
+    @contextmanager
+    def collect():
+        """
+        Yields a list that receives the (stage, seconds) pairs of the spans inside the
+        block instead of the histograms. Used in worker processes, which return the list
+        with their result so the parent can pass it to record_all().
+        """
+        collected = []
+        token = _COLLECTED.set(collected)
+        try:
+            yield collected
+        finally:
+            _COLLECTED.reset(token)
+
+    def record_all(self, timings: Iterable[Tuple[str, float]], camera: Optional[str] = None):
+        """Records timings collected by collect(), tagged with `camera`."""
+        if self.enabled:
+            for stage, seconds in timings:
+                self.histogram(stage, camera).record(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Summaries keyed by stage, or "stage[camera]" for camera-tagged spans."""
+        return {
+            stage if camera is None else f"{stage}[{camera}]": histogram.summary()
+            for (stage, camera), histogram in list(self.histograms.items())
+        }
+
+    def prometheus_text(self) -> str:
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent per pipeline stage.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        items = sorted(self.histograms.items(), key=lambda item: (item[0][0], item[0][1] or ""))
+        for (stage, camera), histogram in items:
+            labels = f'stage="{stage}"' if camera is None else f'stage="{stage}",camera="{camera}"'
+            summary = histogram.summary()
+            cumulative = 0
+            counts = list(summary["buckets"].values())
+            for bound_ms, count in zip(histogram.bucket_bounds_ms, counts):
+                cumulative += count
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound_ms / 1000:g}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {summary["count"]}')
+            total_s = (summary["mean_ms"] or 0.0) * summary["count"] / 1000
+            lines.append(f'{METRIC_NAME}_sum{{{labels}}} {total_s:.6f}')
+            lines.append(f'{METRIC_NAME}_count{{{labels}}} {summary["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def summary_line(self) -> str:
+        parts = []
+        for stage, summary in sorted(self.snapshot().items()):
+            if summary.get("p50_ms") is not None:
+                parts.append(
+                    f"{stage}=p50:{summary['p50_ms']:.1f}ms,p95:{summary['p95_ms']:.1f}ms,n:{summary['count']}"
+                )
+        return "METRICS " + (" ".join(parts) if parts else "no samples")
+
+    def serve_http(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serves GET /metrics in Prometheus text format from a daemon thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.__server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.__server.serve_forever, daemon=True).start()
+        print(f"Metrics available at http://{host}:{self.__server.server_port}/metrics")
+        return self.__server
+
+    def start_summary_log(self, interval_seconds: float = 60.0) -> threading.Thread:
+        """Prints summary_line() every `interval_seconds` from a daemon thread."""
+
+        def run():
+            while not self.__stop.wait(interval_seconds):
+                print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {self.summary_line()}")
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.__stop.set()
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+
+METRICS = Metrics()
+
+
+def start_metrics(
+    enabled: Optional[bool] = None,
+    port: Optional[int] = None,
+    summary_interval_seconds: Optional[float] = None,
+) -> Metrics:
+    """
+    Enables the shared METRICS instance. Unset arguments come from the environment:
+    METRICS_ENABLED (1/0), METRICS_PORT (0 disables the endpoint, default 9464) and
+    METRICS_SUMMARY_INTERVAL (seconds, 0 disables the summary line, default 60).
+    """
+    if enabled is None:
+        enabled = os.environ.get("METRICS_ENABLED", "0").lower() in ("1", "true", "yes")
+    if not enabled:
+        return METRICS
+    if port is None:
+        port = int(os.environ.get("METRICS_PORT", "9464"))
+    if summary_interval_seconds is None:
+        summary_interval_seconds = float(os.environ.get("METRICS_SUMMARY_INTERVAL", "60"))
+
+    METRICS.enabled = True
+    if port:
+        try:
+            METRICS.serve_http(port)
+        except OSError as e:
+            print(f"Could not start metrics endpoint on port {port}: {e}")
+    if summary_interval_seconds > 0:
+        METRICS.start_summary_log(summary_interval_seconds)
+    return METRICS
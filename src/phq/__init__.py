@@ -1,3 +1,4 @@
+from .bank import QuestionBank, get_question_bank
 from .manager import PHQManager
 
-__all__ = ["PHQManager"]
+__all__ = ["PHQManager", "QuestionBank", "get_question_bank"]
@@ -0,0 +1,147 @@
+import csv
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CACHE_VERSION = 2
+
+
+class QuestionBank:
+    """
+    A precompiled question bank built from a CSV file.
+    Rows are validated, deduplicated and grouped by question id once and cached as a
+    JSON index next to the source file. The cache is rebuilt whenever the source file's
+    mtime or size changes, so later loads skip CSV parsing (and pandas) entirely.
+    Loading can run in a background thread so a UI can be shown before the bank is ready.
+    Attributes:
+        source_path (str): Path to the source CSV file.
+        id_column (str): Name of the column holding the question id.
+        columns (Sequence[str]): Columns kept for every variant of a question.
+        cache_path (str): Path to the JSON index.
+    """
+
+    def __init__(
+        self,
+        source_path: str,
+        id_column: str = "id",
+        columns: Sequence[str] = ("text", "aug_text"),
+        cache_path: Optional[str] = None,
+    ):
+        self.source_path = source_path
+        self.id_column = id_column
+        self.columns = list(columns)
+        self.cache_path = cache_path if cache_path else f"{source_path}.index.json"
+        self.__groups: Optional[Dict[int, List[List[str]]]] = None
+        self.__lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__groups is not None
+
+    def load(self) -> Dict[int, List[List[str]]]:
+        with self.__lock:
+            if self.__groups is None:
+                stamp = self.__source_stamp()
+                groups = self.__read_cache(stamp)
+                if groups is None:
+                    groups = self.__build_from_csv()
+                    self.__write_cache(stamp, groups)
+                self.__groups = groups
+        return self.__groups
+
+    def load_async(
+        self, callback: Optional[Callable[[Optional[Dict[int, List[List[str]]]]], None]] = None
+    ) -> threading.Thread:
+        """
+        Loads the bank in a daemon thread. `callback` is called from that thread with the
+        grouped questions, or with None if loading failed.
+        """
+
+        def run():
+            try:
+                groups = self.load()
+            except Exception as e:
+                print(f"Error loading question bank '{self.source_path}': {e}")
+                groups = None
+            if callback:
+                callback(groups)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def __source_stamp(self) -> Dict[str, int]:
+        stat = os.stat(self.source_path)
+        return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+    def __build_from_csv(self) -> Dict[int, List[List[str]]]:
+        groups: Dict[int, List[List[str]]] = {}
+        seen = set()
+        with open(self.source_path, mode="r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            missing = [c for c in [self.id_column, *self.columns] if c not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"Missing columns {missing} in '{self.source_path}'")
+            for row in reader:
+                try:
+                    idx = int(row[self.id_column])
+                except (TypeError, ValueError):
+                    print(f"Skipping row due to invalid ID format: {row[self.id_column]}")
+                    continue
+                values = [(row[col] or "").strip().strip('"') for col in self.columns]
+                if not all(values):
+                    print(f"Skipping incomplete row for ID {idx}: {values}")
+                    continue
+                key = (idx, *values)
+                if key in seen:
+                    continue
+                seen.add(key)
+                groups.setdefault(idx, []).append(values)
+        return dict(sorted(groups.items()))
+
+    def __read_cache(self, stamp: Dict[str, int]) -> Optional[Dict[int, List[List[str]]]]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if (
+            cache.get("version") != CACHE_VERSION
+            or cache.get("source") != stamp
+            or cache.get("id_column") != self.id_column
+            or cache.get("columns") != self.columns
+        ):
+            return None
+        return {int(idx): variants for idx, variants in cache["groups"].items()}
+
+    def __write_cache(self, stamp: Dict[str, int], groups: Dict[int, List[List[str]]]):
+        cache = {
+            "version": CACHE_VERSION,
+            "source": stamp,
+            "id_column": self.id_column,
+            "columns": self.columns,
+            "groups": groups,
+        }
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Could not write question bank cache '{self.cache_path}': {e}")
+
+
+_SHARED_BANKS: Dict[Tuple[str, str, Tuple[str, ...]], QuestionBank] = {}
+_SHARED_BANKS_LOCK = threading.Lock()
+
+
+def get_question_bank(
+    source_path: str, id_column: str = "id", columns: Sequence[str] = ("text", "aug_text")
+) -> QuestionBank:
+    """Returns the process-wide QuestionBank for a source file, so it is parsed only once."""
+    key = (os.path.abspath(source_path), id_column, tuple(columns))
+    with _SHARED_BANKS_LOCK:
+        if key not in _SHARED_BANKS:
+            _SHARED_BANKS[key] = QuestionBank(source_path, id_column=id_column, columns=columns)
+        return _SHARED_BANKS[key]
@@ -1,23 +1,22 @@
 from copy import deepcopy
 import random
-import pandas as pd
+from .bank import get_question_bank
 from .options import PHQ_OPTIONS
 
 
 class PHQManager:
     def __init__(self, source_path: str | None = None):
         self.__source_path = source_path if source_path else "./questions.csv"
-        self.__load_df()
-
-    def __load_df(self):
-        df = pd.read_csv(self.__source_path)
-        indexes = df["id"].unique()
-        cols = ["text", "aug_text"]
-        self.__questions = {idx: df[df["id"] == idx][cols].values for idx in indexes}
+        self.__bank = get_question_bank(
+            self.__source_path, id_column="id", columns=["text", "aug_text"]
+        )
+        # Start parsing in the background; get_questions() waits for it if needed
+        self.__bank.load_async()
 
     def get_questions(self):
+        questions = self.__bank.load()
         selected_questions = {
-            idx: random.choice(self.__questions[idx]) for idx in self.__questions.keys()
+            idx: random.choice(questions[idx]) for idx in questions.keys()
         }
         return selected_questions
 
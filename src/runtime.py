@@ -0,0 +1,183 @@
+"""
+asyncio runtime shared by the apps.
+
+Capture, inference, logging and UI updates run as asyncio tasks connected by bounded
+queues; blocking calls (camera reads, ONNX, file writes) are offloaded to a thread pool
+with run_blocking(). Shutdown cancels the tasks and waits for their cleanup instead of
+joining threads with a timeout.
+
+Qt apps run the loop through qasync (run_qt_app), so tasks and widgets share the GUI
+thread. Without a running loop (e.g. a headless script), the runtime starts its own
+loop in a background thread.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Coroutine, Optional, Set
+
+
+def put_latest(queue: asyncio.Queue, item: Any) -> bool:
+    """Puts `item` without blocking; a full queue drops its oldest item. Returns False if one was dropped."""
+    dropped = False
+    while queue.full():
+        try:
+            queue.get_nowait()
+            dropped = True
+        except asyncio.QueueEmpty:
+            break
+    queue.put_nowait(item)
+    return not dropped
+
+
+class AsyncRuntime:
+    """
+    Owns an event loop's tasks and the executor for their blocking calls.
+    Attributes:
+        loop (Optional[asyncio.AbstractEventLoop]): Loop the tasks run on (set by start()).
+        executor (ThreadPoolExecutor): Threads for run_blocking().
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, name: str = "runtime"):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.__tasks: Set[asyncio.Task] = set()
+        self.__thread = None
+
+    def start(self):
+        """Binds to the running loop, or starts a private loop thread if there is none."""
+        if self.loop is not None:
+            return
+        try:
+            self.loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.loop = asyncio.new_event_loop()
+            self.__thread = threading.Thread(target=self.loop.run_forever, name=self.name, daemon=True)
+            self.__thread.start()
+
+    def spawn(self, coro: Coroutine, name: Optional[str] = None) -> asyncio.Task:
+        self.start()
+        if self.__in_loop():
+            return self.__create_task(coro, name)
+        future = asyncio.run_coroutine_threadsafe(self.__create_task_async(coro, name), self.loop)
+        return future.result()
+
+    async def run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs `func` in the executor; context variables (e.g. the metrics camera tag) carry
+        over. A thread cannot be interrupted, so on cancellation the call is allowed to
+        finish before CancelledError propagates: cleanup (e.g. releasing the camera it
+        reads from) never races it.
+        """
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        future = asyncio.get_running_loop().run_in_executor(self.executor, call)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await asyncio.wait([future])
+            raise
+
+    def cancel(self):
+        """Requests cooperative cancellation of all tasks; safe to call from Qt slots."""
+        if self.loop is None:
+            return
+        if self.__in_loop():
+            for task in list(self.__tasks):
+                task.cancel()
+        else:
+            self.loop.call_soon_threadsafe(self.cancel)
+
+    async def shutdown(self, timeout: float = 2.5):
+        """Cancels the tasks, waits up to `timeout` seconds for their cleanup and stops the executor."""
+        tasks = [task for task in self.__tasks if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                print(f"Task '{task.get_name()}' did not finish cleanup in time.")
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stop(self, timeout: float = 2.5):
+        """
+        Blocking shutdown for callers outside the loop. Inside the loop (e.g. a Qt
+        closeEvent under qasync) it only requests cancellation; run_qt_app awaits the cleanup.
+        """
+        if self.loop is None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            return
+        if self.__in_loop():
+            self.cancel()
+            return
+        asyncio.run_coroutine_threadsafe(self.shutdown(timeout), self.loop).result(timeout + 1)
+        if self.__thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.__thread.join(timeout=timeout)
+            self.__thread = None
+
+    def __in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def __create_task(self, coro: Coroutine, name: Optional[str]) -> asyncio.Task:
+        task = self.loop.create_task(self.__report_errors(coro), name=name)
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+        return task
+
+    async def __create_task_async(self, coro: Coroutine, name: Optional[str]) -> asyncio.Task:
+        return self.__create_task(coro, name)
+
+    @staticmethod
+    async def __report_errors(coro: Awaitable):
+        try:
+            return await coro
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Task '{asyncio.current_task().get_name()}' failed: {e}")
+
+
+def run_qt_app(app, *runtimes: AsyncRuntime, setup: Optional[Callable[[], Any]] = None) -> int:
+    """
+    Runs the Qt application on a qasync event loop until it quits, then shuts the
+    runtimes down (cancelling their tasks). `setup` is called once the loop runs, so it
+    can create windows that spawn tasks; if it raises, the app exits and the exception
+    propagates after the shutdown. Returns the Qt event loop's exit status: the code
+    passed to app.exit(), 0 for app.quit() or closing the last window.
+    """
+    try:
+        import qasync
+    except ImportError as e:
+        raise ImportError("qasync is required to run the app (pip install qasync)") from e
+
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    setup_errors = []
+
+    def run_setup():
+        try:
+            setup()
+        except Exception as e:
+            setup_errors.append(e)
+            app.exit(1)
+
+    if setup is not None:
+        loop.call_soon(run_setup)
+    with loop:
+        # run_forever returns app.exec()'s status; run_until_complete would discard it
+        exit_code = loop.run_forever()
+        for runtime in runtimes:
+            try:
+                loop.run_until_complete(runtime.shutdown())
+            except RuntimeError as e:
+                print(f"Runtime '{runtime.name}' shutdown interrupted: {e}")
+    if setup_errors:
+        raise setup_errors[0]
+    return exit_code
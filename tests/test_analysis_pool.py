@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import wait
+
+import numpy as np
+import pytest
+
+from src.analysis_pool import AnalysisPool
+from src.metrics import METRICS
+
+FRAME_SHAPE = (48, 64, 3)
+BOXES = [(0, 0, 8, 8), (10, 10, 8, 8), (20, 20, 8, 8)]
+
+
+class FakeAnalyzer:
+    """Created in every worker process; reports three faces and labels each by its mean pixel value."""
+
+    def detect(self, frame):
+        with METRICS.span("detect"):
+            return BOXES
+
+    def classify(self, frame, box):
+        with METRICS.span("onnx"):
+            probabilities = np.array([1.0, 0.0]) if frame.mean() < 128 else np.array([0.0, 1.0])
+        return tuple(box), int(np.argmax(probabilities)), probabilities
+
+
+class Results:
+    def __init__(self):
+        self.calls = []
+        self.done = threading.Event()
+
+    def __call__(self, sequence, boxes, analyses):
+        self.calls.append((sequence, boxes, analyses))
+        self.done.set()
+
+
+@pytest.fixture
+def pool():
+    pool = AnalysisPool(FakeAnalyzer, FRAME_SHAPE, workers=2)
+    yield pool
+    pool.close()
+
+
+def test_every_face_is_classified(pool):
+    results = Results()
+
+    assert pool.submit(np.full(FRAME_SHAPE, 200, dtype=np.uint8), results)
+
+    assert results.done.wait(30)
+    [(sequence, boxes, analyses)] = results.calls
+    assert sequence == 1
+    assert boxes == BOXES
+    assert sorted(box for box, _, _ in analyses) == BOXES
+    assert all(label == 1 for _, label, _ in analyses)
+
+
+def test_failed_classify_submission_still_calls_back(pool):
+    executor = pool._AnalysisPool__executor
+    submit = executor.submit
+    submitted = []
+
+    def submit_failing_on_second_face(fn, *args):
+        if fn.__name__ == "_classify" and submitted:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+        future = submit(fn, *args)
+        if fn.__name__ == "_classify":
+            submitted.append(future)
+        return future
+
+    executor.submit = submit_failing_on_second_face
+    results = Results()
+
+    assert pool.submit(np.zeros(FRAME_SHAPE, dtype=np.uint8), results)
+
+    assert results.done.wait(30)
+    assert results.calls == [(1, BOXES, [])]
+    assert pool.broken
+    # The face that was already queued does not produce a second callback
+    wait(submitted, timeout=30)
+    assert len(results.calls) == 1
+    assert not pool.submit(np.zeros(FRAME_SHAPE, dtype=np.uint8), results)
+
+
+def test_worker_stage_timings_are_recorded_in_the_parent(monkeypatch):
+    monkeypatch.setattr(METRICS, "enabled", True)
+    monkeypatch.setattr(METRICS, "histograms", {})
+    pool = AnalysisPool(FakeAnalyzer, FRAME_SHAPE, workers=2)
+    results = Results()
+    try:
+        with METRICS.camera("cam1"):
+            assert pool.submit(np.zeros(FRAME_SHAPE, dtype=np.uint8), results)
+        assert results.done.wait(30)
+    finally:
+        pool.close()
+
+    assert set(METRICS.histograms) == {("detect", "cam1"), ("onnx", "cam1")}
+    assert METRICS.histograms[("detect", "cam1")].summary()["count"] == 1
+    assert METRICS.histograms[("onnx", "cam1")].summary()["count"] == len(BOXES)
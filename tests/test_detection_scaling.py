@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from src.detection.scaling import (
+    map_box_to_full_resolution,
+    map_boxes_to_full_resolution,
+    prepare_detection_frame,
+)
+
+# Odd sizes so that no downscale factor divides them evenly
+FRAME_W, FRAME_H = 641, 479
+
+
+def _frame(width=FRAME_W, height=FRAME_H):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("downscale", [1.0, 1.5, 2.0, 2.5, 3.0, 4.0])
+def test_prepare_detection_frame_size_and_scale(downscale):
+    small, (scale_x, scale_y) = prepare_detection_frame(_frame(), downscale, grayscale=True)
+
+    assert small.ndim == 2
+    assert small.dtype == np.uint8
+    if downscale <= 1.0:
+        assert small.shape == (FRAME_H, FRAME_W)
+        assert (scale_x, scale_y) == (1.0, 1.0)
+    else:
+        expected_w, expected_h = round(FRAME_W / downscale), round(FRAME_H / downscale)
+        assert small.shape == (expected_h, expected_w)
+        # Scales come from the real sizes, so they differ per axis after rounding
+        assert scale_x == pytest.approx(FRAME_W / expected_w)
+        assert scale_y == pytest.approx(FRAME_H / expected_h)
+
+
+def test_prepare_detection_frame_keeps_color_without_grayscale():
+    small, _ = prepare_detection_frame(_frame(), 2.0, grayscale=False)
+    assert small.shape == (round(FRAME_H / 2.0), round(FRAME_W / 2.0), 3)
+
+
+@pytest.mark.parametrize("downscale", [1.0, 1.5, 2.0, 3.0, 4.0])
+def test_whole_small_image_maps_to_whole_frame(downscale):
+    small, scale = prepare_detection_frame(_frame(), downscale, grayscale=True)
+    small_h, small_w = small.shape
+
+    box = map_box_to_full_resolution((0, 0, small_w, small_h), scale, FRAME_W, FRAME_H)
+
+    assert box == (0, 0, FRAME_W, FRAME_H)
+
+
+@pytest.mark.parametrize("downscale", [1.0, 1.5, 2.0, 3.0, 4.0])
+def test_mapped_box_covers_the_detected_region(downscale):
+    small, (scale_x, scale_y) = prepare_detection_frame(_frame(), downscale, grayscale=True)
+    small_box = (17, 23, 41, 37)
+
+    x, y, w, h = map_box_to_full_resolution(small_box, (scale_x, scale_y), FRAME_W, FRAME_H)
+
+    sx, sy, sw, sh = small_box
+    assert x == int(np.floor(sx * scale_x))
+    assert y == int(np.floor(sy * scale_y))
+    assert x + w == int(np.ceil((sx + sw) * scale_x))
+    assert y + h == int(np.ceil((sy + sh) * scale_y))
+    # Never more than one pixel of slack per edge
+    assert sw * scale_x <= w <= sw * scale_x + 2
+    assert sh * scale_y <= h <= sh * scale_y + 2
+
+
+def test_box_crossing_the_frame_edge_is_clipped():
+    scale = (2.0, 2.0)
+
+    assert map_box_to_full_resolution((-5, -5, 20, 20), scale, 100, 80) == (0, 0, 30, 30)
+    assert map_box_to_full_resolution((40, 30, 20, 20), scale, 100, 80) == (80, 60, 20, 20)
+
+
+@pytest.mark.parametrize(
+    "box",
+    [
+        (60, 10, 10, 10),  # Entirely right of the frame
+        (10, 50, 10, 10),  # Entirely below the frame
+        (-20, 10, 10, 10),  # Entirely left of the frame
+        (10, 10, 0, 10),  # Zero width
+        (10, 10, 10, -3),  # Negative height
+    ],
+)
+def test_degenerate_boxes_are_dropped(box):
+    assert map_box_to_full_resolution(box, (2.0, 2.0), 100, 80) is None
+    assert map_boxes_to_full_resolution([box], (2.0, 2.0), 100, 80) == []
+
+
+def test_boxes_are_sorted_largest_first():
+    boxes = [(0, 0, 5, 5), (10, 10, 15, 15), (30, 0, 8, 8), (60, 60, 5, 5)]
+
+    mapped = map_boxes_to_full_resolution(boxes, (2.0, 2.0), 100, 80)
+
+    assert mapped == [(20, 20, 30, 30), (60, 0, 16, 16), (0, 0, 10, 10)]
+
+
+def test_box_accepts_float_coordinates_and_extra_fields():
+    # Detectors such as YuNet return float boxes followed by landmarks and a score
+    box = map_box_to_full_resolution((10.4, 20.6, 30.2, 40.1, 0.9), (1.5, 1.5), 200, 200)
+
+    assert box == (15, 30, 46, 62)
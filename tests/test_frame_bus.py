@@ -0,0 +1,250 @@
+import os
+import sys
+import threading
+import uuid
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pytest
+
+from src import frame_bus
+from src.frame_bus import FrameBusPublisher, FrameBusSource
+
+WIDTH, HEIGHT, SLOTS = 8, 6, 4
+# Python 3.13+ attaches with track=False and never touches the resource tracker
+needs_register_filter = pytest.mark.skipif(sys.version_info >= (3, 13), reason="attach uses track=False")
+
+
+def _frame(value):
+    return np.full((HEIGHT, WIDTH, 3), value, dtype=np.uint8)
+
+
+@pytest.fixture
+def bus_name():
+    return f"phq_test_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture
+def publisher(bus_name):
+    publisher = FrameBusPublisher(bus_name, WIDTH, HEIGHT, slots=SLOTS, fps=30.0)
+    yield publisher
+    publisher.close()
+
+
+@pytest.fixture
+def source(publisher):
+    source = FrameBusSource(publisher.name, timeout=0.05)
+    yield source
+    source.release()
+
+
+def test_publish_read_round_trip(publisher, source):
+    assert source.isOpened()
+    assert source.fps == 30.0
+
+    sequence = publisher.publish(_frame(7), timestamp=123.5)
+    ret, frame = source.read()
+
+    assert ret
+    np.testing.assert_array_equal(frame, _frame(7))
+    assert source.last_sequence == sequence == 1
+    assert source.last_timestamp == 123.5
+    assert not np.shares_memory(frame, source.frame(sequence))
+
+
+def test_read_waits_for_a_newer_frame(publisher, source):
+    publisher.publish(_frame(1))
+    assert source.read()[0]
+
+    # Nothing new within the timeout
+    assert source.read() == (False, None)
+
+    publisher.publish(_frame(2))
+    publisher.publish(_frame(3))
+    ret, frame = source.read()
+    assert ret
+    np.testing.assert_array_equal(frame, _frame(3))  # Newest, skipping frame 2
+    assert source.last_sequence == 3
+
+
+def test_read_into_buffer_reuses_it(publisher, source):
+    buffer = np.empty((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    publisher.publish(_frame(5))
+
+    ret, frame = source.read(buffer)
+
+    assert ret and frame is buffer
+    np.testing.assert_array_equal(buffer, _frame(5))
+
+
+def test_zero_copy_read_returns_a_view(publisher):
+    source = FrameBusSource(publisher.name, timeout=0.05, copy=False)
+    try:
+        sequence = publisher.publish(_frame(9))
+        ret, frame = source.read()
+        assert ret
+        assert np.shares_memory(frame, source.frame(sequence))
+        np.testing.assert_array_equal(frame, _frame(9))
+    finally:
+        source.release()
+
+
+def test_decode_into_slot_with_begin_write_commit(publisher, source):
+    sequence, view = publisher.begin_write()
+    view[:] = 42
+    # Not visible until committed
+    assert source.read() == (False, None)
+
+    publisher.commit(sequence, timestamp=1.0)
+    ret, frame = source.read()
+    assert ret
+    np.testing.assert_array_equal(frame, _frame(42))
+
+
+def test_slot_overwritten_mid_read_returns_none(publisher, source, monkeypatch):
+    sequence = publisher.publish(_frame(1))
+    copyto = np.copyto
+
+    def copy_while_publisher_laps_the_ring(dst, src, *args, **kwargs):
+        copyto(dst, src, *args, **kwargs)
+        monkeypatch.setattr(frame_bus.np, "copyto", copyto)
+        for value in range(2, 2 + SLOTS):
+            publisher.publish(_frame(value))
+
+    monkeypatch.setattr(frame_bus.np, "copyto", copy_while_publisher_laps_the_ring)
+
+    assert source._FrameBusSource__take(sequence, None) is None
+    assert source.last_sequence == 0  # The torn frame was not accepted
+
+
+def test_read_retries_with_newer_frame_after_overwrite(publisher, source, monkeypatch):
+    publisher.publish(_frame(1))
+    copyto = np.copyto
+
+    def copy_while_publisher_laps_the_ring(dst, src, *args, **kwargs):
+        copyto(dst, src, *args, **kwargs)
+        monkeypatch.setattr(frame_bus.np, "copyto", copyto)
+        for value in range(2, 2 + SLOTS):
+            publisher.publish(_frame(value))
+
+    monkeypatch.setattr(frame_bus.np, "copyto", copy_while_publisher_laps_the_ring)
+
+    ret, frame = source.read()
+    assert ret
+    assert source.last_sequence == 1 + SLOTS
+    np.testing.assert_array_equal(frame, _frame(1 + SLOTS))
+
+
+def test_frame_being_written_is_not_current(publisher, source):
+    sequence = publisher.publish(_frame(1))
+    for _ in range(SLOTS - 1):
+        publisher.publish(_frame(2))
+    publisher.begin_write()  # Marks the slot of `sequence` as being written
+
+    assert not source.is_current(sequence)
+
+
+def test_is_current_after_ring_wraps(publisher, source):
+    first = publisher.publish(_frame(1))
+    assert source.is_current(first)
+    assert not source.is_current(0)
+
+    for value in range(2, SLOTS + 1):
+        publisher.publish(_frame(value))
+    assert source.is_current(first)  # Ring not wrapped yet
+
+    publisher.publish(_frame(SLOTS + 1))  # Reuses the slot of `first`
+    assert not source.is_current(first)
+    assert source.frame(first) is None
+    assert source.is_current(first + SLOTS)
+    np.testing.assert_array_equal(source.frame(first + SLOTS), _frame(SLOTS + 1))
+
+
+def test_publish_rejects_wrong_shape(publisher):
+    with pytest.raises(ValueError):
+        publisher.publish(np.zeros((HEIGHT + 1, WIDTH, 3), dtype=np.uint8))
+
+
+def test_close_marks_bus_closed_and_unlinks(bus_name):
+    publisher = FrameBusPublisher(bus_name, WIDTH, HEIGHT, slots=SLOTS)
+    source = FrameBusSource(bus_name, timeout=0.05)
+    publisher.publish(_frame(1))
+    try:
+        publisher.close()
+
+        assert not source.isOpened()
+        assert source.read() == (False, None)
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=bus_name)
+        assert not FrameBusSource(bus_name).isOpened()
+        publisher.close()  # Closing twice is a no-op
+    finally:
+        source.release()
+
+
+def test_source_without_bus_is_not_opened(bus_name):
+    source = FrameBusSource(bus_name)
+    assert not source.isOpened()
+    assert source.read() == (False, None)
+    source.release()
+
+
+@needs_register_filter
+def test_concurrent_attaches_leave_the_resource_tracker_intact(publisher, monkeypatch):
+    registered = []
+    register = resource_tracker.register
+
+    def recording_register(name, rtype):
+        registered.append((name, rtype))
+        register(name, rtype)
+
+    monkeypatch.setattr(resource_tracker, "register", recording_register)
+    barrier = threading.Barrier(8)
+    sources, errors = [], []
+
+    def attach():
+        barrier.wait()
+        try:
+            for _ in range(20):
+                sources.append(FrameBusSource(publisher.name, timeout=0.05))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=attach) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert not errors
+        assert len(sources) == 160 and all(source.isOpened() for source in sources)
+        assert resource_tracker.register is recording_register
+        assert registered == []
+
+        # Registration is back to normal once the attaches are done
+        other = shared_memory.SharedMemory(create=True, size=64)
+        other.close()
+        other.unlink()
+        assert registered == [(other._name, "shared_memory")]
+    finally:
+        for source in sources:
+            source.release()
+
+
+@needs_register_filter
+def test_attach_does_not_hide_registrations_of_other_threads(publisher, monkeypatch):
+    registered = []
+    monkeypatch.setattr(resource_tracker, "register", lambda name, rtype: registered.append((name, rtype)))
+    SharedMemory = shared_memory.SharedMemory
+
+    def attach_while_another_thread_registers(name=None, create=False, size=0):
+        other = threading.Thread(target=lambda: resource_tracker.register("/other", "shared_memory"))
+        other.start()
+        other.join()
+        return SharedMemory(name=name, create=create, size=size)
+
+    monkeypatch.setattr(frame_bus.shared_memory, "SharedMemory", attach_while_another_thread_registers)
+
+    frame_bus._attach_shared_memory(publisher.name).close()
+
+    assert registered == [("/other", "shared_memory")]
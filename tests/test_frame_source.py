@@ -0,0 +1,88 @@
+import cv2
+import pytest
+
+from src import frame_source
+from src.frame_source import CameraSource, SyntheticSource, open_frame_source
+
+
+class FakeCapture:
+    """Stands in for cv2.VideoCapture; records the properties set on it."""
+
+    supported = {cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT, cv2.CAP_PROP_FPS}
+
+    def __init__(self, index):
+        self.index = index
+        self.properties = {cv2.CAP_PROP_FPS: 30.0}
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        if prop not in self.supported:
+            return False
+        self.properties[prop] = value
+        return True
+
+    def get(self, prop):
+        return self.properties.get(prop, 0.0)
+
+    def release(self):
+        pass
+
+
+@pytest.fixture
+def fake_capture(monkeypatch):
+    monkeypatch.setattr(frame_source.cv2, "VideoCapture", FakeCapture)
+    return FakeCapture
+
+
+def test_camera_options_are_applied(fake_capture):
+    source = open_frame_source("camera:2?width=1280&height=720&fps=15")
+
+    assert isinstance(source, CameraSource)
+    assert source.cap.index == 2
+    assert source.cap.properties[cv2.CAP_PROP_FRAME_WIDTH] == 1280
+    assert source.cap.properties[cv2.CAP_PROP_FRAME_HEIGHT] == 720
+    assert source.fps == 15.0
+
+
+def test_camera_without_options_keeps_device_defaults(fake_capture):
+    for spec in (0, "0", "camera:0"):
+        source = open_frame_source(spec)
+        assert source.cap.properties == {cv2.CAP_PROP_FPS: 30.0}
+
+
+def test_bare_index_accepts_camera_options(fake_capture):
+    source = open_frame_source("1?width=320")
+
+    assert source.cap.index == 1
+    assert source.cap.properties[cv2.CAP_PROP_FRAME_WIDTH] == 320
+
+
+def test_rejected_camera_property_is_reported(fake_capture, monkeypatch, capsys):
+    monkeypatch.setattr(fake_capture, "supported", set())
+
+    source = open_frame_source("camera:0?fps=60")
+
+    assert source.fps == 30.0
+    assert "could not set fps=60.0" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("spec", ["camera:0?loop=1", "camera:0?timeout=2", "0?num_frames=10"])
+def test_camera_rejects_options_it_cannot_apply(fake_capture, spec):
+    with pytest.raises(ValueError):
+        open_frame_source(spec)
+
+
+def test_unknown_option_is_rejected():
+    with pytest.raises(ValueError):
+        open_frame_source("synthetic?colour=red")
+
+
+def test_synthetic_options_are_applied():
+    source = open_frame_source("synthetic?width=64&height=48&num_frames=2&realtime=0")
+
+    assert isinstance(source, SyntheticSource)
+    frames = [source.read() for _ in range(3)]
+    assert [ret for ret, _ in frames] == [True, True, False]
+    assert frames[0][1].shape == (48, 64, 3)
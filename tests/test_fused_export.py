@@ -0,0 +1,64 @@
+import importlib
+import os
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("onnx")
+onnxruntime = pytest.importorskip("onnxruntime")
+preprocessing = pytest.importorskip("sklearn.preprocessing")
+pytest.importorskip("pandas")
+pytest.importorskip("joblib")
+
+DELTACAM_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "deltacam")
+INPUT_DIM, NUM_CLASSES = 12, 5
+
+
+@pytest.fixture
+def train_classfier(monkeypatch):
+    # The deltacam scripts import their siblings (feature_store) as top-level modules
+    monkeypatch.syspath_prepend(DELTACAM_DIR)
+    return importlib.import_module("train_classfier")
+
+
+@pytest.fixture
+def fitted(train_classfier):
+    rng = np.random.default_rng(0)
+    X = rng.normal(3.0, 2.0, size=(64, INPUT_DIM)).astype(np.float32)
+    scaler = preprocessing.StandardScaler().fit(X)
+    torch.manual_seed(0)
+    model = train_classfier.MLPClassifier(INPUT_DIM, NUM_CLASSES)
+    model.eval()
+    return X, scaler, model
+
+
+def _reference_logits(model, scaler, X):
+    with torch.no_grad():
+        return model(torch.tensor(scaler.transform(X), dtype=torch.float32)).numpy()
+
+
+def test_unscaled_export_runs_with_features_only(train_classfier, fitted, tmp_path):
+    X, scaler, model = fitted
+    path = train_classfier.unscaled_model_path(str(tmp_path / "emotion_model_fused.onnx"))
+    assert path.endswith("emotion_model_fused_unscaled.onnx")
+
+    train_classfier.export_fused_model_to_onnx(model, scaler, INPUT_DIM, path, personalized=False)
+    session = onnxruntime.InferenceSession(path)
+
+    assert [i.name for i in session.get_inputs()] == ["input_features"]
+    logits = session.run(None, {"input_features": X})[0]
+    np.testing.assert_allclose(logits, _reference_logits(model, scaler, X), rtol=1e-4, atol=1e-4)
+
+
+def test_personalized_export_applies_scaling_factors(train_classfier, fitted, tmp_path):
+    X, scaler, model = fitted
+    path = str(tmp_path / "emotion_model_fused.onnx")
+    scaling = np.linspace(0.5, 1.5, INPUT_DIM, dtype=np.float32).reshape(1, -1)
+
+    train_classfier.export_fused_model_to_onnx(model, scaler, INPUT_DIM, path)
+    session = onnxruntime.InferenceSession(path)
+
+    assert [i.name for i in session.get_inputs()] == ["input_features", "scaling_factors"]
+    logits = session.run(None, {"input_features": X, "scaling_factors": np.repeat(scaling, len(X), 0)})[0]
+    np.testing.assert_allclose(logits, _reference_logits(model, scaler, X * scaling), rtol=1e-4, atol=1e-4)
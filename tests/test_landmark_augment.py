@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from deltacam.landmark_augment import (
+    DEFAULT_MIRROR_PERMUTATION,
+    FACEMESH_MIDLINE,
+    FACEMESH_MIRROR_PAIRS,
+    NUM_FACEMESH_LANDMARKS,
+    build_mirror_permutation,
+    mirror_landmarks,
+)
+from deltacam import landmark_augment
+
+IMG_W = 640
+
+
+def _symmetric_face(rng):
+    """A random mesh that is symmetric about x = IMG_W / 2 under the FaceMesh left/right pairs."""
+    coords = rng.uniform(0, IMG_W, size=(NUM_FACEMESH_LANDMARKS, 2))
+    coords[FACEMESH_MIDLINE, 0] = IMG_W / 2
+    for left, right in FACEMESH_MIRROR_PAIRS:
+        coords[right] = (IMG_W - coords[left, 0], coords[left, 1])
+    return coords
+
+
+def test_permutation_is_a_full_involution():
+    perm = DEFAULT_MIRROR_PERMUTATION
+
+    assert perm.shape == (NUM_FACEMESH_LANDMARKS,)
+    np.testing.assert_array_equal(np.sort(perm), np.arange(NUM_FACEMESH_LANDMARKS))
+    np.testing.assert_array_equal(perm[perm], np.arange(NUM_FACEMESH_LANDMARKS))
+    np.testing.assert_array_equal(np.flatnonzero(perm == np.arange(NUM_FACEMESH_LANDMARKS)), FACEMESH_MIDLINE)
+
+
+@pytest.mark.parametrize(
+    "left, right",
+    [(33, 263), (133, 362), (159, 386), (145, 374), (61, 291), (70, 300), (107, 336), (234, 454), (127, 356)],
+)
+def test_known_left_right_pairs(left, right):
+    assert DEFAULT_MIRROR_PERMUTATION[left] == right
+    assert DEFAULT_MIRROR_PERMUTATION[right] == left
+
+
+def test_mirroring_twice_gives_the_original():
+    coords = np.random.default_rng(0).uniform(0, IMG_W, size=(NUM_FACEMESH_LANDMARKS, 2))
+
+    np.testing.assert_allclose(mirror_landmarks(mirror_landmarks(coords, IMG_W), IMG_W), coords)
+
+
+def test_symmetric_face_is_its_own_mirror():
+    coords = _symmetric_face(np.random.default_rng(1))
+
+    np.testing.assert_allclose(mirror_landmarks(coords, IMG_W), coords)
+
+
+def test_duplicate_or_missing_pairs_are_rejected(monkeypatch):
+    pairs = list(FACEMESH_MIRROR_PAIRS)
+
+    monkeypatch.setattr(landmark_augment, "FACEMESH_MIRROR_PAIRS", pairs + [(pairs[0][0], pairs[1][1])])
+    with pytest.raises(ValueError):
+        build_mirror_permutation()
+
+    monkeypatch.setattr(landmark_augment, "FACEMESH_MIRROR_PAIRS", pairs[1:])
+    with pytest.raises(ValueError):
+        build_mirror_permutation()
@@ -0,0 +1,43 @@
+import pytest
+
+from src.metrics import Metrics
+
+
+@pytest.fixture
+def metrics():
+    return Metrics(enabled=True)
+
+
+def test_spans_are_tagged_with_the_camera(metrics):
+    with metrics.span("capture"):
+        pass
+    with metrics.camera("cam1"), metrics.span("capture"):
+        pass
+
+    assert set(metrics.snapshot()) == {"capture", "capture[cam1]"}
+
+
+def test_collect_keeps_spans_out_of_the_histograms(metrics):
+    with metrics.collect() as timings:
+        with metrics.span("detect"):
+            pass
+        metrics.record("onnx", 0.25)
+
+    assert [stage for stage, _ in timings] == ["detect", "onnx"]
+    assert timings[1] == ("onnx", 0.25)
+    assert metrics.histograms == {}
+
+    metrics.record_all(timings, camera="cam1")
+    assert metrics.snapshot()["onnx[cam1]"]["count"] == 1
+    assert metrics.snapshot()["detect[cam1]"]["count"] == 1
+
+
+def test_disabled_metrics_collect_nothing():
+    metrics = Metrics(enabled=False)
+
+    with metrics.collect() as timings, metrics.span("detect"):
+        pass
+    metrics.record_all([("onnx", 0.1)])
+
+    assert timings == []
+    assert metrics.histograms == {}
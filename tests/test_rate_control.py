@@ -0,0 +1,177 @@
+import pytest
+
+from src.handler import rate_control
+from src.handler.rate_control import CpuLoadProbe, RateController, read_battery
+
+
+class FakeCpu:
+    """Replaces CpuLoadProbe; tests set `value` to the load the next update() sees."""
+
+    value = 0.0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def load(self):
+        return FakeCpu.value
+
+
+@pytest.fixture(autouse=True)
+def fake_cpu(monkeypatch):
+    FakeCpu.value = 0.0
+    monkeypatch.setattr(rate_control, "CpuLoadProbe", FakeCpu)
+    return FakeCpu
+
+
+def _battery(root, status="Discharging", capacity=80):
+    battery = root / "BAT0"
+    battery.mkdir(parents=True, exist_ok=True)
+    (battery / "type").write_text("Battery\n")
+    (battery / "status").write_text(f"{status}\n")
+    (battery / "capacity").write_text(f"{capacity}\n")
+    return root
+
+
+def _controller(power_supply_dir, **kwargs):
+    options = dict(update_seconds=0.0, power_supply_dir=str(power_supply_dir))
+    options.update(kwargs)
+    return RateController("test", 0.5, 0.25, 2.0, **options)
+
+
+def _run(controller, updates, latency=None):
+    for _ in range(updates):
+        if latency is not None:
+            controller.observe(latency)
+        controller.update()
+    return controller.interval
+
+
+def test_backs_off_on_high_latency(tmp_path):
+    controller = _controller(tmp_path)
+    FakeCpu.value = 0.3
+
+    # 0.4 s per run exceeds half of the 0.5 s interval
+    interval = _run(controller, 3, latency=0.4)
+
+    assert interval == pytest.approx(0.5 * 1.25**3)
+    assert controller.latency == pytest.approx(0.4)
+
+
+def test_stops_backing_off_once_latency_fits_the_budget(tmp_path):
+    controller = _controller(tmp_path)
+
+    interval = _run(controller, 20, latency=0.4)
+
+    # Within budget (0.4 <= 0.5 * interval) but too slow to speed up again
+    assert 0.8 <= interval < 0.8 * 1.25**2
+    assert _run(controller, 5, latency=0.4) == interval
+
+
+def test_backs_off_on_high_cpu(tmp_path):
+    controller = _controller(tmp_path)
+    FakeCpu.value = 0.95
+
+    assert _run(controller, 2, latency=0.01) == pytest.approx(0.5 * 1.25**2)
+
+
+def test_recovers_on_idle_cpu(tmp_path):
+    controller = _controller(tmp_path)
+    FakeCpu.value = 0.95
+    _run(controller, 4, latency=0.01)
+    slowed = controller.interval
+
+    FakeCpu.value = 0.1
+    _run(controller, 2, latency=0.01)
+    assert controller.interval == pytest.approx(slowed / 1.25**2)
+
+
+def test_holds_between_cpu_thresholds(tmp_path):
+    controller = _controller(tmp_path)
+    FakeCpu.value = 0.7  # Between cpu_low (0.5) and cpu_high (0.85)
+
+    assert _run(controller, 5, latency=0.01) == 0.5
+
+
+def test_clamped_to_bounds(tmp_path):
+    controller = _controller(tmp_path)
+
+    FakeCpu.value = 1.0
+    assert _run(controller, 30, latency=0.01) == 2.0
+
+    FakeCpu.value = 0.0
+    assert _run(controller, 30, latency=0.01) == 0.25
+
+
+def test_base_interval_is_clamped_and_bounds_validated(tmp_path):
+    assert RateController("test", 5.0, 0.25, 2.0).interval == 2.0
+    with pytest.raises(ValueError):
+        RateController("test", 0.5, 2.0, 1.0)
+    with pytest.raises(ValueError):
+        RateController("test", 0.5, 0.0, 1.0)
+
+
+def test_battery_floor_keeps_base_interval(tmp_path):
+    controller = _controller(_battery(tmp_path, capacity=80))
+
+    # Idle CPU and a fast stage, but on battery: never faster than the base interval
+    assert _run(controller, 10, latency=0.01) == 0.5
+    assert controller.on_battery is True
+    assert controller.battery_percent == 80.0
+
+
+def test_battery_floor_lifts_a_faster_interval(tmp_path):
+    controller = _controller(tmp_path)
+    _run(controller, 10, latency=0.01)
+    assert controller.interval == 0.25
+
+    _battery(tmp_path, capacity=80)
+    assert _run(controller, 1) == 0.5
+
+
+def test_low_battery_backs_off(tmp_path):
+    controller = _controller(_battery(tmp_path, capacity=15))
+
+    assert _run(controller, 2, latency=0.01) == pytest.approx(0.5 * 1.25**2)
+
+
+def test_charging_battery_counts_as_mains(tmp_path):
+    controller = _controller(_battery(tmp_path, status="Charging", capacity=10))
+
+    assert _run(controller, 10, latency=0.01) == 0.25
+    assert controller.on_battery is False
+
+
+def test_update_is_rate_limited(tmp_path):
+    controller = _controller(tmp_path, update_seconds=60.0)
+    FakeCpu.value = 1.0
+
+    assert _run(controller, 5, latency=1.0) == 0.5
+
+
+def test_read_battery(tmp_path):
+    assert read_battery(str(tmp_path)) == (None, None)
+    assert read_battery(str(tmp_path / "missing")) == (None, None)
+
+    mains = tmp_path / "AC"
+    mains.mkdir()
+    (mains / "type").write_text("Mains\n")
+    assert read_battery(str(tmp_path)) == (None, None)
+
+    _battery(tmp_path, status="Discharging", capacity=42)
+    assert read_battery(str(tmp_path)) == (True, 42.0)
+    _battery(tmp_path, status="Full", capacity=100)
+    assert read_battery(str(tmp_path)) == (False, 100.0)
+
+
+def test_cpu_load_probe_reads_proc_stat(tmp_path):
+    stat = tmp_path / "stat"
+    # user nice system idle iowait ...
+    stat.write_text("cpu  100 0 100 700 100 0 0 0 0 0\ncpu0 1 2 3 4\n")
+    probe = CpuLoadProbe(str(stat))
+
+    # +300 busy, +100 idle, +0 iowait since the first reading
+    stat.write_text("cpu  300 0 200 800 100 0 0 0 0 0\n")
+    assert probe.load() == pytest.approx(0.75)
+
+    # No time has passed: no reading
+    assert probe.load() is None
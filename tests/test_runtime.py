@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+
+from src.runtime import AsyncRuntime, put_latest, run_qt_app
+
+
+def test_put_latest_drops_the_oldest_item():
+    queue = asyncio.Queue(maxsize=2)
+
+    assert put_latest(queue, 1)
+    assert put_latest(queue, 2)
+    assert not put_latest(queue, 3)
+
+    assert [queue.get_nowait(), queue.get_nowait()] == [2, 3]
+
+
+def test_run_blocking_finishes_the_call_before_cancelling():
+    runtime = AsyncRuntime(max_workers=1, name="test")
+    finished = []
+
+    def slow_call():
+        time.sleep(0.05)
+        finished.append(True)
+
+    async def main():
+        task = asyncio.create_task(runtime.run_blocking(slow_call))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert finished == [True]
+
+    try:
+        asyncio.run(main())
+    finally:
+        runtime.stop()
+
+
+@pytest.fixture
+def qt_app():
+    QtCore = pytest.importorskip("PyQt6.QtCore")
+    pytest.importorskip("qasync")
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    yield app
+    asyncio.set_event_loop(None)
+
+
+def test_run_qt_app_returns_the_exit_status_and_shuts_down(qt_app):
+    runtime = AsyncRuntime(name="test")
+    events = []
+
+    async def background():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+
+    async def work():
+        events.append(await runtime.run_blocking(lambda: "blocking"))
+        qt_app.exit(3)
+
+    def setup():
+        runtime.spawn(background(), name="background")
+        runtime.spawn(work(), name="work")
+
+    assert run_qt_app(qt_app, runtime, setup=setup) == 3
+    # The task still running when the app quit was cancelled during shutdown
+    assert events == ["blocking", "cancelled"]
+
+
+def test_run_qt_app_returns_zero_on_quit(qt_app):
+    runtime = AsyncRuntime(name="test")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        qt_app.quit()
+
+    assert run_qt_app(qt_app, runtime, setup=lambda: runtime.spawn(work())) == 0
+
+
+def test_run_qt_app_propagates_setup_errors(qt_app):
+    runtime = AsyncRuntime(name="test")
+
+    def setup():
+        raise ValueError("window could not be created")
+
+    with pytest.raises(ValueError):
+        run_qt_app(qt_app, runtime, setup=setup)
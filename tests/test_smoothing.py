@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from deltacam.smoothing import SMOOTHING_METHODS, TemporalSmoother
+
+
+@pytest.mark.parametrize("method", SMOOTHING_METHODS)
+def test_update_result_does_not_alias_state(method):
+    smoother = TemporalSmoother(3, method=method, window=4)
+    result = smoother.update([0.2, 0.5, 0.3])
+    state = smoother.state.copy()
+
+    result.fill(0)
+
+    np.testing.assert_array_equal(smoother.state, state)
+    assert not np.shares_memory(smoother.update([0.2, 0.5, 0.3]), smoother.state)
+
+
+def test_ema_continues_from_its_own_state_after_caller_clears_result():
+    smoother = TemporalSmoother(2, method="ema", alpha=0.5)
+    smoother.update([1.0, 0.0]).fill(0)
+
+    np.testing.assert_allclose(smoother.update([0.0, 1.0]), [0.5, 0.5])
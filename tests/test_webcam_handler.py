@@ -0,0 +1,56 @@
+import json
+import threading
+import time
+
+from src.handler.logging import EmotionLogging
+from src.handler.webcam import WebcamHandler
+
+
+class FakeModelHandler:
+    """Stands in for ModelHandler: always ready, counts the predictions it makes."""
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.ready.set()
+        self.ort_session = object()
+        self.predictions = 0
+        self.__lock = threading.Lock()
+
+    def preprocess_image(self, frame):
+        return frame
+
+    def predict(self, frame):
+        with self.__lock:
+            self.predictions += 1
+        return "joy", 0.9, None
+
+
+def test_predictions_are_never_dropped_from_the_logs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    add_label = EmotionLogging.add_label
+
+    def slow_add_label(self, *args, **kwargs):
+        time.sleep(0.02)  # Slower than inference, so the log queue fills up
+        add_label(self, *args, **kwargs)
+
+    monkeypatch.setattr(EmotionLogging, "add_label", slow_add_label)
+    model_handler = FakeModelHandler()
+    handler = WebcamHandler(
+        model_handler,
+        frame_source=["synthetic?realtime=0", "synthetic?realtime=0"],
+        capture_interval=0.005,
+        max_queued_logs=1,
+    )
+
+    handler.start_capture()
+    time.sleep(0.5)
+    handler.stop_capture()
+
+    logged = 0
+    for camera in handler.cameras:
+        with open(camera.logging_handler.log_file_name, encoding="utf-8") as f:
+            entries = json.load(f)
+        assert all(entry["details"]["camera_id"] == camera.camera_id for entry in entries)
+        logged += len(entries)
+    assert model_handler.predictions > 0
+    assert logged == model_handler.predictions
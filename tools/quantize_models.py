@@ -0,0 +1,350 @@
+"""
+Quantization tool for the emotion models (model.onnx, LMP_2019_model.onnx).
+
+Produces, next to the FP32 model:
+  * <stem>.int8_dynamic.onnx  dynamic INT8 (weights quantized, activations at runtime)
+  * <stem>.int8_static.onnx   static INT8 (QDQ, activations calibrated on saved face crops)
+  * <stem>.fp16.onnx          FP16 weights with FP32 inputs/outputs (needs onnxconverter-common)
+
+Every variant is evaluated against the FP32 model and an accuracy/latency table is printed.
+With a labelled evaluation set (<eval_dir>/<class_name>/*.jpg) the gate uses top-1 accuracy,
+otherwise it uses top-1 agreement with the FP32 model. Variants that lose more than
+--max_accuracy_drop percentage points are deleted (unless --keep_failed) so ModelHandler /
+camera_concurrent.py fall back to FP32 when such a variant is selected in src/config/model.py.
+
+Usage:
+    python tools/quantize_models.py --model model.onnx --preset handler \\
+        --calib_dir face_crops/ --eval_dir face_crops_labelled/ --output quantization.json
+    python tools/quantize_models.py --model LMP_2019_model.onnx --preset timm --calib_dir face_crops/
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import onnxruntime
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    QuantFormat,
+    QuantType,
+    quantize_dynamic,
+    quantize_static,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+
+from src.config import model as cfg  # noqa: E402
+from src.handler.latency import LatencyHistogram  # noqa: E402
+from src.handler.model import MODEL_VARIANTS  # noqa: E402
+
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# Preprocessing used by each consumer of the models:
+#   handler: ModelHandler.preprocess_image (plain resize to 224x224)
+#   timm:    timm eval transform used by camera_concurrent.py (resize shorter side, center crop)
+PRESETS = {
+    "handler": {
+        "crop_pct": 1.0,
+        "interpolation": cv2.INTER_LINEAR,
+        "class_names": [
+            "anger", "contempt", "disgust", "embarrass", "fear",
+            "joy", "neutral", "pride", "sadness", "surprise",
+        ],
+    },
+    "timm": {
+        "crop_pct": 0.875,
+        "interpolation": cv2.INTER_CUBIC,
+        "class_names": cfg.CLASS_NAMES,
+    },
+}
+
+
+def list_image_files(directory):
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(paths)
+
+
+def list_labelled_images(directory, class_names):
+    """Returns [(path, label_index)] for <directory>/<class_name>/* images."""
+    samples = []
+    for label, name in enumerate(class_names):
+        class_dir = os.path.join(directory, name)
+        if os.path.isdir(class_dir):
+            samples.extend((path, label) for path in list_image_files(class_dir))
+    return samples
+
+
+def preprocess_crop(image_bgr, input_size, crop_pct=1.0, interpolation=cv2.INTER_LINEAR):
+    """Turns a BGR face crop into a normalized NCHW float32 tensor."""
+    height, width = input_size
+    if crop_pct >= 1.0:
+        img = cv2.resize(image_bgr, (width, height), interpolation=interpolation)
+    else:
+        scale_size = int(math.floor(min(height, width) / crop_pct))
+        h, w = image_bgr.shape[:2]
+        scale = scale_size / min(h, w)
+        resized = cv2.resize(
+            image_bgr, (max(width, round(w * scale)), max(height, round(h * scale))),
+            interpolation=interpolation,
+        )
+        top = (resized.shape[0] - height) // 2
+        left = (resized.shape[1] - width) // 2
+        img = resized[top:top + height, left:left + width]
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0
+    img = (img - IMAGENET_MEAN) / IMAGENET_STD
+    return np.ascontiguousarray(np.transpose(img, (2, 0, 1))[None])
+
+
+def model_input_size(model_path):
+    session = onnxruntime.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+    shape = session.get_inputs()[0].shape
+    if len(shape) == 4 and all(isinstance(d, int) and d > 0 for d in shape[2:]):
+        return shape[2], shape[3]
+    return 224, 224
+
+
+class FaceCropCalibrationReader(CalibrationDataReader):
+    """Feeds preprocessed face crops to onnxruntime's static quantization calibrator."""
+
+    def __init__(self, paths, input_name, input_size, preset):
+        self.paths = paths
+        self.input_name = input_name
+        self.input_size = input_size
+        self.preset = preset
+        self.rewind()
+
+    def get_next(self):
+        for path in self.iterator:
+            image = cv2.imread(path)
+            if image is None:
+                continue
+            tensor = preprocess_crop(
+                image, self.input_size, self.preset["crop_pct"], self.preset["interpolation"]
+            )
+            return {self.input_name: tensor}
+        return None
+
+    def rewind(self):
+        self.iterator = iter(self.paths)
+
+
+def variant_output_path(model_path, variant):
+    stem, ext = os.path.splitext(model_path)
+    return f"{stem}{MODEL_VARIANTS[variant]}{ext}"
+
+
+def build_dynamic(model_path, output_path, calib_paths, input_size, preset):
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QInt8, per_channel=True)
+
+
+def build_static(model_path, output_path, calib_paths, input_size, preset):
+    if not calib_paths:
+        raise ValueError("static quantization needs calibration images (--calib_dir)")
+    source_path = model_path
+    prepared_path = f"{output_path}.prep.onnx"
+    try:
+        # Shape inference + graph optimization make the calibrated ranges more accurate
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+
+        quant_pre_process(model_path, prepared_path, skip_symbolic_shape=True)
+        source_path = prepared_path
+    except Exception as e:
+        print(f"Pre-processing skipped ({e}); quantizing the original graph.")
+
+    input_name = onnxruntime.InferenceSession(
+        source_path, providers=["CPUExecutionProvider"]
+    ).get_inputs()[0].name
+    reader = FaceCropCalibrationReader(calib_paths, input_name, input_size, preset)
+    try:
+        quantize_static(
+            source_path,
+            output_path,
+            reader,
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+            calibrate_method=CalibrationMethod.MinMax,
+        )
+    finally:
+        if os.path.exists(prepared_path):
+            os.remove(prepared_path)
+
+
+def build_fp16(model_path, output_path, calib_paths, input_size, preset):
+    import onnx
+    from onnxconverter_common import float16
+
+    model = onnx.load(model_path)
+    # keep_io_types: callers keep feeding float32 tensors
+    onnx.save(float16.convert_float_to_float16(model, keep_io_types=True), output_path)
+
+
+BUILDERS = {"int8_dynamic": build_dynamic, "int8_static": build_static, "fp16": build_fp16}
+
+
+def evaluate(model_path, tensors, labels, latency_runs, threads):
+    options = onnxruntime.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+    session = onnxruntime.InferenceSession(
+        model_path, sess_options=options, providers=["CPUExecutionProvider"]
+    )
+    input_name = session.get_inputs()[0].name
+    output_name = session.get_outputs()[0].name
+
+    predictions = np.array(
+        [int(np.argmax(session.run([output_name], {input_name: t})[0][0])) for t in tensors],
+        dtype=np.int64,
+    )
+
+    histogram = LatencyHistogram(max_samples=max(1, latency_runs))
+    sample = tensors[0] if tensors else np.zeros((1, 3, 224, 224), dtype=np.float32)
+    for _ in range(3):
+        session.run([output_name], {input_name: sample})
+    for _ in range(latency_runs):
+        start = time.perf_counter()
+        session.run([output_name], {input_name: sample})
+        histogram.record(time.perf_counter() - start)
+    latency = histogram.summary()
+
+    accuracy = None
+    if labels is not None and len(labels):
+        accuracy = float((predictions == labels).mean() * 100.0)
+    return {
+        "size_mb": os.path.getsize(model_path) / (1024 * 1024),
+        "accuracy": accuracy,
+        "predictions": predictions,
+        "p50_ms": latency.get("p50_ms"),
+        "p95_ms": latency.get("p95_ms"),
+    }
+
+
+def format_table(rows):
+    header = f"| {'variant':<13} | {'size MB':>8} | {'accuracy %':>10} | {'agree %':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'speedup':>7} | gate |"
+    lines = [header, "|" + "|".join("-" * (len(col)) for col in header.split("|")[1:-1]) + "|"]
+    for row in rows:
+        accuracy = f"{row['accuracy']:.2f}" if row["accuracy"] is not None else "n/a"
+        lines.append(
+            f"| {row['variant']:<13} | {row['size_mb']:>8.2f} | {accuracy:>10} | {row['agreement']:>8.2f} "
+            f"| {row['p50_ms']:>8.2f} | {row['p95_ms']:>8.2f} | {row['speedup']:>6.2f}x | {row['gate']:<4} |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize an emotion ONNX model and gate it on accuracy.")
+    parser.add_argument("--model", type=str, default=cfg.EMOTION_MODEL_PATH, help="FP32 ONNX model.")
+    parser.add_argument("--preset", choices=PRESETS.keys(), default="handler",
+                        help="Preprocessing of the model consumer (handler: ModelHandler, timm: camera_concurrent.py).")
+    parser.add_argument("--calib_dir", type=str, required=True, help="Saved face crops used for calibration.")
+    parser.add_argument("--eval_dir", type=str, default=None,
+                        help="Labelled face crops (<eval_dir>/<class_name>/*). Defaults to agreement on --calib_dir.")
+    parser.add_argument("--variants", nargs="+", choices=BUILDERS.keys(), default=list(BUILDERS.keys()))
+    parser.add_argument("--max_calib_images", type=int, default=300)
+    parser.add_argument("--max_accuracy_drop", type=float, default=1.0,
+                        help="Maximum loss in accuracy (or FP32 agreement), in percentage points.")
+    parser.add_argument("--keep_failed", action="store_true", help="Keep variants that fail the accuracy gate.")
+    parser.add_argument("--latency_runs", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=0, help="intra_op_num_threads (0: onnxruntime default).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, default=None, help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    preset = PRESETS[args.preset]
+    input_size = model_input_size(args.model)
+    rng = np.random.default_rng(args.seed)
+
+    calib_paths = list_image_files(args.calib_dir)
+    if len(calib_paths) > args.max_calib_images:
+        calib_paths = sorted(rng.choice(calib_paths, args.max_calib_images, replace=False).tolist())
+    print(f"Calibration images: {len(calib_paths)}")
+
+    if args.eval_dir:
+        samples = list_labelled_images(args.eval_dir, preset["class_names"])
+        eval_paths = [path for path, _ in samples]
+        labels = np.array([label for _, label in samples], dtype=np.int64)
+    else:
+        eval_paths, labels = calib_paths, None
+    tensors, kept = [], []
+    for i, path in enumerate(eval_paths):
+        image = cv2.imread(path)
+        if image is not None:
+            tensors.append(preprocess_crop(image, input_size, preset["crop_pct"], preset["interpolation"]))
+            kept.append(i)
+    if labels is not None:
+        labels = labels[kept]
+    if not tensors:
+        print(f"No readable evaluation images found in '{args.eval_dir or args.calib_dir}'.")
+        return
+    print(f"Evaluation images: {len(tensors)} ({'labelled' if labels is not None else 'FP32 agreement only'})")
+
+    baseline = evaluate(args.model, tensors, labels, args.latency_runs, args.threads)
+    rows = [{
+        "variant": "fp32", "path": args.model, "size_mb": baseline["size_mb"],
+        "accuracy": baseline["accuracy"], "agreement": 100.0,
+        "p50_ms": baseline["p50_ms"], "p95_ms": baseline["p95_ms"], "speedup": 1.0, "gate": "-",
+    }]
+
+    for variant in args.variants:
+        output_path = variant_output_path(args.model, variant)
+        print(f"Building {variant} -> '{output_path}'")
+        try:
+            BUILDERS[variant](args.model, output_path, calib_paths, input_size, preset)
+        except Exception as e:
+            print(f"Failed to build {variant}: {e}")
+            continue
+
+        result = evaluate(output_path, tensors, labels, args.latency_runs, args.threads)
+        agreement = float((result["predictions"] == baseline["predictions"]).mean() * 100.0)
+        if labels is not None:
+            drop = baseline["accuracy"] - result["accuracy"]
+        else:
+            drop = 100.0 - agreement
+        passed = drop <= args.max_accuracy_drop
+        rows.append({
+            "variant": variant, "path": output_path, "size_mb": result["size_mb"],
+            "accuracy": result["accuracy"], "agreement": agreement,
+            "p50_ms": result["p50_ms"], "p95_ms": result["p95_ms"],
+            "speedup": baseline["p50_ms"] / result["p50_ms"] if result["p50_ms"] else 0.0,
+            "gate": "pass" if passed else "FAIL",
+        })
+        if not passed and not args.keep_failed:
+            os.remove(output_path)
+            print(f"{variant} dropped {drop:.2f} points (> {args.max_accuracy_drop}); removed '{output_path}'.")
+
+    print()
+    print(format_table(rows))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "timestamp": time.time(),
+                    "model": args.model,
+                    "preset": args.preset,
+                    "calibration_images": len(calib_paths),
+                    "evaluation_images": len(tensors),
+                    "labelled": labels is not None,
+                    "max_accuracy_drop": args.max_accuracy_drop,
+                    "results": rows,
+                },
+                f,
+                indent=4,
+            )
+        print(f"Results written to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,39 @@
 import sys
 from PyQt6.QtWidgets import QApplication, QMainWindow, QSystemTrayIcon, QMenu, QAction
-from PyQt6.QtCore import QThread, QObject, pyqtSignal, pyqtSlot, QStyle
-import cv2
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, QStyle
+from src.frame_source import open_frame_source
+from src.runtime import AsyncRuntime
 
 
 class CameraWorker(QObject):
     finished = pyqtSignal()
     frame_ready = pyqtSignal(object)
 
-    @pyqtSlot()
-    def run(self):
-        cap = cv2.VideoCapture(0)
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            self.frame_ready.emit(frame)
-        cap.release()
-        self.finished.emit()
+    def __init__(self, runtime: AsyncRuntime, frame_source=None):
+        super().__init__()
+        self.runtime = runtime
+        # Webcam index, video file, image directory or "synthetic" (see src/frame_source.py)
+        self.frame_source = frame_source
+
+    def start(self):
+        self.runtime.spawn(self.run(), name="camera-worker")
+
+    async def run(self):
+        # Reads are offloaded to the runtime's executor; frame_ready is emitted on the loop thread
+        cap = await self.runtime.run_blocking(open_frame_source, self.frame_source)
+        try:
+            while cap.isOpened():
+                ret, frame = await self.runtime.run_blocking(cap.read)
+                if not ret:
+                    break
+                self.frame_ready.emit(frame)
+        finally:
+            cap.release()
+            self.finished.emit()
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, runtime: AsyncRuntime):
         super().__init__()
         # ... your main window UI setup ...
 
@@ -45,20 +57,16 @@ class MainWindow(QMainWindow):
         self.tray_icon.setContextMenu(tray_menu)
         self.tray_icon.show()
 
-        # --- Camera Thread Setup ---
-        self.camera_thread = QThread()
-        self.camera_worker = CameraWorker()
-        self.camera_worker.moveToThread(self.camera_thread)
-        self.camera_worker.finished.connect(self.camera_thread.quit)
-        self.camera_thread.started.connect(self.camera_worker.run)
+        # --- Camera Task Setup (runs on the qasync loop, see src/runtime.py) ---
+        self.camera_worker = CameraWorker(runtime)
         self.camera_worker.frame_ready.connect(self.process_frame)
-        self.camera_thread.start()
+        QTimer.singleShot(0, self.camera_worker.start)
 
     def process_frame(self, frame):
         # This is where you would handle the captured frame
         # For example, display it in the UI if the window is visible
         # or perform some background analysis.
-        # This method will be called continuously from the background thread.
+        # This method will be called for every frame from the camera task.
         pass
 
     def closeEvent(self, event):